@@ -1,4 +1,6 @@
-from pkg_resources import resource_filename
+import os
+import shutil
+import tempfile
 import pandas as pd
 from psifr import fr
 
@@ -10,18 +12,54 @@ class TimeFR:
     """
 
     def setup(self):
-        data_file = resource_filename('psifr', 'data/Morton2013.csv')
+        data_file = os.path.join(
+            os.path.dirname(fr.__file__), 'data', 'Morton2013.csv'
+        )
         self.raw = pd.read_csv(data_file, dtype={'category': 'category'})
-        self.raw.category.cat.as_ordered(inplace=True)
+        self.raw['category'] = self.raw['category'].cat.as_ordered()
+
+        # scored data are cached in a new directory for each run, so
+        # that data merged by other versions of the code are not used
+        self.cache_dir = tempfile.mkdtemp()
         self.data = fr.merge_free_recall(
-            self.raw, list_keys=['list_type', 'list_category'], study_keys=['category']
+            self.raw,
+            cache_dir=self.cache_dir,
+            list_keys=['list_type', 'list_category'],
+            study_keys=['category'],
         )
 
+    def teardown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
     def time_merge(self):
         data = fr.merge_free_recall(
             self.raw, list_keys=['list_type', 'list_category'], study_keys=['category']
         )
 
+    def time_merge_sort(self):
+        data = fr.merge_free_recall(
+            self.raw,
+            engine='sort',
+            list_keys=['list_type', 'list_category'],
+            study_keys=['category'],
+        )
+
+    def time_merge_recent_pli(self):
+        data = fr.merge_free_recall(
+            self.raw,
+            pli='recent',
+            list_keys=['list_type', 'list_category'],
+            study_keys=['category'],
+        )
+
+    def time_merge_cached(self):
+        data = fr.merge_free_recall(
+            self.raw,
+            cache_dir=self.cache_dir,
+            list_keys=['list_type', 'list_category'],
+            study_keys=['category'],
+        )
+
     def time_lag_crp(self):
         crp = fr.lag_crp(self.data)
 
@@ -33,3 +71,17 @@ class TimeFR:
 
     def time_spc(self):
         spc = fr.spc(self.data)
+
+
+class TimeImport:
+    """Time importing modules in a new interpreter."""
+
+    def timeraw_import_fr(self):
+        return """
+        from psifr import fr
+        """
+
+    def timeraw_import_psifr(self):
+        return """
+        import psifr
+        """
@@ -1,2 +1,9 @@
+from importlib import metadata
+
+try:
+    __version__ = metadata.version('psifr')
+except metadata.PackageNotFoundError:
+    __version__ = 'unknown'
+
 import psifr.fr
 import psifr.transitions
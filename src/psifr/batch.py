@@ -0,0 +1,236 @@
+"""Ragged containers for free recall data split by list."""
+
+import numpy as np
+import pandas as pd
+
+
+class ListColumn(object):
+    """
+    Values of one data column for a set of lists.
+
+    Values for all lists are stored in one flat array, with an array
+    of offsets indicating where each list starts. Indexing a list
+    returns a view of the flat array, so no copies are made. When
+    pickled, only the values of the included lists are saved.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        Values for all lists, concatenated.
+
+    offsets : numpy.ndarray
+        Start index of each list in `values`, with the end of the last
+        list as the last element.
+
+    Attributes
+    ----------
+    values : numpy.ndarray
+        Values for all lists, concatenated.
+
+    offsets : numpy.ndarray
+        Start index of each list in `values`.
+
+    cache : list
+        Results calculated from this column, stored so that they may be
+        reused by multiple measures.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from psifr import batch
+    >>> column = batch.ListColumn(np.array([1, 2, 3, 4, 5]), np.array([0, 3, 5]))
+    >>> len(column)
+    2
+    >>> column[1]
+    array([4, 5])
+    >>> column.tolist()
+    [[1, 2, 3], [4, 5]]
+    """
+
+    def __init__(self, values, offsets):
+        self.values = values
+        self.offsets = offsets
+        self.cache = []
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                raise ValueError('Slices of lists must be contiguous.')
+            return ListColumn(self.values, self.offsets[start : stop + 1])
+        if i < 0:
+            i += len(self)
+        if i < 0 or i >= len(self):
+            raise IndexError('List index out of range.')
+        return self.values[self.offsets[i] : self.offsets[i + 1]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return f'ListColumn({self.tolist()!r})'
+
+    def __reduce__(self):
+        # only pickle the values of the included lists
+        return ListColumn, self.packed()
+
+    @classmethod
+    def from_padded(cls, values, lengths=None):
+        """
+        Create a column from a padded array with one row per list.
+
+        Parameters
+        ----------
+        values : numpy.ndarray
+            Values for each list, with one row per list. Rows may be
+            padded at the end.
+
+        lengths : numpy.ndarray, optional
+            Number of values in each list. If not specified, each list
+            ends before the first missing value (e.g., NaN or None) in
+            its row.
+
+        Returns
+        -------
+        ListColumn
+            Column with the unpadded values of each list.
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from psifr import batch
+        >>> padded = np.array([[3, 1, np.nan], [2, np.nan, np.nan]])
+        >>> batch.ListColumn.from_padded(padded)
+        ListColumn([[3.0, 1.0], [2.0]])
+        >>> batch.ListColumn.from_padded(np.array([[3, 1, 0], [2, 0, 0]]), [2, 1])
+        ListColumn([[3, 1], [2]])
+        """
+        values = np.asarray(values)
+        n, width = values.shape
+        if lengths is None:
+            missing = pd.isna(values)
+            lengths = np.where(missing.any(axis=1), missing.argmax(axis=1), width)
+        lengths = np.asarray(lengths, dtype=int)
+        include = np.arange(width) < lengths[:, np.newaxis]
+        offsets = np.zeros(n + 1, dtype=int)
+        offsets[1:] = np.cumsum(lengths)
+        return cls(values[include], offsets)
+
+    def packed(self):
+        """
+        Get values for all lists as a flat array with offsets.
+
+        Returns
+        -------
+        values : numpy.ndarray
+            View of the values for the included lists.
+
+        offsets : numpy.ndarray
+            Start index of each list in `values`, starting from zero.
+        """
+        start = self.offsets[0]
+        return self.values[start : self.offsets[-1]], self.offsets - start
+
+    def tolist(self):
+        """Convert to a list of lists."""
+        return [x.tolist() for x in self]
+
+
+class ListBatch(dict):
+    """
+    Free recall data for a set of lists, split by column.
+
+    Each column is a `ListColumn`, so that the values for all lists
+    are stored together. Columns that were requested but are not
+    available are set to None.
+
+    Parameters
+    ----------
+    columns : dict of str: ListColumn
+        Values for each column.
+
+    index : pandas.Index
+        Label of each list. Generally a MultiIndex with subject and
+        list levels.
+
+    Attributes
+    ----------
+    index : pandas.Index
+        Label of each list.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> import pandas as pd
+    >>> from psifr import batch
+    >>> offsets = np.array([0, 2, 3])
+    >>> columns = {'item': batch.ListColumn(np.array(['a', 'b', 'c']), offsets)}
+    >>> index = pd.MultiIndex.from_tuples([(1, 1), (1, 2)], names=['subject', 'list'])
+    >>> lists = batch.ListBatch(columns, index)
+    >>> lists.n_lists
+    2
+    >>> lists['item'][0]
+    array(['a', 'b'], dtype='<U1')
+    """
+
+    def __init__(self, columns, index):
+        super().__init__(columns)
+        self.index = index
+
+    def __repr__(self):
+        return f'ListBatch({dict.__repr__(self)}, n_lists={self.n_lists})'
+
+    @property
+    def n_lists(self):
+        """Number of lists in the batch."""
+        return len(self.index)
+
+    def slice_lists(self, start, stop):
+        """
+        Get a subset of contiguous lists without copying values.
+
+        Parameters
+        ----------
+        start : int
+            Index of the first list to include.
+
+        stop : int
+            Index after the last list to include.
+
+        Returns
+        -------
+        ListBatch
+            Batch with the selected lists.
+        """
+        columns = {
+            key: None if column is None else column[start:stop]
+            for key, column in self.items()
+        }
+        return ListBatch(columns, self.index[start:stop])
+
+    def split_subjects(self):
+        """
+        Iterate over the lists of each subject.
+
+        Lists for each subject must be contiguous, as in batches
+        created by `psifr.fr.split_lists`.
+
+        Yields
+        ------
+        subject : object
+            Subject identifier.
+
+        lists : ListBatch
+            Batch with the lists for this subject.
+        """
+        subjects = self.index.get_level_values('subject')
+        if len(subjects) == 0:
+            return
+        start = np.hstack([0, np.nonzero(subjects[1:] != subjects[:-1])[0] + 1])
+        stop = np.hstack([start[1:], len(subjects)])
+        for i, j in zip(start, stop):
+            yield subjects[i], self.slice_lists(i, j)
@@ -0,0 +1,330 @@
+"""Cache scored free recall data on disk."""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import psifr
+from psifr import fr
+
+# version of the cache format and of the scored output; increment when
+# either changes, so that old cache files are not used
+CACHE_VERSION = 1
+
+
+def fingerprint(data, **kwargs):
+    """
+    Get a fingerprint of free recall data and merge options.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Free recall data.
+
+    **kwargs
+        Options for scoring the data.
+
+    Returns
+    -------
+    key : str
+        Hexadecimal hash of the data values, index, columns, data
+        types, and options, and of the Psifr version, so that data
+        scored by a different release are not used.
+
+    Examples
+    --------
+    >>> from psifr import cache
+    >>> from psifr import fr
+    >>> raw = fr.sample_data('Morton2013')
+    >>> key = cache.fingerprint(raw, study_keys=['category'])
+    >>> key == cache.fingerprint(raw.copy(), study_keys=['category'])
+    True
+    >>> key == cache.fingerprint(raw, study_keys=['category', 'list_type'])
+    False
+    """
+    h = hashlib.sha256()
+    h.update(str(CACHE_VERSION).encode())
+    h.update(psifr.__version__.encode())
+    columns = [str(column) for column in data.columns]
+    dtypes = [str(dtype) for dtype in data.dtypes]
+    h.update(json.dumps([columns, dtypes]).encode())
+    h.update(pd.util.hash_pandas_object(data, index=True).to_numpy().tobytes())
+    h.update(json.dumps(kwargs, sort_keys=True, default=repr).encode())
+    return h.hexdigest()[:32]
+
+
+def _encode_column(values):
+    """Encode a series as NumPy arrays and metadata."""
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        cat_meta, cat_arrays = _encode_column(pd.Series(dtype.categories))
+        meta = {
+            'kind': 'category',
+            'ordered': bool(dtype.ordered),
+            'categories': cat_meta,
+        }
+        arrays = {'codes': values.cat.codes.to_numpy()}
+        arrays.update({f'categories.{k}': v for k, v in cat_arrays.items()})
+    elif isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(
+        dtype, 'numpy_dtype'
+    ):
+        # nullable values with a mask of missing values
+        mask = values.isna().to_numpy()
+        fill = dtype.numpy_dtype.type(0)
+        meta = {'kind': 'masked', 'dtype': str(dtype)}
+        arrays = {
+            'values': values.to_numpy(dtype=dtype.numpy_dtype, na_value=fill),
+            'mask': mask,
+        }
+    elif dtype.kind in 'biufcmM':
+        meta = {'kind': 'numpy'}
+        arrays = {'values': values.to_numpy()}
+    elif pd.api.types.is_string_dtype(dtype) and pd.api.types.is_string_dtype(
+        values.dropna().infer_objects()
+    ):
+        # strings with a mask of missing values
+        mask = values.isna().to_numpy()
+        meta = {'kind': 'string', 'dtype': str(dtype)}
+        arrays = {
+            'values': values.to_numpy(dtype=object, na_value='').astype(str),
+            'mask': mask,
+        }
+    else:
+        # other objects must be pickled
+        meta = {'kind': 'object'}
+        arrays = {'values': values.to_numpy(dtype=object)}
+    return meta, arrays
+
+
+def _decode_column(meta, arrays):
+    """Decode a column from NumPy arrays and metadata."""
+    kind = meta['kind']
+    if kind == 'category':
+        cat_arrays = {
+            k[len('categories.') :]: v
+            for k, v in arrays.items()
+            if k.startswith('categories.')
+        }
+        categories = _decode_column(meta['categories'], cat_arrays)
+        values = pd.Categorical.from_codes(
+            arrays['codes'], categories=categories, ordered=meta['ordered']
+        )
+    elif kind == 'masked':
+        values = pd.array(arrays['values'], dtype=meta['dtype'])
+        values[arrays['mask']] = pd.NA
+    elif kind == 'string':
+        values = arrays['values'].astype(object)
+        values[arrays['mask']] = np.nan
+        if meta['dtype'] != 'object':
+            values = pd.array(values, dtype=meta['dtype'])
+    else:
+        values = arrays['values']
+    return values
+
+
+def write_frame(frame, path):
+    """
+    Write a data frame to a columnar NPZ file.
+
+    Each column is stored as a typed NumPy array. Nullable and
+    categorical columns are stored with masks and category codes, and
+    string columns are stored as fixed-width strings, so most data
+    frames can be read without unpickling objects. Missing strings are
+    read back as NaN.
+
+    Parameters
+    ----------
+    frame : pandas.DataFrame
+        Data frame to write. Column names must be strings.
+
+    path : str
+        Path to the file to write. The file is written to a temporary
+        file first, then renamed, so that readers never see a partial
+        file.
+
+    See Also
+    --------
+    read_frame : Read a data frame from a columnar NPZ file.
+    """
+    meta = {'columns': [], 'index': None}
+    arrays = {}
+    for i, name in enumerate(frame.columns):
+        if not isinstance(name, str):
+            raise ValueError(f'Column name must be a string: {name!r}')
+        column_meta, column_arrays = _encode_column(frame[name])
+        meta['columns'].append({'name': name, **column_meta})
+        arrays.update({f'c{i}.{k}': v for k, v in column_arrays.items()})
+
+    index = frame.index
+    if isinstance(index, pd.RangeIndex):
+        meta['index'] = {
+            'kind': 'range',
+            'start': index.start,
+            'stop': index.stop,
+            'step': index.step,
+            'name': index.name,
+        }
+    else:
+        levels = []
+        index_frame = index.to_frame(index=False)
+        for i, name in enumerate(index_frame.columns):
+            level_meta, level_arrays = _encode_column(index_frame[name])
+            levels.append({'name': name, **level_meta})
+            arrays.update({f'i{i}.{k}': v for k, v in level_arrays.items()})
+        meta['index'] = {'kind': 'levels', 'levels': levels}
+    arrays['meta'] = np.array(json.dumps(meta))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.npz')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _column_arrays(npz, prefix):
+    """Get arrays for one column from an NPZ file."""
+    return {
+        k[len(prefix) :]: npz[k] for k in npz.files if k.startswith(prefix)
+    }
+
+
+def read_frame(path):
+    """
+    Read a data frame from a columnar NPZ file.
+
+    Parameters
+    ----------
+    path : str
+        Path to a file written by `write_frame`.
+
+    Returns
+    -------
+    frame : pandas.DataFrame
+        Data frame with the original columns, data types, and index.
+
+    See Also
+    --------
+    write_frame : Write a data frame to a columnar NPZ file.
+    """
+    with np.load(path) as npz:
+        meta = json.loads(str(npz['meta']))
+        columns = meta['columns']
+        if meta['index']['kind'] == 'levels':
+            columns = columns + meta['index']['levels']
+        allow_pickle = any(column['kind'] == 'object' for column in columns)
+    with np.load(path, allow_pickle=allow_pickle) as npz:
+        columns = {}
+        for i, column in enumerate(meta['columns']):
+            columns[column['name']] = _decode_column(
+                column, _column_arrays(npz, f'c{i}.')
+            )
+
+        index_meta = meta['index']
+        if index_meta['kind'] == 'range':
+            index = pd.RangeIndex(
+                index_meta['start'],
+                index_meta['stop'],
+                index_meta['step'],
+                name=index_meta['name'],
+            )
+        else:
+            levels = [
+                pd.Index(
+                    _decode_column(level, _column_arrays(npz, f'i{i}.')),
+                    name=level['name'],
+                )
+                for i, level in enumerate(index_meta['levels'])
+            ]
+            if len(levels) == 1:
+                index = levels[0]
+            else:
+                index = pd.MultiIndex.from_arrays(levels)
+    frame = pd.DataFrame(columns, index=index)
+    return frame
+
+
+def merge_free_recall(data, cache_dir, **kwargs):
+    """
+    Score free recall data, using cached results if available.
+
+    Results are stored in `cache_dir`, in a file named using a
+    fingerprint of the raw data and the merge options. If the data,
+    options, or Psifr version change, the fingerprint changes, and the
+    data are scored again.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Free recall data in Psifr format.
+
+    cache_dir : str
+        Directory in which to store scored data. Will be created if it
+        does not exist.
+
+    **kwargs
+        Options for `psifr.fr.merge_free_recall`.
+
+    Returns
+    -------
+    merged : pandas.DataFrame
+        Merged information about recalled and unrecalled items.
+
+    See Also
+    --------
+    fingerprint : Get a fingerprint of data and merge options.
+    """
+    key = fingerprint(data, **kwargs)
+    path = os.path.join(cache_dir, f'merged_{key}.npz')
+    if os.path.exists(path):
+        return read_frame(path)
+
+    merged = fr.merge_free_recall(data, **kwargs)
+    os.makedirs(cache_dir, exist_ok=True)
+    write_frame(merged, path)
+    return merged
+
+
+def append_free_recall(data, path, **kwargs):
+    """
+    Add new free recall data to a store of scored data.
+
+    Only lists affected by the new data are scored (see
+    `psifr.fr.append_free_recall`), and the updated data are written
+    back to the store.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        New free recall data in Psifr format.
+
+    path : str
+        Path to an NPZ file with scored data. If the file does not
+        exist, it will be created.
+
+    **kwargs
+        Options for `psifr.fr.merge_free_recall`. Must be the same for
+        each update of the store.
+
+    Returns
+    -------
+    merged : pandas.DataFrame
+        All scored data in the store.
+
+    See Also
+    --------
+    read_frame : Read a data frame from a columnar NPZ file.
+    """
+    if os.path.exists(path):
+        merged = fr.append_free_recall(read_frame(path), data, **kwargs)
+    else:
+        merged = fr.merge_free_recall(data, **kwargs)
+    write_frame(merged, path)
+    return merged
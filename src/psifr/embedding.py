@@ -0,0 +1,321 @@
+"""Distances between items for large item pools."""
+
+import collections
+
+import numpy as np
+from scipy import sparse
+from scipy import spatial
+
+
+def _pair_index(index):
+    """Get row and column indices for item pairs."""
+    if not isinstance(index, tuple) or len(index) != 2:
+        raise IndexError('Distances must be indexed by rows and columns.')
+    rows, cols = np.broadcast_arrays(
+        np.asarray(index[0], dtype=int), np.asarray(index[1], dtype=int)
+    )
+    return rows, cols
+
+
+class EmbeddingDistances(object):
+    """
+    Distances between items, calculated from item vectors when used.
+
+    May be used in place of a square distance matrix in distance
+    measures, such as `psifr.fr.distance_crp`. Indexing with arrays of
+    item indices, as in :code:`distances[prev, poss]`, calculates the
+    distance for each requested pair of items, so that the full matrix
+    is never calculated or stored.
+
+    Parameters
+    ----------
+    vectors : numpy.ndarray
+        Items x dimensions matrix with a vector for each item.
+
+    metric : {'euclidean', 'cosine', 'correlation'}, optional
+        Distance metric. The cosine and correlation distances are one
+        minus the cosine similarity and one minus the Pearson
+        correlation, as in `scipy.spatial.distance`.
+
+    cache_size : int, optional
+        Number of rows of the distance matrix to store. If greater than
+        zero, distances from each indexed row item to all items are
+        calculated and stored, with the least recently used rows
+        removed when the cache is full. This is faster when the same
+        items are used many times. Default is to calculate only the
+        requested pairs.
+
+    batch_size : int, optional
+        Maximum number of item pairs to calculate at a time, to limit
+        the size of intermediate arrays.
+
+    Attributes
+    ----------
+    shape : tuple of int
+        Shape of the full distance matrix.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from psifr import embedding
+    >>> vectors = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+    >>> distances = embedding.EmbeddingDistances(vectors, 'cosine')
+    >>> distances.shape
+    (3, 3)
+    >>> distances[[0, 0], [1, 2]].round(4)
+    array([1.    , 0.2929])
+    >>> distances[np.array([[0], [1]]), [1, 2]].round(4)
+    array([[1.    , 0.2929],
+           [0.    , 0.2929]])
+    """
+
+    def __init__(self, vectors, metric='euclidean', cache_size=0, batch_size=65536):
+        vectors = np.asarray(vectors, dtype=float)
+        if metric == 'correlation':
+            vectors = vectors - vectors.mean(axis=1, keepdims=True)
+        if metric in ['cosine', 'correlation']:
+            norm = np.linalg.norm(vectors, axis=1, keepdims=True)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                vectors = vectors / norm
+        elif metric != 'euclidean':
+            raise ValueError(f'Invalid metric: {metric}')
+        self.vectors = vectors
+        self.metric = metric
+        self.cache_size = cache_size
+        self.batch_size = batch_size
+        self._cache = collections.OrderedDict()
+
+    def __repr__(self):
+        n_items = self.shape[0]
+        return f'EmbeddingDistances(n_items={n_items}, metric={self.metric!r})'
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getstate__(self):
+        # stored rows are not pickled
+        state = self.__dict__.copy()
+        state['_cache'] = collections.OrderedDict()
+        return state
+
+    @property
+    def shape(self):
+        """Shape of the full distance matrix."""
+        n_items = self.vectors.shape[0]
+        return n_items, n_items
+
+    def __getitem__(self, index):
+        rows, cols = _pair_index(index)
+        if self.cache_size > 0:
+            unique_rows, inverse = np.unique(rows, return_inverse=True)
+            values = self._rows(unique_rows)[inverse.ravel(), cols.ravel()]
+        else:
+            values = self._pairs(rows.ravel(), cols.ravel())
+        return values.reshape(rows.shape)
+
+    def _distance(self, x, y):
+        """Distance between corresponding vectors."""
+        if self.metric == 'euclidean':
+            diff = x - y
+            return np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        return 1 - np.einsum('ij,ij->i', x, y)
+
+    def _pairs(self, rows, cols):
+        """Calculate distances for pairs of items."""
+        values = np.empty(len(rows))
+        for start in range(0, len(rows), self.batch_size):
+            stop = start + self.batch_size
+            values[start:stop] = self._distance(
+                self.vectors[rows[start:stop]], self.vectors[cols[start:stop]]
+            )
+        return values
+
+    def _rows(self, rows):
+        """Get distances from each of a set of items to all items."""
+        n_items = self.shape[0]
+        values = np.empty((len(rows), n_items))
+        missing = []
+        for i, row in enumerate(rows):
+            if row in self._cache:
+                self._cache.move_to_end(row)
+                values[i] = self._cache[row]
+            else:
+                missing.append(i)
+
+        if missing:
+            missing = np.array(missing)
+            values[missing] = self._block(rows[missing])
+            for i in missing:
+                self._cache[rows[i]] = values[i].copy()
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return values
+
+    def _block(self, rows):
+        """Calculate distances from a set of items to all items."""
+        if self.metric == 'euclidean':
+            return spatial.distance.cdist(self.vectors[rows], self.vectors)
+        return 1 - np.einsum('ij,kj->ik', self.vectors[rows], self.vectors)
+
+
+class SparseDistances(object):
+    """
+    Distances between items, with only some pairs stored.
+
+    May be used in place of a square distance matrix in distance
+    measures, such as `psifr.fr.distance_rank`. Distances are stored
+    in a sparse matrix (e.g., with distances to the nearest neighbors
+    of each item), and all other pairs of items have a fill distance,
+    so that memory scales with the number of stored pairs. Results are
+    the same as using a full matrix with the fill distance for missing
+    pairs.
+
+    Parameters
+    ----------
+    matrix : scipy.sparse.spmatrix
+        Items x items sparse matrix of distances. Stored values,
+        including explicit zeros, are used as distances.
+
+    fill : float, optional
+        Distance for pairs that are not stored. Default is infinite
+        distance, which places missing pairs after all stored pairs
+        when ranking distances, and outside of all bins when counting
+        distance bins. For similarities, use a fill value lower than
+        all stored similarities.
+
+    Attributes
+    ----------
+    matrix : scipy.sparse.csr_matrix
+        Sparse matrix of stored distances.
+
+    shape : tuple of int
+        Shape of the full distance matrix.
+
+    See Also
+    --------
+    SparseDistances.from_nearest : Store distances to nearest neighbors.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from scipy import sparse
+    >>> from psifr import embedding
+    >>> matrix = sparse.csr_matrix(([0.5, 0.5, 0.2], ([0, 1, 2], [1, 0, 1])), (3, 3))
+    >>> distances = embedding.SparseDistances(matrix)
+    >>> distances[[0, 0, 2], [1, 2, 1]]
+    array([0.5, inf, 0.2])
+    """
+
+    def __init__(self, matrix, fill=np.inf):
+        # copy, so that sorting indices does not change the input matrix
+        matrix = sparse.csr_matrix(matrix, copy=True)
+        matrix.sum_duplicates()
+        self.matrix = matrix
+        self.fill = fill
+
+        # sorted keys of the stored pairs, for finding pairs
+        n_items = matrix.shape[1]
+        rows = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+        self._keys = rows.astype(np.int64) * n_items + matrix.indices
+
+    def __repr__(self):
+        n_items = self.shape[0]
+        return f'SparseDistances(n_items={n_items}, n_stored={self.matrix.nnz})'
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def shape(self):
+        """Shape of the full distance matrix."""
+        return self.matrix.shape
+
+    @classmethod
+    def from_nearest(cls, distances, k, fill=np.inf, block_size=None):
+        """
+        Store distances from each item to its nearest neighbors.
+
+        Parameters
+        ----------
+        distances : numpy.ndarray or EmbeddingDistances
+            Items x items matrix of pairwise distances. Rows of the
+            matrix are used one block at a time, so the full matrix
+            does not need to be in memory (e.g., it may be
+            memory-mapped).
+
+        k : int
+            Number of nearest neighbors to store for each item, not
+            including the item itself. Must be at least 1. If there are
+            fewer other items, all other items are stored.
+
+        fill : float, optional
+            Distance for pairs that are not stored.
+
+        block_size : int, optional
+            Number of rows of the distance matrix to use at a time.
+            Default is to use blocks of about 64 MB.
+
+        Returns
+        -------
+        distances : SparseDistances
+            Distances to the nearest neighbors of each item.
+
+        Raises
+        ------
+        ValueError
+            If `k` is less than 1.
+
+        Examples
+        --------
+        >>> import numpy as np
+        >>> from psifr import embedding
+        >>> vectors = np.array([[0.0], [1.0], [3.0], [7.0]])
+        >>> full = embedding.EmbeddingDistances(vectors)
+        >>> nearest = embedding.SparseDistances.from_nearest(full, 1)
+        >>> nearest[[0, 1, 2, 3], [1, 0, 1, 2]]
+        array([1., 1., 2., 4.])
+        >>> nearest[0, 2]
+        array(inf)
+        """
+        if k < 1:
+            raise ValueError(f'Number of neighbors must be at least 1; got {k}.')
+        n_items = distances.shape[0]
+        k = min(k, n_items - 1)
+        if k <= 0:
+            # there are no other items to store
+            matrix = sparse.csr_matrix((n_items, n_items))
+            return cls(matrix, fill=fill)
+        if block_size is None:
+            block_size = max(2**23 // n_items, 1)
+        all_items = np.arange(n_items)
+        indices = np.empty((n_items, k), dtype=int)
+        data = np.empty((n_items, k))
+        for start in range(0, n_items, block_size):
+            rows = all_items[start : start + block_size]
+            if isinstance(distances, EmbeddingDistances):
+                values = distances._block(rows)
+            else:
+                values = np.array(distances[rows], dtype=float)
+
+            # exclude each item from its own neighbors
+            values[np.arange(len(rows)), rows] = np.inf
+            nearest = np.argpartition(values, k - 1, axis=1)[:, :k]
+            nearest.sort(axis=1)
+            indices[rows] = nearest
+            data[rows] = np.take_along_axis(values, nearest, axis=1)
+
+        indptr = np.arange(0, n_items * k + 1, k)
+        matrix = sparse.csr_matrix(
+            (data.ravel(), indices.ravel(), indptr), shape=(n_items, n_items)
+        )
+        return cls(matrix, fill=fill)
+
+    def __getitem__(self, index):
+        rows, cols = _pair_index(index)
+        keys = rows.astype(np.int64) * self.shape[1] + cols
+        if self.matrix.nnz == 0:
+            return np.full(keys.shape, self.fill, dtype=float)
+        match = np.minimum(np.searchsorted(self._keys, keys), len(self._keys) - 1)
+        stored = self._keys[match] == keys
+        values = np.where(stored, self.matrix.data[match], self.fill)
+        return values.astype(float)
@@ -1,27 +1,139 @@
 """Utilities for working with free recall data."""
 
-from pkg_resources import resource_filename
+import importlib
+import itertools
+import os
 import warnings
 import numpy as np
 import pandas as pd
-import seaborn as sns
 
+from psifr import batch
+from psifr import cache
 from psifr import measures
 from psifr import clustering
 
+# plotting functions are loaded on first use, so that importing this
+# module does not require importing seaborn and matplotlib
+_plot_functions = [
+    'plot_spc',
+    'plot_lag_crp',
+    'plot_distance_crp',
+    'plot_swarm_error',
+    'plot_raster',
+]
+
+
+def __getattr__(name):
+    if name in _plot_functions:
+        plotting = importlib.import_module('psifr.plotting')
+        return getattr(plotting, name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + _plot_functions)
+
 
 def sample_data(study):
     """Read sample data."""
-    data_file = resource_filename('psifr', f'data/{study}.csv')
+    data_file = os.path.join(os.path.dirname(__file__), 'data', f'{study}.csv')
     df = pd.read_csv(data_file)
     return df
 
 
-def sample_distances(study):
+def sample_distances(study, dtype=None):
     """Read sample distances."""
-    distance_file = resource_filename('psifr', f'distances/{study}.npz')
-    f = np.load(distance_file)
-    return f['items'], f['distances']
+    distance_file = os.path.join(
+        os.path.dirname(__file__), 'distances', f'{study}.npz'
+    )
+    with np.load(distance_file) as npz:
+        items, distances = npz['items'], npz['distances']
+    if dtype is not None:
+        distances = distances.astype(dtype)
+    return items, distances
+
+
+def save_distances(path, distances, dtype=None, block_size=1024):
+    """
+    Save a distance matrix to a file that may be memory-mapped.
+
+    Parameters
+    ----------
+    path : str
+        Path to a NumPy .npy file to write.
+
+    distances : numpy.ndarray
+        Items x items matrix of pairwise distances or similarities.
+        May be a memory-mapped array.
+
+    dtype : numpy.dtype, optional
+        Data type to save. Using numpy.float32 or numpy.float16 reduces
+        the size of the matrix by half or by three quarters, with less
+        precision. Default is to keep the data type of the matrix.
+
+    block_size : int, optional
+        Number of rows to convert at a time, so that the matrix is
+        not copied all at once.
+
+    See Also
+    --------
+    load_distances : Load a distance matrix.
+
+    Examples
+    --------
+    >>> import os
+    >>> import tempfile
+    >>> import numpy as np
+    >>> from psifr import fr
+    >>> distances = np.array([[0, 1, 2], [1, 0, 3], [2, 3, 0]], dtype=float)
+    >>> path = os.path.join(tempfile.mkdtemp(), 'distances.npy')
+    >>> fr.save_distances(path, distances, dtype=np.float32)
+    >>> loaded = fr.load_distances(path)
+    >>> loaded.dtype
+    dtype('float32')
+    >>> loaded[[0, 2], [1, 1]].tolist()
+    [1.0, 3.0]
+    """
+    if dtype is None:
+        dtype = distances.dtype
+    saved = np.lib.format.open_memmap(
+        path, mode='w+', dtype=dtype, shape=distances.shape
+    )
+    for start in range(0, distances.shape[0], block_size):
+        saved[start : start + block_size] = distances[start : start + block_size]
+    saved.flush()
+    del saved
+
+
+def load_distances(path, mmap_mode='r'):
+    """
+    Load a distance matrix, memory-mapped by default.
+
+    When memory-mapped, only the parts of the matrix that are used in
+    an analysis are read from disk, and separate processes reading the
+    same file share memory through the operating system page cache.
+    Measures with memory-mapped distances are sent to worker processes
+    by file name rather than by copying the matrix.
+
+    Parameters
+    ----------
+    path : str
+        Path to a NumPy .npy file, such as written by `save_distances`.
+
+    mmap_mode : {'r', 'r+', 'c', None}, optional
+        Mode for memory-mapping the file. If None, the whole matrix is
+        read into memory.
+
+    Returns
+    -------
+    distances : numpy.ndarray
+        Items x items matrix of pairwise distances or similarities.
+
+    See Also
+    --------
+    save_distances : Save a distance matrix.
+    """
+    return np.load(path, mmap_mode=mmap_mode)
 
 
 def table_from_lists(subjects, study, recall, lists=None, **kwargs):
@@ -33,16 +145,25 @@ def table_from_lists(subjects, study, recall, lists=None, **kwargs):
     subjects : list of hashable
         Subject identifier for each list.
 
-    study : list of list of hashable
-        List of items for each study list.
+    study : list of list of hashable, numpy.ndarray, or psifr.batch.ListColumn
+        List of items for each study list. May also be a 2-D array with
+        one row per list, or a ragged column of lists. Arrays are
+        converted in bulk, which is much faster for large datasets.
+        Padded arrays may be converted using
+        :py:meth:`psifr.batch.ListColumn.from_padded`.
 
-    recall : list of list of hashable
+    recall : list of list of hashable, numpy.ndarray, or psifr.batch.ListColumn
         List of recalled items for each study list.
 
     lists : list of hashable, optional
         List of list numbers. If not specified, lists for each subject
         will be numbered sequentially starting from one.
 
+    **kwargs
+        Additional columns, given as a tuple of (study, recall) values
+        in the same formats as the study and recall items. If either is
+        None, values for that phase will be set to NaN.
+
     Returns
     -------
     data : pandas.DataFrame
@@ -88,56 +209,164 @@ def table_from_lists(subjects, study, recall, lists=None, **kwargs):
     4        1     2      study         2    d     2   2.0
     5        1     2     recall         1    d     2   NaN
     6        1     2     recall         2    c     1   NaN
+
+    Lists may also be given as arrays. Here, recall lists are padded
+    with zeros and converted using their lengths.
+
+    >>> import numpy as np
+    >>> from psifr import batch
+    >>> study = np.array([[1, 2, 3], [4, 5, 6]])
+    >>> padded = np.array([[3, 1, 0], [6, 0, 0]])
+    >>> recall = batch.ListColumn.from_padded(padded, lengths=[2, 1])
+    >>> fr.table_from_lists([1, 1], study, recall)
+       subject  list trial_type  position  item
+    0        1     1      study         1     1
+    1        1     1      study         2     2
+    2        1     1      study         3     3
+    3        1     1     recall         1     3
+    4        1     1     recall         2     1
+    5        1     2      study         1     4
+    6        1     2      study         2     5
+    7        1     2      study         3     6
+    8        1     2     recall         1     6
     """
     assert len(subjects) == len(study) == len(recall), 'Input lengths must match.'
-    d = {'subject': [], 'list': [], 'trial_type': [], 'position': [], 'item': []}
-    for key in kwargs.keys():
-        d[key] = []
-    prev_subject = None
-    current_list = 1
-    if lists is None:
-        lists = [None] * len(subjects)
-    else:
+    if lists is not None:
         assert len(subjects) == len(lists), 'Length of lists must match subjects.'
-    labels = zip(subjects, study, recall, lists)
-    for i, (subject, study_list, recall_list, n) in enumerate(labels):
-        # set list number
-        if n is not None:
-            current_list = n
-        elif subject != prev_subject:
-            current_list = 1
-
-        # add study events
-        for j, study_item in enumerate(study_list):
-            d['subject'].append(subject)
-            d['list'].append(current_list)
-            d['trial_type'].append('study')
-            d['position'].append(j + 1)
-            d['item'].append(study_item)
-            for key, val in kwargs.items():
-                if val[0] is not None:
-                    d[key].append(val[0][i][j])
-                else:
-                    d[key].append(np.nan)
-
-        # add recall events
-        for j, recall_item in enumerate(recall_list):
-            d['subject'].append(subject)
-            d['list'].append(current_list)
-            d['trial_type'].append('recall')
-            d['position'].append(j + 1)
-            d['item'].append(recall_item)
-            for key, val in kwargs.items():
-                if val[1] is not None:
-                    d[key].append(val[1][i][j])
-                else:
-                    d[key].append(np.nan)
-        current_list += 1
-        prev_subject = subject
+
+    # get flat values of study and recall lists
+    n_lists = len(subjects)
+    study_values, study_start, n_study = _list_source(study)
+    recall_values, recall_start, n_recall = _list_source(recall)
+
+    # get the list, phase, and position of each event
+    n_events = n_study + n_recall
+    list_index = np.repeat(np.arange(n_lists), n_events)
+    event_start = np.cumsum(n_events) - n_events
+    within = np.arange(n_events.sum()) - event_start[list_index]
+    is_recall = within >= n_study[list_index]
+    position = np.where(is_recall, within - n_study[list_index], within)
+    study_list = list_index[~is_recall]
+    recall_list = list_index[is_recall]
+    study_pos = position[~is_recall]
+    recall_pos = position[is_recall]
+
+    def phase_values(values, start, lengths, phase_list, phase_pos, n_phase):
+        assert np.all(lengths >= n_phase), 'Column lengths must match lists.'
+        return _normalize_values(values[start[phase_list] + phase_pos])
+
+    def event_values(study_part, recall_part):
+        values = _concat_values([study_part, recall_part])
+        combined = np.empty(len(values), dtype=values.dtype)
+        combined[~is_recall] = values[: len(study_part)]
+        combined[is_recall] = values[len(study_part) :]
+        return combined
+
+    d = {
+        'subject': _normalize_values(_object_values(subjects))[list_index],
+        'list': _list_numbers(subjects, lists)[list_index],
+        'trial_type': np.where(is_recall, 'recall', 'study').astype(object),
+        'position': position + 1,
+        'item': event_values(
+            phase_values(
+                study_values, study_start, n_study, study_list, study_pos, n_study
+            ),
+            phase_values(
+                recall_values, recall_start, n_recall, recall_list, recall_pos, n_recall
+            ),
+        ),
+    }
+    for key, (study_column, recall_column) in kwargs.items():
+        if study_column is not None:
+            study_part = phase_values(
+                *_list_source(study_column), study_list, study_pos, n_study
+            )
+        else:
+            study_part = np.full(len(study_list), np.nan)
+        if recall_column is not None:
+            recall_part = phase_values(
+                *_list_source(recall_column), recall_list, recall_pos, n_recall
+            )
+        else:
+            recall_part = np.full(len(recall_list), np.nan)
+        d[key] = event_values(study_part, recall_part)
+
+    # object columns are converted to lists so that data types are inferred
+    for key, values in d.items():
+        if values.dtype == object or len(values) == 0:
+            d[key] = values.tolist()
     data = pd.DataFrame(d)
     return data
 
 
+def _object_values(values):
+    """Convert a sequence to an array, keeping objects as they are."""
+    if isinstance(values, np.ndarray):
+        return values
+    return pd.Series(list(values), dtype=object).to_numpy()
+
+
+def _list_source(lists):
+    """Get flat values, start indices, and lengths of a set of lists."""
+    if isinstance(lists, batch.ListColumn):
+        values, offsets = lists.packed()
+        return np.asarray(values), offsets[:-1], np.diff(offsets)
+    if isinstance(lists, np.ndarray) and lists.ndim == 2:
+        n, width = lists.shape
+        return lists.ravel(), np.arange(n) * width, np.full(n, width)
+    lengths = np.array([len(x) for x in lists], dtype=int)
+    values = _object_values(itertools.chain.from_iterable(lists))
+    return values, np.cumsum(lengths) - lengths, lengths
+
+
+def _normalize_values(values):
+    """Convert values to the data type they would be inferred to have."""
+    kind = values.dtype.kind
+    if kind in 'iu':
+        return values.astype(np.int64)
+    elif kind == 'f':
+        return values.astype(np.float64)
+    elif kind == 'b':
+        return values
+    return values.astype(object)
+
+
+def _concat_values(parts):
+    """Concatenate arrays, using objects if the data types are not compatible."""
+    kinds = {part.dtype.kind for part in parts if len(part) > 0}
+    if kinds and (kinds <= {'i', 'f'} or kinds == {'b'}):
+        return np.concatenate([part for part in parts if len(part) > 0])
+    return np.concatenate([part.astype(object) for part in parts])
+
+
+def _list_numbers(subjects, lists):
+    """Get the number of each list."""
+    if lists is None:
+        # number lists sequentially, restarting for each subject
+        subjects = _object_values(subjects).astype(object)
+        change = np.ones(len(subjects), dtype=bool)
+        change[1:] = subjects[1:] != subjects[:-1]
+        index = np.arange(len(subjects))
+        return index - np.maximum.accumulate(np.where(change, index, 0)) + 1
+
+    lists = _object_values(lists).astype(object)
+    if any(n is None for n in lists):
+        # lists without a number continue from the previous list
+        current_list = 1
+        prev_subject = None
+        numbers = np.empty(len(lists), dtype=object)
+        for i, (subject, n) in enumerate(zip(subjects, lists)):
+            if n is not None:
+                current_list = n
+            elif subject != prev_subject:
+                current_list = 1
+            numbers[i] = current_list
+            current_list += 1
+            prev_subject = subject
+        return numbers
+    return lists
+
+
 def _match_values(series, values):
     """Get matches for a data column."""
     if not hasattr(values, '__iter__') or isinstance(values, str):
@@ -146,6 +375,187 @@ def _match_values(series, values):
     return include
 
 
+class DataIndex(object):
+    """
+    Free recall data indexed by subject, list, and trial type.
+
+    Rows are sorted by subject and list, and by trial type within list
+    (in order of appearance), so that the rows for each subject and
+    list are contiguous. If the data are already in this order, they
+    are not copied. Selections of subjects, lists, and trial types are
+    found using the start and end of each group of rows, and
+    contiguous selections are returned as slices of the data.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Raw or merged free recall data. Rows with missing subject are
+        excluded.
+
+    Attributes
+    ----------
+    data : pandas.DataFrame
+        Free recall data, sorted by subject, list, and trial type.
+
+    groups : pandas.DataFrame
+        Subject, list, and trial type of each group of rows, with
+        start and stop row numbers.
+
+    Examples
+    --------
+    >>> from psifr import fr
+    >>> raw = fr.table_from_lists(
+    ...     [1, 1, 2], [['a', 'b'], ['c', 'd'], ['e', 'f']], [['b'], ['d', 'c'], ['f']]
+    ... )
+    >>> index = fr.DataIndex(raw)
+    >>> index.groups
+       subject  list trial_type  start  stop
+    0        1     1      study      0     2
+    1        1     1     recall      2     3
+    2        1     2      study      3     5
+    3        1     2     recall      5     7
+    4        2     1      study      7     9
+    5        2     1     recall      9    10
+    >>> index.filter(subjects=2, copy=False)
+       subject  list trial_type  position item
+    7        2     1      study         1    e
+    8        2     1      study         2    f
+    9        2     1     recall         1    f
+    """
+
+    def __init__(self, data):
+        if data['subject'].isna().any():
+            data = data.loc[data['subject'].notna()]
+        keys = [key for key in ['subject', 'list', 'trial_type'] if key in data]
+        codes = [
+            pd.factorize(data[key], sort=key != 'trial_type')[0] for key in keys
+        ]
+        order = np.lexsort(codes[::-1])
+        if np.any(order != np.arange(len(order))):
+            data = data.iloc[order]
+            codes = [c[order] for c in codes]
+
+        # find the first row of each group and each subject
+        n = len(data)
+        change = np.zeros(n, dtype=bool)
+        change[:1] = True
+        change[1:] = codes[0][1:] != codes[0][:-1]
+        subject_start = np.flatnonzero(change)
+        for c in codes[1:]:
+            change[1:] |= c[1:] != c[:-1]
+        start = np.flatnonzero(change)
+        stop = np.append(start[1:], n)
+        groups = data[keys].iloc[start].reset_index(drop=True)
+        groups['start'] = start
+        groups['stop'] = stop
+
+        self.data = data
+        self.groups = groups
+        subject_stop = np.append(subject_start[1:], n)
+        self._subjects = dict(
+            zip(
+                data['subject'].iloc[subject_start],
+                zip(subject_start.tolist(), subject_stop.tolist()),
+            )
+        )
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f'DataIndex(n_rows={len(self.data)}, n_groups={len(self.groups)})'
+
+    def _rows(self, subjects=None, lists=None, trial_type=None):
+        """Get rows for a set of subjects, lists, and trial types."""
+        n = len(self.data)
+        if lists is None and trial_type is None:
+            if subjects is None:
+                return slice(0, n)
+            if not hasattr(subjects, '__iter__') or isinstance(subjects, str):
+                start, stop = self._subjects.get(subjects, (0, 0))
+                return slice(start, stop)
+
+        groups = self.groups
+        include = np.ones(len(groups), dtype=bool)
+        if subjects is not None:
+            include &= _match_values(groups['subject'], subjects).to_numpy()
+        if lists is not None:
+            include &= _match_values(groups['list'], lists).to_numpy()
+        if trial_type is not None:
+            include &= groups['trial_type'].to_numpy() == trial_type
+        selected = np.flatnonzero(include)
+        if len(selected) == 0:
+            return slice(0, 0)
+
+        start = groups['start'].to_numpy()[selected]
+        stop = groups['stop'].to_numpy()[selected]
+        if np.array_equal(start[1:], stop[:-1]):
+            return slice(start[0], stop[-1])
+        lengths = stop - start
+        offsets = np.repeat(start - np.cumsum(lengths) + lengths, lengths)
+        return np.arange(lengths.sum()) + offsets
+
+    def filter(
+        self,
+        subjects=None,
+        lists=None,
+        trial_type=None,
+        positions=None,
+        inputs=None,
+        outputs=None,
+        copy=True,
+    ):
+        """
+        Filter data to get a subset of trials.
+
+        Parameters
+        ----------
+        subjects : hashable or list of hashable
+            Subject or subjects to include.
+
+        lists : hashable or list of hashable
+            List or lists to include.
+
+        trial_type : {'study', 'recall'}
+            Trial type to include.
+
+        positions : int or list of int
+            Position or positions to include.
+
+        inputs : int or list of int
+            Input position or positions to include.
+
+        outputs : int or list of int
+            Output position or positions to include.
+
+        copy : bool, optional
+            If true, a copy of the selected data is returned. If false,
+            contiguous selections are returned as views of the data,
+            which should not be modified.
+
+        Returns
+        -------
+        filtered : pandas.DataFrame
+            The filtered subset of data.
+        """
+        filtered = self.data.iloc[self._rows(subjects, lists, trial_type)]
+        include = None
+        for key, values in [
+            ('position', positions),
+            ('input', inputs),
+            ('output', outputs),
+        ]:
+            if values is None:
+                continue
+            match = _match_values(filtered[key], values).to_numpy()
+            include = match if include is None else include & match
+        if include is not None:
+            filtered = filtered.loc[include]
+        if copy:
+            filtered = filtered.copy()
+        return filtered
+
+
 def filter_data(
     data,
     subjects=None,
@@ -154,14 +564,16 @@ def filter_data(
     positions=None,
     inputs=None,
     outputs=None,
+    copy=True,
 ):
     """
     Filter data to get a subset of trials.
 
     Parameters
     ----------
-    data : pandas.DataFrame
-        Raw or merged data to filter.
+    data : pandas.DataFrame or DataIndex
+        Raw or merged data to filter. If a `DataIndex`, subjects,
+        lists, and trial types are selected using the index.
 
     subjects : hashable or list of hashable
         Subject or subjects to include.
@@ -181,6 +593,11 @@ def filter_data(
     outputs : int or list of int
         Output position or positions to include.
 
+    copy : bool, optional
+        If false and `data` is a `DataIndex`, contiguous selections
+        are returned as views of the data, which should not be
+        modified.
+
     Returns
     -------
     filtered : pandas.DataFrame
@@ -208,6 +625,11 @@ def filter_data(
     6        2     2    g      1     NaN   True   False       0      False         NaN          NaN
     7        2     2    h      2     NaN   True   False       0      False         NaN          NaN
     """
+    if isinstance(data, DataIndex):
+        return data.filter(
+            subjects, lists, trial_type, positions, inputs, outputs, copy=copy
+        )
+
     include = data['subject'].notna()
     if subjects is not None:
         include &= _match_values(data['subject'], subjects)
@@ -277,6 +699,70 @@ def check_data(df):
     ), 'trial_type for all trials must be "study" or "recall".'
 
 
+def intern_items(data, keys=None, vocabulary=None):
+    """
+    Store item labels as categorical codes.
+
+    Each included column is converted to a categorical column, so that
+    each unique label is stored once and each trial is stored as an
+    integer code. Interned data use less memory, and labels can be
+    compared by code when merging and analyzing data. Values are
+    decoded when displayed or exported.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Free recall data.
+
+    keys : list of str, optional
+        Columns to intern. Default is ['item'].
+
+    vocabulary : dict of str: list-like, optional
+        Known labels for each column. Codes for known labels are kept
+        in the order given, with any new labels added after them in
+        sorted order, so that data loaded at different times can use
+        the same codes. Default is to use the sorted unique labels of
+        each column.
+
+    Returns
+    -------
+    interned : pandas.DataFrame
+        Copy of the data with categorical columns.
+
+    Examples
+    --------
+    >>> from psifr import fr
+    >>> raw = fr.table_from_lists([1], [['piano', 'absence']], [['absence']])
+    >>> interned = fr.intern_items(raw)
+    >>> interned['item'].cat.categories
+    Index(['absence', 'piano'], dtype='object')
+    >>> interned['item'].cat.codes.tolist()
+    [1, 0, 0]
+
+    Use the same codes for data from another session.
+
+    >>> raw2 = fr.table_from_lists([2], [['hollow', 'piano']], [['piano']])
+    >>> vocabulary = {'item': interned['item'].cat.categories}
+    >>> interned2 = fr.intern_items(raw2, vocabulary=vocabulary)
+    >>> interned2['item'].cat.categories
+    Index(['absence', 'piano', 'hollow'], dtype='object')
+    """
+    if keys is None:
+        keys = ['item']
+    if vocabulary is None:
+        vocabulary = {}
+    interned = data.copy()
+    for key in keys:
+        values = pd.Categorical(data[key])
+        if key in vocabulary:
+            known = pd.Index(vocabulary[key])
+            labels = values.categories
+            categories = known.append(labels[~labels.isin(known)])
+            values = values.set_categories(categories)
+        interned[key] = values
+    return interned
+
+
 def block_index(list_labels):
     """
     Get index of each block in a list.
@@ -298,15 +784,94 @@ def block_index(list_labels):
     >>> fr.block_index(list_labels)
     array([1, 1, 2, 2, 2, 3, 3])
     """
-    prev_label = ''
-    curr_block = 0
-    block = np.zeros(len(list_labels), dtype=int)
-    for i, label in enumerate(list_labels):
-        if prev_label != label:
-            curr_block += 1
-        block[i] = curr_block
-        prev_label = label
-    return block
+    codes = pd.factorize(np.asarray(list_labels, dtype=object))[0]
+    return np.cumsum(_block_start(codes, np.zeros(len(codes), dtype=int)))
+
+
+def _block_start(codes, groups):
+    """Find positions that start a new block within each group."""
+    start = np.ones(len(codes), dtype=bool)
+    # missing labels never match the previous label
+    start[1:] = (
+        (codes[1:] != codes[:-1]) | (codes[1:] < 0) | (groups[1:] != groups[:-1])
+    )
+    return start
+
+
+def label_blocks(df, label_key, block_key='block', list_keys=None, inplace=False):
+    """
+    Label blocks of positions with the same label in each list.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Raw or merged data.
+
+    label_key : str
+        Column with position labels that define the blocks.
+
+    block_key : str, optional
+        Column to write the block index to.
+
+    list_keys : list of str, optional
+        Columns that define each list. Default is ['subject', 'list'].
+
+    inplace : bool, optional
+        If true, the block column will be added in place instead of to
+        a copy of the data.
+
+    Returns
+    -------
+    pandas.DataFrame or None
+        Data with a block index column, starting from 1 in each list.
+        Blocks are numbered based on the order of rows within each
+        list. If `inplace` is true, returns None.
+
+    See Also
+    --------
+    block_index : Get the index of each block in one list.
+
+    Examples
+    --------
+    >>> from psifr import fr
+    >>> study = [['a', 'b', 'c', 'd'], ['e', 'f', 'g', 'h']]
+    >>> recall = [['b', 'c'], ['h']]
+    >>> category = ([[1, 1, 2, 2], [2, 1, 1, 2]], None)
+    >>> raw = fr.table_from_lists([1, 1], study, recall, category=category)
+    >>> data = fr.merge_free_recall(raw, study_keys=['category'])
+    >>> data = fr.label_blocks(data, 'category')
+    >>> data[['list', 'item', 'input', 'category', 'block']]
+       list item  input  category  block
+    0     1    a      1       1.0      1
+    1     1    b      2       1.0      1
+    2     1    c      3       2.0      2
+    3     1    d      4       2.0      2
+    4     2    e      1       2.0      1
+    5     2    f      2       1.0      2
+    6     2    g      3       1.0      2
+    7     2    h      4       2.0      3
+    """
+    if list_keys is None:
+        list_keys = ['subject', 'list']
+    if not inplace:
+        df = df.copy()
+
+    # find block starts with rows of each list in order
+    groups, _ = _combine_codes([_factorize_column(df[key])[:2] for key in list_keys])
+    order = np.argsort(groups, kind='stable')
+    groups = groups[order]
+    codes = pd.factorize(df[label_key])[0][order]
+    count = np.cumsum(_block_start(codes, groups))
+
+    # number blocks starting from the first block of each list
+    list_start = np.ones(len(groups), dtype=bool)
+    list_start[1:] = groups[1:] != groups[:-1]
+    offset = np.maximum.accumulate(np.where(list_start, count, 0))
+    block = np.empty(len(groups), dtype=int)
+    block[order] = count - offset + 1
+    df[block_key] = block
+    if not inplace:
+        return df
 
 
 def pool_index(trial_items, pool_items_list):
@@ -346,7 +911,7 @@ def pool_index(trial_items, pool_items_list):
     return item_index
 
 
-def reset_list(df):
+def reset_list(df, inplace=False):
     """
     Reset list index in a DataFrame.
 
@@ -355,10 +920,16 @@ def reset_list(df):
     df : pandas.DataFrame
         Raw or merged data. Must have subject and list fields.
 
+    inplace : bool, optional
+        If true, the list field will be renumbered in place instead of
+        in a copy of the data.
+
     Returns
     -------
-    pandas.DataFrame
-        Data with a renumbered list field, starting from 1.
+    pandas.DataFrame or None
+        Data with a renumbered list field, starting from 1. Lists are
+        numbered within subject in order of first appearance. If
+        `inplace` is true, returns None.
 
     Examples
     --------
@@ -388,15 +959,35 @@ def reset_list(df):
     5        1     2     recall         1    c
     6        1     2     recall         2    d
     """
-    df = df.copy()
-    for subject in df['subject'].unique():
-        subject_lists = df.loc[df['subject'] == subject, 'list'].unique()
-        for i, listno in enumerate(subject_lists):
-            df.loc[(df['subject'] == subject) & (df['list'] == listno), 'list'] = i + 1
-    return df
-
-
-def split_lists(frame, phase, keys=None, names=None, item_query=None, as_list=False):
+    if not inplace:
+        df = df.copy()
+
+    # code each list in order of first appearance, then number the
+    # lists of each subject in order
+    subjects, n_subjects, _ = _factorize_column(df['subject'])
+    lists, n_lists, _ = _factorize_column(df['list'])
+    codes, n = _combine_codes([(subjects, n_subjects), (lists, n_lists)])
+    list_subject = np.empty(n, dtype=np.int64)
+    list_subject[codes] = subjects
+    number = _cumcount(list_subject) + 1
+
+    # rows with a missing subject or list are not changed
+    update = df['subject'].notna().to_numpy() & df['list'].notna().to_numpy()
+    df.loc[update, 'list'] = number[codes[update]]
+    if not inplace:
+        return df
+
+
+def split_lists(
+    frame,
+    phase,
+    keys=None,
+    names=None,
+    item_query=None,
+    as_list=False,
+    as_batch=False,
+    codes=None,
+):
     """
     Convert free recall data from one phase to split format.
 
@@ -424,12 +1015,27 @@ def split_lists(frame, phase, keys=None, names=None, item_query=None, as_list=Fa
         If true, each column will be output as a list; otherwise,
         outputs will be numpy.ndarray.
 
+    as_batch : bool, optional
+        If true, output will be a `psifr.batch.ListBatch`, with the
+        values for each column stored in one flat array with list
+        offsets. Lists are defined by subject and list, so data from
+        multiple subjects may be split at once. Lists are grouped by
+        subject, in sorted order, and are in order of appearance
+        within subject.
+
+    codes : list of str, optional
+        Categorical columns (see `intern_items`) to output as integer
+        category codes instead of labels when `as_batch` is true.
+        Codes may be compared for equality in place of labels. Missing
+        values are coded as NaN.
+
     Returns
     -------
     split : dict of str: list
         Data in split format. Each included column will be a key in the
         dictionary, with a list of either numpy.ndarray (default) or
-        lists, containing the values for that column.
+        lists, containing the values for that column. If `as_batch` is
+        true, each column will be a `psifr.batch.ListColumn`.
 
     See Also
     --------
@@ -464,6 +1070,19 @@ def split_lists(frame, phase, keys=None, names=None, item_query=None, as_list=Fa
 
     >>> fr.split_lists(raw, 'raw', keys=['position'])
     {'position': [array([1, 2, 1]), array([1, 2, 1, 2])]}
+
+    Split data into a batch of lists, with all values of each column
+    stored in one array.
+
+    >>> lists = fr.split_lists(data, 'recall', keys=['item'], as_batch=True)
+    >>> lists['item'].values
+    array(['absence', 'piano', 'fountain'], dtype=object)
+    >>> lists['item'].offsets
+    array([0, 1, 3])
+    >>> lists.index
+    MultiIndex([(1, 1),
+                (1, 2)],
+               names=['subject', 'list'])
     """
     split = {}
     if keys is None:
@@ -473,6 +1092,9 @@ def split_lists(frame, phase, keys=None, names=None, item_query=None, as_list=Fa
     if names is None:
         names = keys
 
+    if as_batch:
+        return _split_batch(frame, phase, keys, names, item_query, codes)
+
     unique_lists = frame['list'].unique()
     if phase == 'study':
         phase_data = frame.loc[frame['study']]
@@ -510,7 +1132,414 @@ def split_lists(frame, phase, keys=None, names=None, item_query=None, as_list=Fa
     return split
 
 
-def merge_free_recall(data, **kwargs):
+def _take_values(column, rows, codes=False):
+    """Get values of a column as a NumPy array with a numeric dtype."""
+    dtype = column.dtype
+    if codes and isinstance(dtype, pd.CategoricalDtype):
+        # category codes, with missing values as NaN
+        values = column.cat.codes.to_numpy()[rows]
+        if (values < 0).any():
+            return np.where(values < 0, np.nan, values)
+        return values
+    if isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(
+        dtype, 'numpy_dtype'
+    ):
+        # nullable columns are converted to float if values are missing
+        values = column.array[rows]
+        if values.isna().any():
+            return values.to_numpy(dtype=float, na_value=np.nan)
+        return values.to_numpy(dtype=dtype.numpy_dtype)
+    return column.to_numpy()[rows]
+
+
+def _split_batch(frame, phase, keys, names, item_query=None, codes=None):
+    """Split free recall data into a batch of lists."""
+    code_keys = set() if codes is None else set(codes)
+
+    # code lists in order of first appearance
+    if 'subject' in frame.columns:
+        labels = pd.MultiIndex.from_frame(frame[['subject', 'list']])
+    else:
+        labels = pd.Index(frame['list'])
+    codes, list_index = labels.factorize()
+    list_index = list_index.set_names(labels.names)
+
+    if 'subject' in frame.columns:
+        # group lists by subject, so that each subject is a contiguous
+        # range of lists
+        subjects = list_index.get_level_values('subject')
+        order = np.argsort(pd.factorize(subjects, sort=True)[0], kind='stable')
+        rank = np.empty(len(order), dtype=int)
+        rank[order] = np.arange(len(order))
+        codes = rank[codes]
+        list_index = list_index[order]
+
+    # get included events, sorted by list
+    if phase == 'study':
+        rows = np.nonzero(frame['study'].to_numpy())[0]
+        rows = rows[np.argsort(codes[rows], kind='stable')]
+    elif phase == 'recall':
+        rows = np.nonzero(frame['recall'].to_numpy())[0]
+        rows = rows[np.lexsort((frame['output'].to_numpy()[rows], codes[rows]))]
+    elif phase == 'raw':
+        rows = np.argsort(codes, kind='stable')
+    else:
+        raise ValueError(f'Invalid phase: {phase}')
+
+    if item_query is not None:
+        # get the subset of the pool that is of interest
+        mask = frame.iloc[rows].eval(item_query).to_numpy()
+        rows = rows[mask]
+
+    # each column is gathered once for all lists
+    offsets = np.zeros(len(list_index) + 1, dtype=int)
+    offsets[1:] = np.cumsum(np.bincount(codes[rows], minlength=len(list_index)))
+    columns = {}
+    for key, name in zip(keys, names):
+        if key is None or key not in frame.columns:
+            columns[name] = None
+            continue
+        values = _take_values(frame[key], rows, key in code_keys)
+        columns[name] = batch.ListColumn(values, offsets)
+    return batch.ListBatch(columns, list_index)
+
+
+def _column_values(column):
+    """Get the array of values in a column, keeping extension types."""
+    if isinstance(column.dtype, pd.api.extensions.ExtensionDtype):
+        return column.array
+    return column.to_numpy()
+
+
+def _take_fill(values, index):
+    """Take values by index, with missing values where index is -1."""
+    return pd.api.extensions.take(values, index, allow_fill=True)
+
+
+def _take_rows(rows, index):
+    """Map an index into a set of rows to row positions, keeping -1."""
+    positions = np.full(len(index), -1, dtype=np.int64)
+    include = index >= 0
+    positions[include] = rows[index[include]]
+    return positions
+
+
+def _factorize_column(values):
+    """Get integer codes for values, treating missing values as a key."""
+    codes, uniques = pd.factorize(values)
+    codes = codes.astype(np.int64)
+    missing = codes < 0
+    codes[missing] = len(uniques)
+    return codes, len(uniques) + 1, missing
+
+
+def _combine_codes(codes_list):
+    """
+    Get codes for combinations of column codes.
+
+    Codes are assigned in order of first appearance, which is the
+    order in which groups are placed by pandas.merge.
+    """
+    combined = np.zeros(len(codes_list[0][0]), dtype=np.int64)
+    size = 1
+    for codes, n in codes_list:
+        if size * n >= 2**63:
+            # densify codes to avoid overflow
+            combined = pd.factorize(combined)[0].astype(np.int64)
+            size = combined.max() + 1
+        combined = combined * n + codes
+        size *= n
+    combined = pd.factorize(combined)[0].astype(np.int64)
+    n_combined = combined.max() + 1 if len(combined) > 0 else 0
+    return combined, n_combined
+
+
+def _cumcount(codes):
+    """Count previous occurrences of each code."""
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    index = np.arange(len(codes))
+    start = np.ones(len(codes), dtype=bool)
+    start[1:] = sorted_codes[1:] != sorted_codes[:-1]
+    first = np.maximum.accumulate(np.where(start, index, 0))
+    count = np.empty(len(codes), dtype=np.int64)
+    count[order] = index - first
+    return count
+
+
+def _join_index(left, right, n, how='outer'):
+    """
+    Get indices of rows to join based on matching codes.
+
+    Rows are ordered by code, and rows with the same code are paired
+    left-major, giving the same order as pandas.merge with codes
+    assigned in order of first appearance. Unmatched rows have an index
+    of -1 on the other side.
+    """
+    if how == 'outer' and (len(left) == 0 or len(right) == 0):
+        # pandas.merge keeps rows in their original order in this case
+        left_index = np.hstack(
+            [np.arange(len(left)), np.full(len(right), -1, dtype=np.int64)]
+        )
+        right_index = np.hstack(
+            [np.full(len(left), -1, dtype=np.int64), np.arange(len(right))]
+        )
+        return left_index, right_index
+
+    left_count = np.bincount(left, minlength=n)
+    right_count = np.bincount(right, minlength=n)
+    left_sorter = np.argsort(left, kind='stable')
+    right_sorter = np.argsort(right, kind='stable')
+    left_start = np.cumsum(left_count) - left_count
+    right_start = np.cumsum(right_count) - right_count
+    if how == 'inner':
+        groups = np.flatnonzero((left_count > 0) & (right_count > 0))
+    else:
+        groups = np.flatnonzero((left_count > 0) | (right_count > 0))
+
+    # each group has one row for each pair of left and right rows
+    n_left = np.maximum(left_count[groups], 1)
+    n_right = np.maximum(right_count[groups], 1)
+    size = n_left * n_right
+    group = np.repeat(groups, size)
+    within = np.arange(size.sum()) - np.repeat(np.cumsum(size) - size, size)
+    right_within = np.repeat(n_right, size)
+    left_index = np.full(len(group), -1, dtype=np.int64)
+    right_index = np.full(len(group), -1, dtype=np.int64)
+    has_left = left_count[group] > 0
+    has_right = right_count[group] > 0
+    left_pos = left_start[group] + within // right_within
+    right_pos = right_start[group] + within % right_within
+    left_index[has_left] = left_sorter[left_pos[has_left]]
+    right_index[has_right] = right_sorter[right_pos[has_right]]
+    return left_index, right_index
+
+
+class _EventCodes(object):
+    """Values and integer codes of study events followed by recall events."""
+
+    def __init__(self, study, recall, study_rows, recall_rows):
+        self.study = study
+        self.recall = recall
+        self.study_rows = study_rows
+        self.recall_rows = recall_rows
+        self.n_study = len(study_rows)
+        self._values = {}
+        self._codes = {}
+
+    def values(self, key):
+        """Values of a key column for all events."""
+        if key not in self._values:
+            if self.study is self.recall:
+                rows = np.concatenate([self.study_rows, self.recall_rows])
+                values = _column_values(self.study[key])[rows]
+            else:
+                column = pd.concat(
+                    [
+                        self.study[key].iloc[self.study_rows],
+                        self.recall[key].iloc[self.recall_rows],
+                    ],
+                    ignore_index=True,
+                )
+                values = _column_values(column)
+            self._values[key] = values
+        return self._values[key]
+
+    def codes(self, key):
+        """Integer codes and number of codes for a key column."""
+        if key not in self._codes:
+            self._codes[key] = _factorize_column(self.values(key))
+        return self._codes[key][:2]
+
+    def missing(self, key):
+        """Indicator of missing values of a key column."""
+        self.codes(key)
+        return self._codes[key][2]
+
+
+def _merge_index(events, merge_keys, list_keys, position_key):
+    """Match study and recall events by sorting integer key codes."""
+    keys = merge_keys + list_keys
+    codes, n = _combine_codes([events.codes(key) for key in keys])
+    study_index, recall_index = _join_index(
+        codes[: events.n_study], codes[events.n_study :], n
+    )
+
+    # sort rows in standard order
+    sort_keys = merge_keys.copy() + ['input']
+    sort_keys.remove('item')
+    event = np.where(study_index >= 0, study_index, events.n_study + recall_index)
+    sort_values = {key: events.values(key)[event] for key in sort_keys[:-1]}
+    sort_values['input'] = _take_fill(
+        _column_values(events.study[position_key]),
+        _take_rows(events.study_rows, study_index),
+    )
+    order = pd.DataFrame(sort_values).sort_values(by=sort_keys).index.to_numpy()
+    return study_index[order], recall_index[order]
+
+
+def _merge_frame(
+    events,
+    study_index,
+    recall_index,
+    merge_keys,
+    list_keys,
+    study_keys,
+    recall_keys,
+    position_key,
+):
+    """Create a merged table from indices of matched events."""
+    n_study = events.n_study
+    event = np.where(study_index >= 0, study_index, n_study + recall_index)
+    study_pos = _take_rows(events.study_rows, study_index)
+    recall_pos = _take_rows(events.recall_rows, recall_index)
+
+    # running count of number of times each item is recalled in each list;
+    # recalls with missing keys are not counted
+    recall_codes, _ = _combine_codes(
+        [(c[n_study:], n) for c, n in (events.codes(key) for key in merge_keys)]
+    )
+    missing = np.zeros(len(recall_codes), dtype=bool)
+    for key in merge_keys:
+        missing |= events.missing(key)[n_study:]
+    recall_repeat = np.where(missing, 0, _cumcount(recall_codes))
+    repeat = np.zeros(len(event), dtype=int)
+    recalled = recall_index >= 0
+    repeat[recalled] = recall_repeat[recall_index[recalled]]
+
+    columns = {key: events.values(key)[event] for key in merge_keys}
+    columns['input'] = _take_fill(_column_values(events.study[position_key]), study_pos)
+    columns['output'] = _take_fill(
+        _column_values(events.recall[position_key]), recall_pos
+    )
+    columns['study'] = pd.notna(columns['input']) & (repeat == 0)
+    columns['recall'] = pd.notna(columns['output'])
+    columns['repeat'] = repeat
+    columns['intrusion'] = pd.isna(columns['input'])
+    for key in list_keys:
+        columns[key] = events.values(key)[event]
+    for key in study_keys:
+        columns[key] = _take_fill(_column_values(events.study[key]), study_pos)
+    for key in recall_keys:
+        columns[key] = _take_fill(_column_values(events.recall[key]), recall_pos)
+    core_keys = ['input', 'output', 'study', 'recall', 'repeat', 'intrusion']
+    order = merge_keys + core_keys + list_keys + study_keys + recall_keys
+    return pd.DataFrame({key: columns[key] for key in order})
+
+
+def _merge_free_recall_sort(
+    data,
+    merge_keys=None,
+    list_keys=None,
+    study_keys=None,
+    recall_keys=None,
+    position_key='position',
+):
+    """Score free recall data by sorting integer key codes."""
+    if merge_keys is None:
+        merge_keys = ['subject', 'list', 'item']
+    list_keys = [] if list_keys is None else list_keys
+    study_keys = [] if study_keys is None else study_keys
+    recall_keys = [] if recall_keys is None else recall_keys
+
+    trial_type = data['trial_type'].to_numpy()
+    events = _EventCodes(
+        data,
+        data,
+        np.flatnonzero(trial_type == 'study'),
+        np.flatnonzero(trial_type == 'recall'),
+    )
+    study_index, recall_index = _merge_index(
+        events, merge_keys, list_keys, position_key
+    )
+    event = np.where(study_index >= 0, study_index, events.n_study + recall_index)
+    position = _column_values(data[position_key])
+    inputs = _take_fill(position, _take_rows(events.study_rows, study_index))
+    outputs = _take_fill(position, _take_rows(events.recall_rows, recall_index))
+
+    # to identify prior-list intrusions, match intrusions to study events
+    intrusions = np.flatnonzero(pd.isna(inputs))
+    pli_codes, n = _combine_codes(
+        [
+            (np.concatenate([codes[event[intrusions]], codes[: events.n_study]]), n)
+            for codes, n in (events.codes(key) for key in ['subject', 'item'])
+        ]
+    )
+    pli_index, pli_study = _join_index(
+        pli_codes[: len(intrusions)], pli_codes[len(intrusions) :], n, how='inner'
+    )
+
+    # add prior list and prior input information, with one row for
+    # each matching study event
+    row_codes, n = _combine_codes(
+        [
+            (codes[event], n)
+            for codes, n in (events.codes(key) for key in ['subject', 'list', 'item'])
+        ]
+        + [_factorize_column(outputs)[:2]]
+    )
+    row_index, prior_index = _join_index(
+        row_codes, row_codes[intrusions[pli_index]], n
+    )
+    merged = _merge_frame(
+        events,
+        study_index[row_index],
+        recall_index[row_index],
+        merge_keys,
+        list_keys,
+        study_keys,
+        recall_keys,
+        position_key,
+    )
+    prior_pos = _take_rows(events.study_rows, _take_rows(pli_study, prior_index))
+    merged['prior_list'] = _take_fill(_column_values(data['list']), prior_pos)
+    merged['prior_input'] = _take_fill(_column_values(data['position']), prior_pos)
+    return merged
+
+
+def _prior_study(merged, study):
+    """Find the most recent study of each intrusion in an earlier list."""
+    intrusions = np.flatnonzero(merged['intrusion'].to_numpy())
+    n_study = len(study)
+
+    def event_values(key):
+        return pd.concat(
+            [study[key], merged[key].iloc[intrusions]], ignore_index=True
+        )
+
+    # sort study events by subject and item, then list
+    pair, _ = _combine_codes(
+        [_factorize_column(event_values(key))[:2] for key in ['subject', 'item']]
+    )
+    list_codes, list_values = pd.factorize(event_values('list'), sort=True)
+    n_list = len(list_values) + 1
+    event_keys = pair * n_list + list_codes + 1
+    study_keys = event_keys[:n_study]
+    order = np.argsort(study_keys, kind='stable')
+    sorted_keys = study_keys[order]
+
+    # the last study event before the list of each intrusion
+    intrusion_keys = event_keys[n_study:]
+    match = np.searchsorted(sorted_keys, intrusion_keys, side='left') - 1
+    found = match >= 0
+    found[found] = sorted_keys[match[found]] // n_list == pair[n_study:][found]
+    found &= list_codes[n_study:] >= 0
+    found[found] = list_codes[order[match[found]]] >= 0
+
+    prior_rows = np.full(len(merged), -1, dtype=np.int64)
+    prior_rows[intrusions[found]] = order[match[found]]
+    return prior_rows
+
+
+def merge_free_recall(
+    data,
+    engine='pandas',
+    cache_dir=None,
+    intern=False,
+    pli='all',
+    max_list_lag=None,
+    **kwargs,
+):
     """
     Score free recall data by matching up study and recall events.
 
@@ -538,6 +1567,39 @@ def merge_free_recall(data, **kwargs):
         Column indicating the position of each item in either the study
         list or the recall sequence.
 
+    engine : {'pandas', 'sort'}, optional
+        Method used to match events. The 'pandas' engine merges tables
+        of study and recall events. The 'sort' engine codes keys as
+        integers and matches events by sorting codes, which is faster
+        for large datasets. Both engines give the same output.
+
+    cache_dir : str, optional
+        Directory in which to cache scored data. If specified, results
+        are saved to disk, and later calls with the same data and
+        options read the saved results instead of scoring the data
+        again. See :py:func:`psifr.cache.merge_free_recall`.
+
+    intern : bool or list of str, optional
+        If true, the item column is stored as categorical codes before
+        scoring (see `intern_items`), which reduces memory use for
+        large datasets. If a list, the listed columns (e.g., item
+        category columns) are also interned. Interned columns are
+        categorical in the output.
+
+    pli : {'all', 'recent'}, optional
+        Method for identifying the study event of each prior-list
+        intrusion. If 'all', each intrusion is matched to every study
+        event of the same item for that subject, with one row for each
+        match; matches in the same or later lists have NaN prior list
+        and input. If 'recent', each intrusion is matched to the most
+        recent study of the item in an earlier list, using a sorted
+        index of study events, so that each intrusion has one row.
+
+    max_list_lag : int, optional
+        Maximum list lag of prior-list intrusions. Intrusions of items
+        studied more than this many lists earlier have NaN prior list
+        and input. Default is to include all earlier lists.
+
     Returns
     -------
     merged : pandas.DataFrame
@@ -645,30 +1707,208 @@ def merge_free_recall(data, **kwargs):
     3        1     2     piano    2.0     1.0   True    True       0      False          2         NaN          NaN
     4        1     2    hollow    NaN     2.0  False    True       0       True          2         1.0          2.0
     """
-    study = data.loc[data['trial_type'] == 'study'].copy()
-    recall = data.loc[data['trial_type'] == 'recall'].copy()
-    merged = merge_lists(study, recall, **kwargs)
-
-    # to identify prior-list intrusions, merge study events and intrusions
-    intrusions = merged.query('intrusion')
-    plis = pd.merge(intrusions, study, on=['subject', 'item'], how='inner')
-
-    # add prior list and prior input information
-    plis['list'] = plis['list_x']
-    plis['prior_list'] = plis['list_y']
-    plis['prior_input'] = plis['position']
-    include = ['subject', 'list', 'item', 'output', 'prior_list', 'prior_input']
-    merged = pd.merge(
-        merged, plis[include], on=['subject', 'list', 'item', 'output'], how='outer'
-    )
+    if cache_dir is not None:
+        return cache.merge_free_recall(
+            data,
+            cache_dir,
+            engine=engine,
+            intern=intern,
+            pli=pli,
+            max_list_lag=max_list_lag,
+            **kwargs,
+        )
+
+    if intern:
+        keys = ['item']
+        if not isinstance(intern, bool):
+            keys += [key for key in intern if key != 'item']
+        data = intern_items(data, keys)
+
+    if pli == 'recent':
+        study = data.loc[data['trial_type'] == 'study']
+        recall = data.loc[data['trial_type'] == 'recall']
+        merged = merge_lists(study, recall, engine=engine, **kwargs)
+        prior_rows = _prior_study(merged, study)
+        merged['prior_list'] = _take_fill(_column_values(study['list']), prior_rows)
+        merged['prior_input'] = _take_fill(
+            _column_values(study['position']), prior_rows
+        )
+    elif pli != 'all':
+        raise ValueError(f'Invalid pli method: {pli}')
+    elif engine == 'sort':
+        merged = _merge_free_recall_sort(data, **kwargs)
+    elif engine == 'pandas':
+        study = data.loc[data['trial_type'] == 'study'].copy()
+        recall = data.loc[data['trial_type'] == 'recall'].copy()
+        merged = merge_lists(study, recall, **kwargs)
+
+        # to identify prior-list intrusions, merge study events and intrusions
+        intrusions = merged.query('intrusion')
+        plis = pd.merge(intrusions, study, on=['subject', 'item'], how='inner')
+
+        # add prior list and prior input information
+        plis['list'] = plis['list_x']
+        plis['prior_list'] = plis['list_y']
+        plis['prior_input'] = plis['position']
+        include = ['subject', 'list', 'item', 'output', 'prior_list', 'prior_input']
+        merged = pd.merge(
+            merged,
+            plis[include],
+            on=['subject', 'list', 'item', 'output'],
+            how='outer',
+        )
+    else:
+        raise ValueError(f'Invalid engine: {engine}')
 
     # reset concidental "future list intrusions"
     isfli = merged['list'] < merged['prior_list']
+    if max_list_lag is not None:
+        isfli |= merged['list'] - merged['prior_list'] > max_list_lag
     merged.loc[isfli, 'prior_list'] = np.nan
     merged.loc[isfli, 'prior_input'] = np.nan
     return merged
 
 
+def _list_labels(frame):
+    """Get the subject and list of each row."""
+    return pd.MultiIndex.from_frame(frame[['subject', 'list']])
+
+
+def _merged_events(merged, study_mask, recall_mask, position_key, **kwargs):
+    """Convert merged data back to raw study and recall events."""
+    merge_keys = kwargs.get('merge_keys') or ['subject', 'list', 'item']
+    list_keys = kwargs.get('list_keys') or []
+    study_keys = kwargs.get('study_keys') or []
+    recall_keys = kwargs.get('recall_keys') or []
+
+    study = merged.loc[study_mask & merged['study'].to_numpy()]
+    study = study[merge_keys + ['input'] + list_keys + study_keys]
+    study = study.rename(columns={'input': position_key})
+    study.insert(0, 'trial_type', 'study')
+
+    # prior-list intrusions may be split over multiple rows
+    recall = merged.loc[recall_mask & merged['recall'].to_numpy()]
+    recall = recall.drop_duplicates(['subject', 'list', 'output'])
+    recall = recall.sort_values(['subject', 'list', 'output'], kind='stable')
+    recall = recall[merge_keys + ['output'] + list_keys + recall_keys]
+    recall = recall.rename(columns={'output': position_key})
+    recall.insert(0, 'trial_type', 'recall')
+
+    events = pd.concat([study, recall], ignore_index=True)
+    events = events.sort_values(['subject', 'list'], kind='stable')
+    return events
+
+
+def append_free_recall(merged, data, engine='pandas', **kwargs):
+    """
+    Add newly collected data to scored free recall data.
+
+    Only lists that are affected by the new data are scored. These
+    include the new lists, and any existing lists of the same subjects
+    with intrusions of items that are studied in the new lists, which
+    are matched to those study events. Items studied in lists that are
+    already scored are used to identify prior-list intrusions in the
+    new lists.
+
+    Parameters
+    ----------
+    merged : pandas.DataFrame
+        Data scored using `merge_free_recall`.
+
+    data : pandas.DataFrame
+        New free recall data in Psifr format, with new subjects or
+        new lists of existing subjects. If a list is already included
+        in `merged`, it will be replaced.
+
+    engine : {'pandas', 'sort'}, optional
+        Method used to match events. See `merge_free_recall`.
+
+    **kwargs
+        Options for `merge_free_recall`. Must be the same options that
+        were used to score `merged`.
+
+    Returns
+    -------
+    updated : pandas.DataFrame
+        Scored data with the new lists. Rows for each list are the same
+        as if all data were scored together, and lists are sorted by
+        subject and list.
+
+    See Also
+    --------
+    merge_free_recall : Score free recall data.
+
+    Examples
+    --------
+    >>> from psifr import fr
+    >>> raw = fr.table_from_lists([1], [['absence', 'hollow']], [['hollow']])
+    >>> merged = fr.merge_free_recall(raw)
+    >>> new = fr.table_from_lists(
+    ...     [1], [['fountain', 'piano']], [['piano', 'absence']], lists=[2]
+    ... )
+    >>> fr.append_free_recall(merged, new)[['subject', 'list', 'item', 'prior_list']]
+       subject  list      item  prior_list
+    0        1     1   absence         NaN
+    1        1     1    hollow         NaN
+    2        1     2  fountain         NaN
+    3        1     2     piano         NaN
+    4        1     2   absence         1.0
+    """
+    if merged.empty:
+        return merge_free_recall(data, engine=engine, **kwargs)
+    position_key = kwargs.get('position_key', 'position')
+
+    in_subject = merged['subject'].isin(data['subject'].unique()).to_numpy()
+    replaced = _list_labels(merged).isin(_list_labels(data))
+
+    # intrusions of items studied in new or replaced lists are matched
+    # to those study events, so existing lists with them are rescored
+    is_study = data['trial_type'].to_numpy() == 'study'
+    changed = pd.concat(
+        [
+            data.loc[is_study, ['subject', 'item']],
+            merged.loc[replaced & merged['study'].to_numpy(), ['subject', 'item']],
+        ]
+    )
+    intrusion = merged['intrusion'].to_numpy() & in_subject & ~replaced
+    intruded = pd.MultiIndex.from_frame(merged.loc[intrusion, ['subject', 'item']])
+    affected = np.zeros(len(merged), dtype=bool)
+    affected[intrusion] = intruded.isin(pd.MultiIndex.from_frame(changed))
+    rescore = _list_labels(merged).isin(_list_labels(merged.loc[affected]))
+
+    # score new data together with previous events of the same subjects
+    previous = _merged_events(
+        merged, in_subject & ~replaced, rescore, position_key, **kwargs
+    )
+    scored = merge_free_recall(
+        pd.concat([previous, data], ignore_index=True), engine=engine, **kwargs
+    )
+    updated_lists = _list_labels(data).append(_list_labels(merged.loc[rescore]))
+    scored = scored.loc[_list_labels(scored).isin(updated_lists)].copy()
+    kept = merged.loc[~(replaced | rescore)]
+
+    # keep data types of the existing data where possible
+    categorical = []
+    for key in scored.columns.intersection(merged.columns):
+        dtype = merged[key].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            categorical.append(key)
+            continue
+        try:
+            scored[key] = scored[key].astype(dtype)
+        except (TypeError, ValueError):
+            pass
+    if categorical:
+        # add any new labels to the existing codes
+        vocabulary = {key: merged[key].cat.categories for key in categorical}
+        scored = intern_items(scored, categorical, vocabulary)
+        kept = kept.astype({key: scored[key].dtype for key in categorical})
+
+    updated = pd.concat([kept, scored], ignore_index=True)
+    updated = updated.sort_values(['subject', 'list'], kind='stable', ignore_index=True)
+    return updated
+
+
 def merge_lists(
     study,
     recall,
@@ -677,6 +1917,7 @@ def merge_lists(
     study_keys=None,
     recall_keys=None,
     position_key='position',
+    engine='pandas',
 ):
     """
     Merge study and recall events together for each list.
@@ -709,6 +1950,12 @@ def merge_lists(
         Column indicating the position of each item in either the study
         list or the recall sequence.
 
+    engine : {'pandas', 'sort'}, optional
+        Method used to match events. The 'pandas' engine uses an outer
+        merge of the study and recall tables. The 'sort' engine codes
+        keys as integers and matches events by sorting codes, which is
+        faster for large datasets. Both engines give the same output.
+
     Returns
     -------
     merged : pandas.DataFrame
@@ -768,9 +2015,29 @@ def merge_lists(
     if recall_keys is None:
         recall_keys = []
 
+    if engine == 'sort':
+        events = _EventCodes(
+            study, recall, np.arange(len(study)), np.arange(len(recall))
+        )
+        study_index, recall_index = _merge_index(
+            events, merge_keys, list_keys, position_key
+        )
+        return _merge_frame(
+            events,
+            study_index,
+            recall_index,
+            merge_keys,
+            list_keys,
+            study_keys,
+            recall_keys,
+            position_key,
+        )
+    elif engine != 'pandas':
+        raise ValueError(f'Invalid engine: {engine}')
+
     # get running count of number of times each item is recalled in each list
     recall = recall.copy()
-    recall.loc[:, 'repeat'] = recall.groupby(merge_keys).cumcount()
+    recall.loc[:, 'repeat'] = recall.groupby(merge_keys, observed=True).cumcount()
 
     # get just the fields to use in the merge
     study = study.copy()
@@ -876,7 +2143,7 @@ def spc(df):
     return pd.DataFrame(recall)
 
 
-def pnr(df, item_query=None, test_key=None, test=None):
+def pnr(df, item_query=None, test_key=None, test=None, n_jobs=None, executor='process'):
     """
     Probability of recall by serial position and output position.
 
@@ -906,6 +2173,13 @@ def pnr(df, item_query=None, test_key=None, test=None):
         Callable that takes in previous and current item values and
         returns True for transitions that should be included.
 
+    n_jobs : int, optional
+        Number of subjects to analyze in parallel. If -1, all CPUs
+        are used. Default is to analyze subjects serially.
+
+    executor : {'process', 'thread'}, optional
+        Type of worker pool to use when analyzing in parallel.
+
     Returns
     -------
     prob : pandas.DataFrame
@@ -948,7 +2222,7 @@ def pnr(df, item_query=None, test_key=None, test=None):
     measure = measures.TransitionOutputs(
         list_length, item_query=item_query, test_key=test_key, test=test
     )
-    prob = measure.analyze(df)
+    prob = measure.analyze(df, n_jobs=n_jobs, executor=executor)
     return prob
 
 
@@ -986,7 +2260,10 @@ def pli_list_lag(df, max_lag):
     max_lag : int
         Maximum list lag to consider. The intial :code:`max_lag` lists
         for each subject will be excluded so that all considered lags
-        are possible for all included lists.
+        are possible for all included lists. Only intrusions up to
+        :code:`max_lag` lists back are counted, so data may be scored
+        using :code:`merge_free_recall(..., max_list_lag=max_lag)` to
+        skip matching intrusions to earlier lists.
 
     Returns
     -------
@@ -1021,7 +2298,14 @@ def pli_list_lag(df, max_lag):
 
 
 def lag_crp(
-    df, lag_key='input', count_unique=False, item_query=None, test_key=None, test=None
+    df,
+    lag_key='input',
+    count_unique=False,
+    item_query=None,
+    test_key=None,
+    test=None,
+    n_jobs=None,
+    executor='process',
 ):
     """
     Lag-CRP for multiple subjects.
@@ -1051,9 +2335,19 @@ def lag_crp(
         Name of column with labels to use when testing transitions for
         inclusion.
 
-    test : callable, optional
+    test : callable or str, optional
         Callable that takes in previous and current item values and
-        returns True for transitions that should be included.
+        returns True for transitions that should be included. May also
+        be a declarative test such as 'same' or 'different', which is
+        evaluated for all transitions at once (see
+        `psifr.transitions.get_test`).
+
+    n_jobs : int, optional
+        Number of subjects to analyze in parallel. If -1, all CPUs
+        are used. Default is to analyze subjects serially.
+
+    executor : {'process', 'thread'}, optional
+        Type of worker pool to use when analyzing in parallel.
 
     Returns
     -------
@@ -1111,12 +2405,19 @@ def lag_crp(
         test_key=test_key,
         test=test,
     )
-    crp = measure.analyze(df)
+    crp = measure.analyze(df, n_jobs=n_jobs, executor=executor)
     return crp
 
 
 def lag_crp_compound(
-    df, lag_key='input', count_unique=False, item_query=None, test_key=None, test=None
+    df,
+    lag_key='input',
+    count_unique=False,
+    item_query=None,
+    test_key=None,
+    test=None,
+    n_jobs=None,
+    executor='process',
 ):
     """
     Conditional response probability by lag of current and prior transitions.
@@ -1146,9 +2447,19 @@ def lag_crp_compound(
         Name of column with labels to use when testing transitions for
         inclusion.
 
-    test : callable, optional
+    test : callable or str, optional
         Callable that takes in previous and current item values and
-        returns True for transitions that should be included.
+        returns True for transitions that should be included. May also
+        be a declarative test such as 'same' or 'different', which is
+        evaluated for all transitions at once (see
+        `psifr.transitions.get_test`).
+
+    n_jobs : int, optional
+        Number of subjects to analyze in parallel. If -1, all CPUs
+        are used. Default is to analyze subjects serially.
+
+    executor : {'process', 'thread'}, optional
+        Type of worker pool to use when analyzing in parallel.
 
     Returns
     -------
@@ -1215,11 +2526,13 @@ def lag_crp_compound(
         test=test,
         compound=True
     )
-    crp = measure.analyze(df)
+    crp = measure.analyze(df, n_jobs=n_jobs, executor=executor)
     return crp
 
 
-def lag_rank(df, item_query=None, test_key=None, test=None):
+def lag_rank(
+    df, item_query=None, test_key=None, test=None, n_jobs=None, executor='process'
+):
     """
     Calculate rank of the absolute lags in free recall lists.
 
@@ -1241,9 +2554,19 @@ def lag_rank(df, item_query=None, test_key=None, test=None):
         Name of column with labels to use when testing transitions for
         inclusion.
 
-    test : callable, optional
+    test : callable or str, optional
         Callable that takes in previous and current item values and
-        returns True for transitions that should be included.
+        returns True for transitions that should be included. May also
+        be a declarative test such as 'same' or 'different', which is
+        evaluated for all transitions at once (see
+        `psifr.transitions.get_test`).
+
+    n_jobs : int, optional
+        Number of subjects to analyze in parallel. If -1, all CPUs
+        are used. Default is to analyze subjects serially.
+
+    executor : {'process', 'thread'}, optional
+        Type of worker pool to use when analyzing in parallel.
 
     Returns
     -------
@@ -1272,7 +2595,7 @@ def lag_rank(df, item_query=None, test_key=None, test=None):
     measure = measures.TransitionLagRank(
         item_query=item_query, test_key=test_key, test=test
     )
-    rank = measure.analyze(df)
+    rank = measure.analyze(df, n_jobs=n_jobs, executor=executor)
     return rank
 
 
@@ -1286,6 +2609,8 @@ def distance_crp(
     item_query=None,
     test_key=None,
     test=None,
+    n_jobs=None,
+    executor='process',
 ):
     """
     Conditional response probability by distance bin.
@@ -1300,7 +2625,10 @@ def distance_crp(
         `distances` matrix.
 
     distances : numpy.array
-        Items x items matrix of pairwise distances or similarities.
+        Items x items matrix of pairwise distances or similarities. May
+        be memory-mapped (see `load_distances`), calculated from item
+        vectors (see `psifr.embedding.EmbeddingDistances`), or stored for
+        only some pairs (see `psifr.embedding.SparseDistances`).
 
     edges : array-like
         Edges of bins to apply to the distances.
@@ -1322,9 +2650,19 @@ def distance_crp(
         Name of column with labels to use when testing transitions for
         inclusion.
 
-    test : callable, optional
+    test : callable or str, optional
         Callable that takes in previous and current item values and
-        returns True for transitions that should be included.
+        returns True for transitions that should be included. May also
+        be a declarative test such as 'same' or 'different', which is
+        evaluated for all transitions at once (see
+        `psifr.transitions.get_test`).
+
+    n_jobs : int, optional
+        Number of subjects to analyze in parallel. If -1, all CPUs
+        are used. Default is to analyze subjects serially.
+
+    executor : {'process', 'thread'}, optional
+        Type of worker pool to use when analyzing in parallel.
 
     Returns
     -------
@@ -1391,11 +2729,20 @@ def distance_crp(
         test_key=test_key,
         test=test,
     )
-    crp = measure.analyze(df)
+    crp = measure.analyze(df, n_jobs=n_jobs, executor=executor)
     return crp
 
 
-def distance_rank(df, index_key, distances, item_query=None, test_key=None, test=None):
+def distance_rank(
+    df,
+    index_key,
+    distances,
+    item_query=None,
+    test_key=None,
+    test=None,
+    n_jobs=None,
+    executor='process',
+):
     """
     Calculate rank of transition distances in free recall lists.
 
@@ -1413,7 +2760,10 @@ def distance_rank(df, index_key, distances, item_query=None, test_key=None, test
         `distances` matrix.
 
     distances : numpy.array
-        Items x items matrix of pairwise distances or similarities.
+        Items x items matrix of pairwise distances or similarities. May
+        be memory-mapped (see `load_distances`), calculated from item
+        vectors (see `psifr.embedding.EmbeddingDistances`), or stored for
+        only some pairs (see `psifr.embedding.SparseDistances`).
 
     item_query : str, optional
         Query string to select items to include in the pool of possible
@@ -1424,9 +2774,19 @@ def distance_rank(df, index_key, distances, item_query=None, test_key=None, test
         Name of column with labels to use when testing transitions for
         inclusion.
 
-    test : callable, optional
+    test : callable or str, optional
         Callable that takes in previous and current item values and
-        returns True for transitions that should be included.
+        returns True for transitions that should be included. May also
+        be a declarative test such as 'same' or 'different', which is
+        evaluated for all transitions at once (see
+        `psifr.transitions.get_test`).
+
+    n_jobs : int, optional
+        Number of subjects to analyze in parallel. If -1, all CPUs
+        are used. Default is to analyze subjects serially.
+
+    executor : {'process', 'thread'}, optional
+        Type of worker pool to use when analyzing in parallel.
 
     Returns
     -------
@@ -1460,12 +2820,20 @@ def distance_rank(df, index_key, distances, item_query=None, test_key=None, test
     measure = measures.TransitionDistanceRank(
         index_key, distances, item_query=item_query, test_key=test_key, test=test
     )
-    rank = measure.analyze(df)
+    rank = measure.analyze(df, n_jobs=n_jobs, executor=executor)
     return rank
 
 
 def distance_rank_shifted(
-    df, index_key, distances, max_shift, item_query=None, test_key=None, test=None
+    df,
+    index_key,
+    distances,
+    max_shift,
+    item_query=None,
+    test_key=None,
+    test=None,
+    n_jobs=None,
+    executor='process',
 ):
     """
     Rank of transition distances relative to earlier items.
@@ -1484,7 +2852,10 @@ def distance_rank_shifted(
         `distances` matrix.
 
     distances : numpy.array
-        Items x items matrix of pairwise distances or similarities.
+        Items x items matrix of pairwise distances or similarities. May
+        be memory-mapped (see `load_distances`), calculated from item
+        vectors (see `psifr.embedding.EmbeddingDistances`), or stored for
+        only some pairs (see `psifr.embedding.SparseDistances`).
 
     max_shift : int
         Maximum number of items back for which to rank distances.
@@ -1498,9 +2869,19 @@ def distance_rank_shifted(
         Name of column with labels to use when testing transitions for
         inclusion.
 
-    test : callable, optional
+    test : callable or str, optional
         Callable that takes in previous and current item values and
-        returns True for transitions that should be included.
+        returns True for transitions that should be included. May also
+        be a declarative test such as 'same' or 'different', which is
+        evaluated for all transitions at once (see
+        `psifr.transitions.get_test`).
+
+    n_jobs : int, optional
+        Number of subjects to analyze in parallel. If -1, all CPUs
+        are used. Default is to analyze subjects serially.
+
+    executor : {'process', 'thread'}, optional
+        Type of worker pool to use when analyzing in parallel.
 
     Returns
     -------
@@ -1543,12 +2924,20 @@ def distance_rank_shifted(
     measure = measures.TransitionDistanceRankShifted(
         index_key, distances, max_shift, item_query=item_query, test_key=test_key, test=test
     )
-    rank = measure.analyze(df)
+    rank = measure.analyze(df, n_jobs=n_jobs, executor=executor)
     return rank
 
 
 def distance_rank_window(
-    df, index_key, distances, window_lags, item_query=None, test_key=None, test=None
+    df,
+    index_key,
+    distances,
+    window_lags,
+    item_query=None,
+    test_key=None,
+    test=None,
+    n_jobs=None,
+    executor='process',
 ):
     """
     Rank of transition distances relative to items in a window.
@@ -1570,7 +2959,10 @@ def distance_rank_window(
         `distances` matrix.
 
     distances : numpy.array
-        Items x items matrix of pairwise distances or similarities.
+        Items x items matrix of pairwise distances or similarities. May
+        be memory-mapped (see `load_distances`), calculated from item
+        vectors (see `psifr.embedding.EmbeddingDistances`), or stored for
+        only some pairs (see `psifr.embedding.SparseDistances`).
 
     window_lags : array_like
         Serial position lags to include in the window.
@@ -1584,9 +2976,19 @@ def distance_rank_window(
         Name of column with labels to use when testing transitions for
         inclusion.
 
-    test : callable, optional
+    test : callable or str, optional
         Callable that takes in previous and current item values and
-        returns True for transitions that should be included.
+        returns True for transitions that should be included. May also
+        be a declarative test such as 'same' or 'different', which is
+        evaluated for all transitions at once (see
+        `psifr.transitions.get_test`).
+
+    n_jobs : int, optional
+        Number of subjects to analyze in parallel. If -1, all CPUs
+        are used. Default is to analyze subjects serially.
+
+    executor : {'process', 'thread'}, optional
+        Type of worker pool to use when analyzing in parallel.
 
     Returns
     -------
@@ -1603,11 +3005,19 @@ def distance_rank_window(
         test_key=test_key,
         test=test,
     )
-    rank = measure.analyze(df)
+    rank = measure.analyze(df, n_jobs=n_jobs, executor=executor)
     return rank
 
 
-def category_crp(df, category_key, item_query=None, test_key=None, test=None):
+def category_crp(
+    df,
+    category_key,
+    item_query=None,
+    test_key=None,
+    test=None,
+    n_jobs=None,
+    executor='process',
+):
     """
     Conditional response probability of within-category transitions.
 
@@ -1630,9 +3040,19 @@ def category_crp(df, category_key, item_query=None, test_key=None, test=None):
         Name of column with labels to use when testing transitions for
         inclusion.
 
-    test : callable, optional
+    test : callable or str, optional
         Callable that takes in previous and current item values and
-        returns True for transitions that should be included.
+        returns True for transitions that should be included. May also
+        be a declarative test such as 'same' or 'different', which is
+        evaluated for all transitions at once (see
+        `psifr.transitions.get_test`).
+
+    n_jobs : int, optional
+        Number of subjects to analyze in parallel. If -1, all CPUs
+        are used. Default is to analyze subjects serially.
+
+    executor : {'process', 'thread'}, optional
+        Type of worker pool to use when analyzing in parallel.
 
     Returns
     -------
@@ -1670,7 +3090,7 @@ def category_crp(df, category_key, item_query=None, test_key=None, test=None):
     measure = measures.TransitionCategory(
         category_key, item_query=item_query, test_key=test_key, test=test
     )
-    crp = measure.analyze(df)
+    crp = measure.analyze(df, n_jobs=n_jobs, executor=executor)
     return crp
 
 
@@ -1738,241 +3158,3 @@ def category_clustering(df, category_key):
     clean = df.query('~intrusion and repeat == 0')
     stats = clean.groupby('subject').apply(_subject_category_clustering, category_key)
     return stats
-
-
-def plot_spc(recall, **facet_kws):
-    """
-    Plot a serial position curve.
-
-    Additional arguments are passed to seaborn.relplot.
-
-    Parameters
-    ----------
-    recall : pandas.DataFrame
-        Results from calling `spc`.
-    """
-    y = 'recall' if 'recall' in recall else 'prob'
-    g = sns.FacetGrid(dropna=False, **facet_kws, data=recall.reset_index())
-    g.map_dataframe(sns.lineplot, x='input', y=y)
-    g.set_xlabels('Serial position')
-    g.set_ylabels('Recall probability')
-    g.set(ylim=(0, 1))
-    return g
-
-
-def plot_lag_crp(recall, max_lag=5, lag_key='lag', split=True, **facet_kws):
-    """
-    Plot conditional response probability by lag.
-
-    Additional arguments are passed to seaborn.FacetGrid.
-
-    Parameters
-    ----------
-    recall : pandas.DataFrame
-        Results from calling `lag_crp`.
-
-    max_lag : int, optional
-        Maximum absolute lag to plot.
-
-    lag_key : str, optional
-        Name of the column indicating lag.
-
-    split : bool, optional
-        If true, will plot as two separate lines with a gap at lag 0.
-    """
-    if split:
-        filt_neg = f'{-max_lag} <= {lag_key} < 0'
-        filt_pos = f'0 < {lag_key} <= {max_lag}'
-        g = sns.FacetGrid(dropna=True, **facet_kws, data=recall.reset_index())
-        g.map_dataframe(
-            lambda data, **kws: sns.lineplot(
-                data=data.query(filt_neg), x=lag_key, y='prob', **kws
-            )
-        )
-        g.map_dataframe(
-            lambda data, **kws: sns.lineplot(
-                data=data.query(filt_pos), x=lag_key, y='prob', **kws
-            )
-        )
-    else:
-        data = recall.query(f'{-max_lag} <= {lag_key} <= {max_lag}')
-        g = sns.FacetGrid(dropna=False, **facet_kws, data=data.reset_index())
-        g.map_dataframe(sns.lineplot, x=lag_key, y='prob')
-
-    g.set_xlabels('Lag')
-    g.set_ylabels('CRP')
-    g.set(ylim=(0, 1))
-    return g
-
-
-def plot_distance_crp(crp, min_samples=None, **facet_kws):
-    """
-    Plot response probability by distance bin.
-
-    Parameters
-    ----------
-    crp : pandas.DataFrame
-        Results from `fr.distance_crp`.
-
-    min_samples : int
-        Minimum number of samples a bin must have per subject to
-        include in the plot.
-
-    **facet_kws
-        Additional inputs to pass to `seaborn.relplot`.
-    """
-    crp = crp.reset_index()
-    if min_samples is not None:
-        min_n = crp.groupby('center')['possible'].min()
-        include = min_n.loc[min_n >= min_samples].index.to_numpy()
-        crp = crp.loc[crp['center'].isin(include)]
-    g = sns.FacetGrid(dropna=False, **facet_kws, data=crp.reset_index())
-    g.map_dataframe(sns.lineplot, x='center', y='prob')
-    g.set_xlabels('Distance')
-    g.set_ylabels('CRP')
-    g.set(ylim=(0, 1))
-    return g
-
-
-def plot_swarm_error(
-    data, x=None, y=None, swarm_color=None, swarm_size=5, point_color='k', **facet_kws
-):
-    """
-    Plot points as a swarm plus mean with error bars.
-
-    Parameters
-    ----------
-    data : pandas.DataFrame
-        DataFrame with statistics to plot.
-
-    x : str
-        Name of variable to plot on x-axis.
-
-    y : str
-        Name of variable to plot on y-axis.
-
-    swarm_color
-        Color for swarm plot points. May use any specification
-        supported by seaborn.
-
-    swarm_size : float
-        Size of swarm plot points.
-
-    point_color
-        Color for the point plot (error bars).
-
-    facet_kws
-        Additional keywords for the FacetGrid.
-    """
-    g = sns.FacetGrid(data=data.reset_index(), dropna=False, **facet_kws)
-    g.map_dataframe(
-        sns.swarmplot, x=x, y=y, color=swarm_color, size=swarm_size, zorder=1
-    )
-    g.map_dataframe(
-        sns.pointplot, x=x, y=y, color=point_color, join=False, capsize=0.5
-    )
-    return g
-
-
-def plot_raster(
-    df,
-    hue='input',
-    palette=None,
-    marker='s',
-    intrusion_color=None,
-    orientation='horizontal',
-    length=6,
-    aspect=None,
-    legend='auto',
-    **facet_kws,
-):
-    """
-    Plot recalls in a raster plot.
-
-    Parameters
-    ----------
-    df : pandas.DataFrame
-        Scored free recall data.
-
-    hue : str or None, optional
-        Column to use to set marker color.
-
-    palette : optional
-        Palette specification supported by Seaborn.
-
-    marker : str, optional
-         Marker code supported by Seaborn.
-
-    intrusion_color : optional
-        Color of intrusions.
-
-    orientation : {'horizontal', 'vertical'}, optional
-        Whether lists should be stacked horizontally or vertically in
-        the plot.
-
-    length : float, optional
-        Size of the plot dimension along which list varies.
-
-    aspect : float, optional
-        Aspect ratio of plot for lists over items.
-
-    legend : str, optional
-        Legend setting. See seaborn.scatterplot for details.
-
-    facet_kws : optional
-        Additional key words to pass to seaborn.FacetGrid.
-    """
-    n_item = int(df['input'].max())
-    n_list = int(df['list'].max())
-    if palette is None and hue == 'input':
-        palette = 'viridis'
-
-    if intrusion_color is None:
-        intrusion_color = (0.8, 0.1, 0.3)
-
-    list_lim = (0, n_list + 1)
-    item_lim = (0, n_item + 1)
-    if orientation == 'horizontal':
-        x_var, y_var = 'list', 'output'
-        x_lim, y_lim = list_lim, item_lim
-        x_label, y_label = 'List', 'Output position'
-        def_aspect = n_list / n_item
-    else:
-        x_var, y_var = 'output', 'list'
-        x_lim, y_lim = item_lim, list_lim[::-1]
-        x_label, y_label = 'Output position', 'List'
-        def_aspect = n_item / n_list
-
-    if aspect is None:
-        aspect = def_aspect
-
-    if orientation == 'horizontal':
-        height = length / aspect
-    else:
-        height = length
-
-    g = sns.FacetGrid(
-        data=df.reset_index(), dropna=False, aspect=aspect, height=height, **facet_kws
-    )
-    g.map_dataframe(
-        sns.scatterplot,
-        x=x_var,
-        y=y_var,
-        marker=marker,
-        hue=hue,
-        palette=palette,
-        legend=legend,
-    )
-    g.map_dataframe(
-        lambda data, color=None, label=None: sns.scatterplot(
-            data=data.query('intrusion'),
-            x=x_var,
-            y=y_var,
-            color=intrusion_color,
-            marker=marker,
-        )
-    )
-    g.set_xlabels(x_label)
-    g.set_ylabels(y_label)
-    g.set(xlim=x_lim, ylim=y_lim)
-    return g
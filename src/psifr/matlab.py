@@ -0,0 +1,292 @@
+"""Read free recall data saved in MATLAB frdata format."""
+
+import concurrent.futures
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import io
+
+from psifr import batch
+from psifr import fr
+
+
+def _field(struct, name):
+    """Get a field of a MATLAB struct, or None if it is missing."""
+    if struct.dtype.names is None or name not in struct.dtype.names:
+        return None
+    return struct[name][0, 0]
+
+
+def _cell_values(cells):
+    """Convert a MATLAB cell array to an object array of values."""
+    if cells.dtype != object:
+        return cells
+    values = np.empty(cells.shape, dtype=object)
+    values.ravel()[:] = [
+        cell.item() if cell.size == 1 else None for cell in cells.ravel()
+    ]
+    return values
+
+
+def _column(values, n_list):
+    """Get a per-list column as a flat array."""
+    values = _cell_values(np.asarray(values))
+    if values.size != n_list:
+        raise ValueError('List fields must have one value for each list.')
+    return values.ravel()
+
+
+def _masked(values, include):
+    """Create a list column from the included values in each row."""
+    offsets = np.zeros(values.shape[0] + 1, dtype=int)
+    offsets[1:] = np.cumsum(include.sum(axis=1))
+    return batch.ListColumn(values[include], offsets)
+
+
+def _recall_lengths(recalls):
+    """Number of recalls in each list, ending at the first zero or NaN."""
+    end = (recalls == 0) | np.isnan(recalls)
+    return np.where(end.any(axis=1), end.argmax(axis=1), recalls.shape[1])
+
+
+def frdata_to_table(frdata, extra=None, names=None, output='raw', **kwargs):
+    """
+    Convert a free recall data struct to Psifr format.
+
+    The struct is converted as in :code:`frdata2table.m`, without
+    looping over lists or trials. Lists are grouped by subject and
+    numbered within subject, unless there is a list field. Empty cells
+    of pres_items are excluded from study lists, wherever they are in
+    the list; the remaining items are numbered by serial position in
+    order.
+
+    Parameters
+    ----------
+    frdata : numpy.ndarray
+        MATLAB struct, as loaded by `scipy.io.loadmat`. Must have
+        pres_items and rec_items fields with the items presented and
+        recalled in each list. Recall sequences end at the first zero
+        or NaN in the recalls field, if present, and otherwise at the
+        first empty cell of rec_items. May have subject and list fields
+        with one value for each list.
+
+    extra : list of str, optional
+        Additional fields to include. These fields must be in the pres
+        and rec substructs, giving the value of that field for each
+        study and recall event.
+
+    names : list of str, optional
+        New name for each field in `extra`. Default is to use the field
+        names.
+
+    output : {'raw', 'merged', 'lists'}, optional
+        Format of the output. If 'raw', a table of study and recall
+        events is returned. If 'merged', the events are scored using
+        `psifr.fr.merge_free_recall`. If 'lists', study and recall
+        events are returned as `psifr.batch.ListBatch` objects.
+
+    **kwargs
+        Options for `psifr.fr.merge_free_recall`, if `output` is
+        'merged'.
+
+    Returns
+    -------
+    data : pandas.DataFrame or tuple of psifr.batch.ListBatch
+        Free recall data. If `output` is 'lists', the study and recall
+        batches are returned.
+    """
+    for field in ['pres_items', 'rec_items']:
+        if _field(frdata, field) is None:
+            raise ValueError(f'Required field {field} is missing.')
+    pres_items = _cell_values(_field(frdata, 'pres_items'))
+    rec_items = _cell_values(_field(frdata, 'rec_items'))
+    n_list = pres_items.shape[0]
+    subject = _field(frdata, 'subject')
+    if subject is None:
+        subjects = np.full(n_list, 'n/a', dtype=object)
+    else:
+        subjects = _column(subject, n_list)
+    list_field = _field(frdata, 'list')
+    lists = None if list_field is None else _column(list_field, n_list)
+
+    # study lists include all items that are not empty; recall sequences
+    # end at the first missing recall
+    study_include = pd.notna(pres_items)
+    recalls = _field(frdata, 'recalls')
+    if recalls is not None:
+        width = min(recalls.shape[1], rec_items.shape[1])
+        recall_lengths = _recall_lengths(recalls[:, :width].astype(float))
+    else:
+        recall_lengths = pd.notna(rec_items).cumprod(axis=1).sum(axis=1)
+    recall_include = np.arange(rec_items.shape[1]) < recall_lengths[:, np.newaxis]
+
+    # group lists by subject
+    order = np.argsort(pd.factorize(subjects, sort=True)[0], kind='stable')
+    subjects = subjects[order]
+    if lists is not None:
+        lists = lists[order]
+
+    def padded(values, include):
+        width = include.shape[1]
+        return _masked(values[order, :width], include[order])
+
+    columns = {'item': (pres_items, rec_items)}
+    if extra is not None:
+        pres = _field(frdata, 'pres')
+        rec = _field(frdata, 'rec')
+        if names is None:
+            names = extra
+        for field, name in zip(extra, names):
+            columns[name] = (
+                _cell_values(_field(pres, field)),
+                _cell_values(_field(rec, field)),
+            )
+    columns = {
+        name: (padded(study, study_include), padded(recall, recall_include))
+        for name, (study, recall) in columns.items()
+    }
+
+    if output == 'lists':
+        if lists is None:
+            lists = fr._list_numbers(subjects, None)
+        index = pd.MultiIndex.from_arrays(
+            [subjects.tolist(), lists.tolist()], names=['subject', 'list']
+        )
+        study = batch.ListBatch({k: v[0] for k, v in columns.items()}, index)
+        recall = batch.ListBatch({k: v[1] for k, v in columns.items()}, index)
+        return study, recall
+
+    study, recall = columns.pop('item')
+    data = fr.table_from_lists(
+        subjects.tolist(), study, recall, lists=lists, **columns
+    )
+    if output == 'merged':
+        data = fr.merge_free_recall(data, **kwargs)
+    elif output != 'raw':
+        raise ValueError(f'Invalid output: {output}')
+    return data
+
+
+def read_frdata(path, var_name=None, extra=None, names=None, output='raw', **kwargs):
+    """
+    Read free recall data from a MATLAB frdata file.
+
+    Files saved in MATLAB v7.3 format (HDF5) are not supported; these
+    files may be saved again with the :code:`-v7` option.
+
+    Parameters
+    ----------
+    path : str
+        Path to a MAT-file.
+
+    var_name : str, optional
+        Name of the variable with the frdata struct. If not specified,
+        the file must contain only one variable.
+
+    extra : list of str, optional
+        Additional fields to include. See `frdata_to_table`.
+
+    names : list of str, optional
+        New name for each field in `extra`.
+
+    output : {'raw', 'merged', 'lists'}, optional
+        Format of the output. See `frdata_to_table`.
+
+    **kwargs
+        Options for `psifr.fr.merge_free_recall`, if `output` is
+        'merged'.
+
+    Returns
+    -------
+    data : pandas.DataFrame or tuple of psifr.batch.ListBatch
+        Free recall data.
+
+    See Also
+    --------
+    read_frdata_dir : Read all frdata files in a directory.
+    """
+    mat = io.loadmat(path, variable_names=None if var_name is None else [var_name])
+    variables = [key for key in mat if not key.startswith('__')]
+    if var_name is None:
+        if len(variables) != 1:
+            raise ValueError(f'Expected one variable in {path}; found {variables}.')
+        var_name = variables[0]
+    return frdata_to_table(
+        mat[var_name], extra=extra, names=names, output=output, **kwargs
+    )
+
+
+def _read_file(path, kwargs, out_dir):
+    """Read one frdata file, and optionally write it to a CSV file."""
+    data = read_frdata(path, **kwargs)
+    if out_dir is None:
+        return data
+    name = os.path.splitext(os.path.basename(path))[0]
+    out_file = os.path.join(out_dir, f'{name}.csv')
+    data.to_csv(out_file, index=False)
+    return out_file
+
+
+def read_frdata_dir(
+    directory, pattern='*.mat', out_dir=None, n_jobs=None, **kwargs
+):
+    """
+    Read all MATLAB frdata files in a directory.
+
+    Parameters
+    ----------
+    directory : str
+        Path to a directory with MAT-files.
+
+    pattern : str, optional
+        Pattern of files to read.
+
+    out_dir : str, optional
+        Directory in which to save a CSV file with the data from each
+        MAT-file. If specified, data are not kept in memory.
+
+    n_jobs : int, optional
+        Number of files to convert in parallel. If -1, all CPUs are
+        used. Default is to convert files serially.
+
+    **kwargs
+        Options for `read_frdata`. The output must be either 'raw' or
+        'merged'.
+
+    Returns
+    -------
+    data : pandas.DataFrame or list of str
+        Data from all files, in sorted file order. If `out_dir` is
+        specified, the paths to the saved CSV files are returned
+        instead.
+
+    See Also
+    --------
+    read_frdata : Read one frdata file.
+    """
+    if kwargs.get('output', 'raw') not in ['raw', 'merged']:
+        raise ValueError('Output must be raw or merged data.')
+    files = sorted(glob.glob(os.path.join(directory, pattern)))
+    if out_dir is not None:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs is None or n_jobs == 1:
+        results = [_read_file(path, kwargs, out_dir) for path in files]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(n_jobs) as workers:
+            results = list(
+                workers.map(
+                    _read_file,
+                    files,
+                    [kwargs] * len(files),
+                    [out_dir] * len(files),
+                )
+            )
+
+    if out_dir is not None:
+        return results
+    return pd.concat(results, ignore_index=True)
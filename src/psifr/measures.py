@@ -1,14 +1,205 @@
 """Classes for defining recall measures."""
 
 import abc
+import concurrent.futures
+import functools
+import mmap
+import os
 
 import numpy as np
 import pandas as pd
 
+from psifr import batch
 from psifr import fr
 from psifr import transitions
 from psifr import outputs
 
+# measures used by each worker process when analyzing in parallel
+_worker_measures = None
+
+
+def _init_worker(measure_list):
+    """Store measures for use in a worker process."""
+    global _worker_measures
+    _worker_measures = measure_list
+
+
+def _analyze_lists(measure_list, subject, subject_lists):
+    """Analyze one subject using each measure."""
+    results = [
+        measure.analyze_subject(subject, pool_lists, recall_lists)
+        for measure, (pool_lists, recall_lists) in zip(measure_list, subject_lists)
+    ]
+    return results
+
+
+def _analyze_worker(subject, subject_lists):
+    """Analyze one subject in a worker process."""
+    return _analyze_lists(_worker_measures, subject, subject_lists)
+
+
+class _MappedArray(object):
+    """Reference to a memory-mapped array file, used when pickling."""
+
+    def __init__(self, array):
+        self.filename = array.filename
+        self.dtype = array.dtype
+        self.shape = array.shape
+        self.offset = array.offset
+        self.order = 'F' if np.isfortran(array) else 'C'
+
+    def load(self):
+        """Map the array file again."""
+        return np.memmap(
+            self.filename,
+            dtype=self.dtype,
+            mode='r',
+            offset=self.offset,
+            shape=self.shape,
+            order=self.order,
+        )
+
+
+def _is_mapped(value):
+    """Check if a value is a whole memory-mapped array file."""
+    return (
+        isinstance(value, np.memmap)
+        and value.filename is not None
+        and isinstance(value.base, mmap.mmap)
+    )
+
+
+def _select_columns(lists, keys):
+    """Select columns from a batch and rename them."""
+    columns = {
+        name: None if key is None else lists[key] for name, key in keys.items()
+    }
+    return batch.ListBatch(columns, lists.index)
+
+
+def _split_measures(data, measure_list):
+    """Split lists for each subject, with columns shared between measures."""
+    columns = []
+    decoded = set()
+    for measure in measure_list:
+        for name, key in measure.keys.items():
+            if key is None:
+                continue
+            if key not in data.columns:
+                raise ValueError(f'Required column {key} is missing.')
+            if key not in columns:
+                columns.append(key)
+            if name not in measure.code_names:
+                decoded.add(key)
+
+    # columns may be split as codes if no measure needs their labels
+    codes = [key for key in columns if key not in decoded]
+
+    # split each phase once, with a separate study split for each query
+    queries = list(dict.fromkeys(measure.item_query for measure in measure_list))
+    pool_subjects = {
+        query: fr.split_lists(
+            data, 'study', columns, item_query=query, as_batch=True, codes=codes
+        ).split_subjects()
+        for query in queries
+    }
+    recall_batch = fr.split_lists(data, 'recall', columns, as_batch=True, codes=codes)
+
+    subjects = []
+    subject_lists = []
+    for subject, recall_lists in recall_batch.split_subjects():
+        pool_lists = {query: next(split)[1] for query, split in pool_subjects.items()}
+        measure_lists = [
+            (
+                _select_columns(pool_lists[measure.item_query], measure.keys),
+                _select_columns(recall_lists, measure.keys),
+            )
+            for measure in measure_list
+        ]
+        subjects.append(subject)
+        subject_lists.append(measure_lists)
+    return subjects, subject_lists
+
+
+def analyze_measures(data, measure_list, n_jobs=None, executor='process'):
+    """
+    Analyze a free recall dataset using multiple measures.
+
+    Data are split into lists once for all measures. Measures that use
+    the same columns, item query, and test share the same included
+    transitions, which are only calculated once for each subject.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Merged free recall data.
+
+    measure_list : list of TransitionMeasure
+        Measures to calculate.
+
+    n_jobs : int, optional
+        Number of subjects to analyze in parallel. If -1, all CPUs
+        are used. Default is to analyze subjects serially.
+
+    executor : {'process', 'thread'}, optional
+        Type of worker pool to use when analyzing in parallel. With
+        a process pool, the measures are sent to each worker once,
+        and each task only includes data for one subject. Measures
+        must be picklable if processes are not forked.
+
+    Returns
+    -------
+    stats : list of pandas.DataFrame
+        Statistics calculated for each subject, for each measure.
+
+    Examples
+    --------
+    >>> from psifr import fr
+    >>> from psifr import measures
+    >>> raw = fr.sample_data('Morton2013')
+    >>> data = fr.merge_free_recall(raw, study_keys=['category'])
+    >>> lag = measures.TransitionLag(24)
+    >>> category = measures.TransitionCategory('category')
+    >>> lag_crp, cat_crp = measures.analyze_measures(data, [lag, category])
+    >>> cat_crp.head()
+                 prob  actual  possible
+    subject                            
+    1        0.801147     419       523
+    2        0.733456     399       544
+    3        0.763158     377       494
+    4        0.814882     449       551
+    5        0.877273     579       660
+    """
+    subjects, subject_lists = _split_measures(data, measure_list)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs is None or n_jobs == 1:
+        subj_results = [
+            _analyze_lists(measure_list, subject, lists)
+            for subject, lists in zip(subjects, subject_lists)
+        ]
+    else:
+        if executor == 'process':
+            workers = concurrent.futures.ProcessPoolExecutor(
+                n_jobs, initializer=_init_worker, initargs=(measure_list,)
+            )
+            func = _analyze_worker
+        elif executor == 'thread':
+            workers = concurrent.futures.ThreadPoolExecutor(n_jobs)
+            func = functools.partial(_analyze_lists, measure_list)
+        else:
+            raise ValueError(f'Invalid executor: {executor}')
+
+        # results are returned in subject order
+        with workers:
+            subj_results = list(workers.map(func, subjects, subject_lists))
+
+    stats = [
+        pd.concat([results[i] for results in subj_results], axis=0)
+        for i in range(len(measure_list))
+    ]
+    return stats
+
 
 class TransitionMeasure(object):
     """
@@ -28,9 +219,11 @@ class TransitionMeasure(object):
     test_key : str
         Data column with labels to use when testing for trial inclusion.
 
-    test : callable
+    test : callable or str
         Test of trial inclusion. Takes the previous and current test
         values and return True if the transition should be included.
+        May also be a declarative test (see
+        `psifr.transitions.get_test`).
 
     Attributes
     ----------
@@ -40,17 +233,39 @@ class TransitionMeasure(object):
     item_query : str
         Query string to indicate trials to include in the measure.
 
-    test : callable
+    test : callable or psifr.transitions.TransitionTest
         Test of trial inclusion.
+
+    code_names : tuple of str
+        Names of columns that are only compared for equality. If these
+        columns are categorical, they are split as integer codes (see
+        `psifr.fr.intern_items`).
     """
 
+    code_names = ()
+
     def __init__(self, items_key, label_key, item_query=None, test_key=None, test=None):
 
         self.keys = {'items': items_key, 'label': label_key, 'test': test_key}
         self.item_query = item_query
-        self.test = test
-
-    def split_lists(self, data, phase, item_query=None):
+        self.test = transitions.get_test(test)
+
+    def __getstate__(self):
+        # memory-mapped arrays (e.g., distances) are pickled by file
+        # name, so that worker processes share the mapped file
+        state = self.__dict__.copy()
+        for key, value in state.items():
+            if _is_mapped(value):
+                state[key] = _MappedArray(value)
+        return state
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            if isinstance(value, _MappedArray):
+                state[key] = value.load()
+        self.__dict__.update(state)
+
+    def split_lists(self, data, phase, item_query=None, as_batch=False):
         """
         Get relevant fields and split by list.
 
@@ -64,13 +279,29 @@ class TransitionMeasure(object):
 
         item_query : str, optional
             Query string to determine included trials.
+
+        as_batch : bool, optional
+            If true, return a `psifr.batch.ListBatch`, as used by
+            `analyze_subject`. Categorical columns in `code_names` are
+            split as integer codes.
+
+        Returns
+        -------
+        split : dict of lists or psifr.batch.ListBatch
+            Values of each field for each list.
         """
         names = list(self.keys.keys())
         keys = list(self.keys.values())
         for key in keys:
             if (key is not None) and (key not in data.columns):
                 raise ValueError(f'Required column {key} is missing.')
-        split = fr.split_lists(data, phase, keys, names, item_query, as_list=True)
+        if not as_batch:
+            split = fr.split_lists(data, phase, keys, names, item_query, as_list=True)
+            return split
+        codes = [self.keys[name] for name in self.code_names]
+        split = fr.split_lists(
+            data, phase, keys, names, item_query, as_batch=True, codes=codes
+        )
         return split
 
     @abc.abstractmethod
@@ -83,11 +314,11 @@ class TransitionMeasure(object):
         subject : int or str
             Identifier of the subject to analyze.
 
-        pool_lists : dict of lists of numpy.ndarray
+        pool_lists : psifr.batch.ListBatch
             Information about the item pool for each list, with keys
             for items, label, and test arrays.
 
-        recall_lists : dict of lists of numpy.ndarray
+        recall_lists : psifr.batch.ListBatch
             Information about the recall sequence for each list, with
             keys for items, label, and test arrays.
 
@@ -99,7 +330,7 @@ class TransitionMeasure(object):
         """
         pass
 
-    def analyze(self, data):
+    def analyze(self, data, n_jobs=None, executor='process'):
         """
         Analyze a free recall dataset with multiple subjects.
 
@@ -108,18 +339,22 @@ class TransitionMeasure(object):
         data : pandas.DataFrame
             Raw (not merged) free recall data.
 
+        n_jobs : int, optional
+            Number of subjects to analyze in parallel. If -1, all CPUs
+            are used. Default is to analyze subjects serially.
+
+        executor : {'process', 'thread'}, optional
+            Type of worker pool to use when analyzing in parallel. With
+            a process pool, the measure is sent to each worker once,
+            and each task only includes data for one subject. The
+            measure must be picklable if processes are not forked.
+
         Returns
         -------
         stat : pandas.DataFrame
             Statistics calculated for each subject.
         """
-        subj_results = []
-        for subject, subject_data in data.groupby('subject'):
-            pool_lists = self.split_lists(subject_data, 'study', self.item_query)
-            recall_lists = self.split_lists(subject_data, 'recall')
-            results = self.analyze_subject(subject, pool_lists, recall_lists)
-            subj_results.append(results)
-        stat = pd.concat(subj_results, axis=0)
+        stat = analyze_measures(data, [self], n_jobs=n_jobs, executor=executor)[0]
         return stat
 
 
@@ -265,6 +500,26 @@ class TransitionDistance(TransitionMeasure):
             centers = edges[:-1] + (np.diff(edges) / 2)
         self.centers = centers
         self.count_unique = count_unique
+        self._codes = None
+        self._n_analyzed = 0
+
+    def __getstate__(self):
+        # coded distances are not pickled; each process codes its own
+        state = super().__getstate__()
+        state['_codes'] = None
+        state['_n_analyzed'] = 0
+        return state
+
+    def _distance_codes(self):
+        """Get coded distances, if they are worth calculating."""
+        # when analyzing multiple subjects, code in-memory distances
+        # once, so that bins are counted using integer lookups
+        self._n_analyzed += 1
+        distances = self.distances
+        in_memory = isinstance(distances, np.ndarray) and not _is_mapped(distances)
+        if self._codes is None and in_memory and self._n_analyzed > 1:
+            self._codes = transitions.digitize_distances(distances, self.edges)
+        return self._codes
 
     def analyze_subject(self, subject, pool, recall):
 
@@ -279,6 +534,7 @@ class TransitionDistance(TransitionMeasure):
             recall['test'],
             self.test,
             count_unique=self.count_unique,
+            codes=self._distance_codes(),
         )
         crp = pd.DataFrame(
             {
@@ -397,6 +653,8 @@ class TransitionDistanceRankWindow(TransitionMeasure):
 class TransitionCategory(TransitionMeasure):
     """Measure conditional response probability by category transition."""
 
+    code_names = ('items', 'label')
+
     def __init__(self, category_key, item_query=None, test_key=None, test=None):
         super().__init__(
             'input', category_key, item_query=item_query, test_key=test_key, test=test
@@ -2,6 +2,8 @@
 
 import numpy as np
 
+from psifr import transitions
+
 
 def outputs_masker(
     pool_items,
@@ -68,40 +70,27 @@ def outputs_masker(
     3 [1 3] 3
     1 [1] 4
     """
-    pool_items = pool_items.copy()
-    pool_output = pool_output.copy()
-    if test is not None:
-        pool_test = pool_test.copy()
-
-    n = 0
-    output = 0
-    while n < len(recall_items):
-        # test if the current item is in the pool
-        if recall_items[n] not in pool_items:
-            n += 1
-            continue
-        output += 1
+    recall_slot = transitions._pool_slots(pool_items, recall_items)
+    recalled = np.nonzero(recall_slot >= 0)[0]
 
-        curr = recall_output[n]
-        poss = np.array(pool_output)
-
-        # remove the item from the pool
-        ind = pool_items.index(recall_items[n])
-        del pool_items[ind]
-        del pool_output[ind]
-        if test is not None:
-            del pool_test[ind]
+    # output index at which each pool item is removed from the pool
+    removed = np.full(len(pool_items), len(recall_items), dtype=int)
+    removed[recall_slot[recalled]] = recalled
 
+    pool_output = np.asarray(pool_output)
+    if test is not None:
+        pool_include = np.asarray(test(np.asarray(pool_test)), dtype=bool)
+    for output, n in enumerate(recalled, 1):
+        # possible items have not been recalled before this output
+        poss = removed >= n
         if test is not None:
             # test if this recall is included
             if not test(recall_test[n]):
-                n += 1
                 continue
 
             # get included possible items
-            poss = poss[test(np.array(pool_test))]
-        n += 1
-        yield curr, poss, output
+            poss &= pool_include
+        yield recall_output[n], pool_output[poss], output
 
 
 def count_outputs(
@@ -191,29 +180,35 @@ def count_outputs(
     count_actual = np.zeros((list_length, list_length), dtype=int)
     count_possible = np.zeros((list_length, list_length), dtype=int)
     for i, recall_items_list in enumerate(recall_items):
-        # set up masker to filter outputs
-        pool_test_list = None if pool_test is None else pool_test[i]
-        recall_test_list = None if recall_test is None else recall_test[i]
-        masker = outputs_masker(
-            pool_items[i],
-            recall_items_list,
-            pool_label[i],
-            recall_label[i],
-            pool_test_list,
-            recall_test_list,
-            test,
-        )
-
-        for curr, poss, op in masker:
-            curr = int(curr)
-            poss = poss.astype(int)
-
-            # for this step, calculate actual input position and
-            # possible input positions
-            count_actual[op - 1, curr - 1] += 1
-            if count_unique:
-                for j in poss:
-                    count_possible[op - 1, j - 1] += 1
-            else:
-                count_possible[op - 1, poss - 1] += 1
+        recall_slot = transitions._pool_slots(pool_items[i], recall_items_list)
+        recalled = np.nonzero(recall_slot >= 0)[0]
+        if len(recalled) == 0:
+            continue
+
+        # output index at which each pool item is removed from the pool
+        removed = np.full(len(pool_items[i]), len(recall_items_list), dtype=int)
+        removed[recall_slot[recalled]] = recalled
+
+        # [outputs x pool] mask of items available at each output
+        output = np.arange(len(recalled))
+        poss = removed[np.newaxis, :] >= recalled[:, np.newaxis]
+        if test is not None:
+            include = np.array(
+                [test(x) for x in np.asarray(recall_test[i])[recalled]], dtype=bool
+            )
+            output = output[include]
+            recalled = recalled[include]
+            poss = poss[include] & np.asarray(test(np.asarray(pool_test[i])), dtype=bool)
+
+        # for each output, calculate actual input position and possible
+        # input positions
+        curr = np.asarray(recall_label[i])[recalled].astype(int)
+        count_actual[output, curr - 1] += 1
+        poss_output, poss_item = np.nonzero(poss)
+        poss_label = np.asarray(pool_label[i])[poss_item].astype(int)
+        if count_unique:
+            key = np.unique(poss_output * list_length + poss_label - 1)
+            poss_output, poss_label = np.divmod(key, list_length)
+            poss_label += 1
+        np.add.at(count_possible, (output[poss_output], poss_label - 1), 1)
     return count_actual, count_possible
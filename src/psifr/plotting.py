@@ -0,0 +1,241 @@
+"""Plot results of free recall analyses."""
+
+import seaborn as sns
+
+
+def plot_spc(recall, **facet_kws):
+    """
+    Plot a serial position curve.
+
+    Additional arguments are passed to seaborn.relplot.
+
+    Parameters
+    ----------
+    recall : pandas.DataFrame
+        Results from calling `spc`.
+    """
+    y = 'recall' if 'recall' in recall else 'prob'
+    g = sns.FacetGrid(dropna=False, **facet_kws, data=recall.reset_index())
+    g.map_dataframe(sns.lineplot, x='input', y=y)
+    g.set_xlabels('Serial position')
+    g.set_ylabels('Recall probability')
+    g.set(ylim=(0, 1))
+    return g
+
+
+def plot_lag_crp(recall, max_lag=5, lag_key='lag', split=True, **facet_kws):
+    """
+    Plot conditional response probability by lag.
+
+    Additional arguments are passed to seaborn.FacetGrid.
+
+    Parameters
+    ----------
+    recall : pandas.DataFrame
+        Results from calling `lag_crp`.
+
+    max_lag : int, optional
+        Maximum absolute lag to plot.
+
+    lag_key : str, optional
+        Name of the column indicating lag.
+
+    split : bool, optional
+        If true, will plot as two separate lines with a gap at lag 0.
+    """
+    if split:
+        filt_neg = f'{-max_lag} <= {lag_key} < 0'
+        filt_pos = f'0 < {lag_key} <= {max_lag}'
+        g = sns.FacetGrid(dropna=True, **facet_kws, data=recall.reset_index())
+        g.map_dataframe(
+            lambda data, **kws: sns.lineplot(
+                data=data.query(filt_neg), x=lag_key, y='prob', **kws
+            )
+        )
+        g.map_dataframe(
+            lambda data, **kws: sns.lineplot(
+                data=data.query(filt_pos), x=lag_key, y='prob', **kws
+            )
+        )
+    else:
+        data = recall.query(f'{-max_lag} <= {lag_key} <= {max_lag}')
+        g = sns.FacetGrid(dropna=False, **facet_kws, data=data.reset_index())
+        g.map_dataframe(sns.lineplot, x=lag_key, y='prob')
+
+    g.set_xlabels('Lag')
+    g.set_ylabels('CRP')
+    g.set(ylim=(0, 1))
+    return g
+
+
+def plot_distance_crp(crp, min_samples=None, **facet_kws):
+    """
+    Plot response probability by distance bin.
+
+    Parameters
+    ----------
+    crp : pandas.DataFrame
+        Results from `fr.distance_crp`.
+
+    min_samples : int
+        Minimum number of samples a bin must have per subject to
+        include in the plot.
+
+    **facet_kws
+        Additional inputs to pass to `seaborn.relplot`.
+    """
+    crp = crp.reset_index()
+    if min_samples is not None:
+        min_n = crp.groupby('center')['possible'].min()
+        include = min_n.loc[min_n >= min_samples].index.to_numpy()
+        crp = crp.loc[crp['center'].isin(include)]
+    g = sns.FacetGrid(dropna=False, **facet_kws, data=crp.reset_index())
+    g.map_dataframe(sns.lineplot, x='center', y='prob')
+    g.set_xlabels('Distance')
+    g.set_ylabels('CRP')
+    g.set(ylim=(0, 1))
+    return g
+
+
+def plot_swarm_error(
+    data, x=None, y=None, swarm_color=None, swarm_size=5, point_color='k', **facet_kws
+):
+    """
+    Plot points as a swarm plus mean with error bars.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        DataFrame with statistics to plot.
+
+    x : str
+        Name of variable to plot on x-axis.
+
+    y : str
+        Name of variable to plot on y-axis.
+
+    swarm_color
+        Color for swarm plot points. May use any specification
+        supported by seaborn.
+
+    swarm_size : float
+        Size of swarm plot points.
+
+    point_color
+        Color for the point plot (error bars).
+
+    facet_kws
+        Additional keywords for the FacetGrid.
+    """
+    g = sns.FacetGrid(data=data.reset_index(), dropna=False, **facet_kws)
+    g.map_dataframe(
+        sns.swarmplot, x=x, y=y, color=swarm_color, size=swarm_size, zorder=1
+    )
+    g.map_dataframe(
+        sns.pointplot, x=x, y=y, color=point_color, join=False, capsize=0.5
+    )
+    return g
+
+
+def plot_raster(
+    df,
+    hue='input',
+    palette=None,
+    marker='s',
+    intrusion_color=None,
+    orientation='horizontal',
+    length=6,
+    aspect=None,
+    legend='auto',
+    **facet_kws,
+):
+    """
+    Plot recalls in a raster plot.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Scored free recall data.
+
+    hue : str or None, optional
+        Column to use to set marker color.
+
+    palette : optional
+        Palette specification supported by Seaborn.
+
+    marker : str, optional
+         Marker code supported by Seaborn.
+
+    intrusion_color : optional
+        Color of intrusions.
+
+    orientation : {'horizontal', 'vertical'}, optional
+        Whether lists should be stacked horizontally or vertically in
+        the plot.
+
+    length : float, optional
+        Size of the plot dimension along which list varies.
+
+    aspect : float, optional
+        Aspect ratio of plot for lists over items.
+
+    legend : str, optional
+        Legend setting. See seaborn.scatterplot for details.
+
+    facet_kws : optional
+        Additional key words to pass to seaborn.FacetGrid.
+    """
+    n_item = int(df['input'].max())
+    n_list = int(df['list'].max())
+    if palette is None and hue == 'input':
+        palette = 'viridis'
+
+    if intrusion_color is None:
+        intrusion_color = (0.8, 0.1, 0.3)
+
+    list_lim = (0, n_list + 1)
+    item_lim = (0, n_item + 1)
+    if orientation == 'horizontal':
+        x_var, y_var = 'list', 'output'
+        x_lim, y_lim = list_lim, item_lim
+        x_label, y_label = 'List', 'Output position'
+        def_aspect = n_list / n_item
+    else:
+        x_var, y_var = 'output', 'list'
+        x_lim, y_lim = item_lim, list_lim[::-1]
+        x_label, y_label = 'Output position', 'List'
+        def_aspect = n_item / n_list
+
+    if aspect is None:
+        aspect = def_aspect
+
+    if orientation == 'horizontal':
+        height = length / aspect
+    else:
+        height = length
+
+    g = sns.FacetGrid(
+        data=df.reset_index(), dropna=False, aspect=aspect, height=height, **facet_kws
+    )
+    g.map_dataframe(
+        sns.scatterplot,
+        x=x_var,
+        y=y_var,
+        marker=marker,
+        hue=hue,
+        palette=palette,
+        legend=legend,
+    )
+    g.map_dataframe(
+        lambda data, color=None, label=None: sns.scatterplot(
+            data=data.query('intrusion'),
+            x=x_var,
+            y=y_var,
+            color=intrusion_color,
+            marker=marker,
+        )
+    )
+    g.set_xlabels(x_label)
+    g.set_ylabels(y_label)
+    g.set(xlim=x_lim, ylim=y_lim)
+    return g
@@ -0,0 +1,240 @@
+"""Read and analyze large free recall datasets one subject at a time."""
+
+import numpy as np
+import pandas as pd
+
+from psifr import fr
+from psifr import measures
+
+
+def _group_subjects(subjects, subjects_per_chunk):
+    """Split unique subjects into groups."""
+    if subjects_per_chunk < 1:
+        raise ValueError('subjects_per_chunk must be at least 1.')
+    return [
+        subjects[i : i + subjects_per_chunk]
+        for i in range(0, len(subjects), subjects_per_chunk)
+    ]
+
+
+def read_csv(
+    path, subjects_per_chunk=1, chunksize=100000, subject_key='subject', **kwargs
+):
+    """
+    Read free recall data from a CSV file, one subject at a time.
+
+    Rows are read in blocks, and data for each subject are returned
+    once all of their rows have been read, so that only a few subjects
+    are in memory at once. Rows for each subject must be contiguous in
+    the file (e.g., sorted by subject).
+
+    Parameters
+    ----------
+    path : str
+        Path to a CSV file.
+
+    subjects_per_chunk : int, optional
+        Number of subjects to include in each chunk.
+
+    chunksize : int, optional
+        Number of rows to read from the file at a time.
+
+    subject_key : str, optional
+        Column with subject identifiers.
+
+    **kwargs
+        Options for `pandas.read_csv`.
+
+    Yields
+    ------
+    chunk : pandas.DataFrame
+        Data for a group of subjects.
+
+    Raises
+    ------
+    ValueError
+        If rows for a subject are not contiguous.
+
+    See Also
+    --------
+    analyze_chunks : Analyze data one chunk at a time.
+
+    Examples
+    --------
+    >>> import os
+    >>> import tempfile
+    >>> from psifr import fr
+    >>> from psifr import stream
+    >>> raw = fr.table_from_lists(
+    ...     [1, 1, 2], [['a', 'b'], ['c', 'd'], ['e', 'f']], [['b'], ['d'], ['e']]
+    ... )
+    >>> path = os.path.join(tempfile.mkdtemp(), 'raw.csv')
+    >>> raw.to_csv(path, index=False)
+    >>> for chunk in stream.read_csv(path, chunksize=4):
+    ...     print(chunk['subject'].unique(), len(chunk))
+    [1] 6
+    [2] 3
+    """
+    if subjects_per_chunk < 1:
+        raise ValueError('subjects_per_chunk must be at least 1.')
+    finished = set()
+    pending = None
+    reader = pd.read_csv(path, chunksize=chunksize, **kwargs)
+    for block in reader:
+        if block.empty:
+            continue
+        if pending is not None:
+            block = pd.concat([pending, block], ignore_index=True)
+        subjects = block[subject_key].to_numpy()
+        start = np.nonzero(subjects[1:] != subjects[:-1])[0] + 1
+        start = np.hstack([0, start])
+        block_subjects = subjects[start].tolist()
+        repeated = len(set(block_subjects)) < len(block_subjects)
+        if repeated or not finished.isdisjoint(block_subjects):
+            raise ValueError('Rows for each subject must be contiguous.')
+
+        # the last subject may continue in the next block
+        n_complete = len(start) - 1
+        n_yield = n_complete - n_complete % subjects_per_chunk
+        finished.update(block_subjects[:n_yield])
+        for i in range(0, n_yield, subjects_per_chunk):
+            chunk = block.iloc[start[i] : start[i + subjects_per_chunk]]
+            yield chunk.reset_index(drop=True)
+        pending = block.iloc[start[n_yield] :]
+
+    if pending is not None and len(pending) > 0:
+        yield pending.reset_index(drop=True)
+
+
+def read_parquet(path, subjects_per_chunk=1, subject_key='subject', columns=None):
+    """
+    Read free recall data from a Parquet dataset, one subject at a time.
+
+    Requires pyarrow. The dataset may be a single file or a directory
+    of files, optionally partitioned by subject (e.g., with directories
+    named :code:`subject=1`). The subject column is read first, and
+    then the rows for each group of subjects are read using a filter,
+    so that only those rows are loaded into memory.
+
+    Parameters
+    ----------
+    path : str
+        Path to a Parquet file or directory.
+
+    subjects_per_chunk : int, optional
+        Number of subjects to include in each chunk.
+
+    subject_key : str, optional
+        Column with subject identifiers.
+
+    columns : list of str, optional
+        Columns to read. Default is to read all columns.
+
+    Yields
+    ------
+    chunk : pandas.DataFrame
+        Data for a group of subjects, in sorted subject order.
+
+    See Also
+    --------
+    analyze_chunks : Analyze data one chunk at a time.
+    """
+    try:
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+    except ImportError as err:
+        raise ImportError('Reading Parquet data requires pyarrow.') from err
+
+    dataset = ds.dataset(path, format='parquet', partitioning='hive')
+    subject_table = dataset.to_table(columns=[subject_key])
+    subjects = pc.unique(subject_table.column(subject_key)).to_pylist()
+    subjects = sorted(subject for subject in subjects if subject is not None)
+    for group in _group_subjects(subjects, subjects_per_chunk):
+        table = dataset.to_table(
+            columns=columns, filter=pc.field(subject_key).isin(group)
+        )
+        chunk = table.to_pandas()
+        for key in chunk.columns:
+            # partition columns are read as categorical
+            if isinstance(chunk[key].dtype, pd.CategoricalDtype):
+                chunk[key] = chunk[key].astype(chunk[key].cat.categories.dtype)
+        yield chunk
+
+
+def _sort_subjects(stat):
+    """Sort statistics by subject, keeping the order within subject."""
+    subjects = stat.index.get_level_values('subject')
+    order = np.argsort(pd.factorize(subjects, sort=True)[0], kind='stable')
+    return stat.iloc[order]
+
+
+def analyze_chunks(chunks, measure_list, merge=True, **kwargs):
+    """
+    Analyze free recall data one chunk of subjects at a time.
+
+    Each chunk is scored and analyzed separately, and then statistics
+    for all chunks are combined. Only statistics are kept between
+    chunks, so peak memory use depends on the size of the largest
+    chunk. Subjects should not be split between chunks.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        Free recall data for each group of subjects (e.g., from
+        `read_csv` or `read_parquet`).
+
+    measure_list : list of psifr.measures.TransitionMeasure
+        Measures to calculate.
+
+    merge : bool, optional
+        If true, raw data in each chunk are scored using
+        `psifr.fr.merge_free_recall`. If false, chunks must contain
+        merged data.
+
+    **kwargs
+        Options for `psifr.fr.merge_free_recall`.
+
+    Returns
+    -------
+    stats : list of pandas.DataFrame
+        Statistics calculated for each subject, for each measure.
+
+    Raises
+    ------
+    ValueError
+        If there are no data to analyze.
+
+    Examples
+    --------
+    >>> from psifr import fr
+    >>> from psifr import measures
+    >>> from psifr import stream
+    >>> raw = fr.sample_data('Morton2013')
+    >>> chunks = (raw.query(f'subject == {s}') for s in raw['subject'].unique())
+    >>> category = measures.TransitionCategory('category')
+    >>> (cat_crp,) = stream.analyze_chunks(
+    ...     chunks, [category], study_keys=['category']
+    ... )
+    >>> cat_crp.head()
+                 prob  actual  possible
+    subject                            
+    1        0.801147     419       523
+    2        0.733456     399       544
+    3        0.763158     377       494
+    4        0.814882     449       551
+    5        0.877273     579       660
+    """
+    results = [[] for measure in measure_list]
+    for chunk in chunks:
+        if merge:
+            chunk = fr.merge_free_recall(chunk, **kwargs)
+        if chunk.empty:
+            continue
+        stats = measures.analyze_measures(chunk, measure_list)
+        for result, stat in zip(results, stats):
+            result.append(stat)
+
+    if measure_list and not results[0]:
+        raise ValueError('No data to analyze; all chunks are empty.')
+    stats = [_sort_subjects(pd.concat(result, axis=0)) for result in results]
+    return stats
@@ -1,10 +1,13 @@
 """Module to analyze transitions during free recall."""
 
+import abc
 import itertools
+import operator
 import numpy as np
-from scipy import stats
 import pandas as pd
 
+from psifr import batch
+
 
 def percentile_rank(actual, possible):
     """
@@ -31,6 +34,9 @@ def percentile_rank(actual, possible):
     >>> transitions.percentile_rank(actual, possible)
     1.0
     """
+    # scipy is slow to import, so only load it when needed
+    from scipy import stats
+
     possible_rank = stats.rankdata(possible)
     actual_rank = possible_rank[actual == np.asarray(possible)]
     possible_count = np.count_nonzero(~np.isnan(possible))
@@ -40,6 +46,726 @@ def percentile_rank(actual, possible):
     return rank[0]
 
 
+def percentile_rank_batch(actual, possible, offsets=None):
+    """
+    Get percentile ranks of multiple scores compared to possible scores.
+
+    Ranks are the same as calculated by `percentile_rank` for each
+    score, but are calculated for all scores at once.
+
+    Parameters
+    ----------
+    actual : numpy.ndarray
+        Scores to be ranked.
+
+    possible : numpy.ndarray or numpy.ma.MaskedArray
+        Possible scores to be compared to. If `offsets` is specified,
+        possible scores for all actual scores, concatenated. Otherwise,
+        a [scores x possible] matrix; if a masked array, masked values
+        are excluded.
+
+    offsets : numpy.ndarray, optional
+        Start index of the possible scores for each actual score, with
+        the total number of possible scores as the last element.
+
+    Returns
+    -------
+    rank : numpy.ndarray
+        Rank of each score, scaled to range from 0 (low score) to 1
+        (high score). Ranks are NaN if any possible score is NaN, if
+        there is only one possible score, or if the score is not one of
+        the possible scores.
+
+    See Also
+    --------
+    percentile_rank : Get percentile rank of one score.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from psifr import transitions
+    >>> actual = np.array([3, 2, 1])
+    >>> possible = np.array([1, 2, 2, 2, 3, 1, 2, 2, 1])
+    >>> offsets = np.array([0, 5, 8, 9])
+    >>> transitions.percentile_rank_batch(actual, possible, offsets)
+    array([1.  , 0.75,  nan])
+    """
+    actual = np.asarray(actual, dtype=float)
+    if offsets is None:
+        possible = np.ma.asarray(possible)
+        include = ~np.ma.getmaskarray(possible)
+        n_possible = np.count_nonzero(include, axis=1)
+        possible = np.asarray(possible.data, dtype=float)[include]
+    else:
+        n_possible = np.diff(offsets)
+        possible = np.asarray(possible, dtype=float)[offsets[0] : offsets[-1]]
+
+    # count possible scores that are missing, less than, or equal to
+    # each actual score
+    n = len(actual)
+    score = np.repeat(np.arange(n), n_possible)
+    n_nan = np.bincount(score, weights=np.isnan(possible), minlength=n)
+    n_less = np.bincount(score, weights=possible < actual[score], minlength=n)
+    n_equal = np.bincount(score, weights=possible == actual[score], minlength=n)
+
+    # tied scores are assigned the average rank
+    actual_rank = n_less + (n_equal + 1) / 2
+    possible_count = n_possible - n_nan
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rank = (actual_rank - 1) / (possible_count - 1)
+    rank[(n_nan > 0) | (possible_count == 1) | (n_equal == 0)] = np.nan
+    return rank
+
+
+class TransitionTest(abc.ABC):
+    """
+    Declarative test of transition inclusion.
+
+    Tests are called as test(prev, curr), like callable tests, but are
+    evaluated elementwise, so that all transitions can be tested at
+    once. Tests may be combined using the &, |, and ~ operators, with
+    other declarative tests or with callable tests.
+    """
+
+    def __call__(self, prev, curr):
+        return self.evaluate(np.asarray(prev), np.asarray(curr))
+
+    def __and__(self, other):
+        return And(self, other)
+
+    def __or__(self, other):
+        return Or(self, other)
+
+    def __rand__(self, other):
+        return And(other, self)
+
+    def __ror__(self, other):
+        return Or(other, self)
+
+    def __invert__(self):
+        return Not(self)
+
+    @abc.abstractmethod
+    def evaluate(self, prev, curr):
+        """
+        Test transitions.
+
+        Parameters
+        ----------
+        prev : numpy.ndarray
+            Test values for the "from" item of each transition.
+
+        curr : numpy.ndarray
+            Test values for the "to" item of each transition.
+
+        Returns
+        -------
+        include : numpy.ndarray
+            True for transitions that should be included.
+        """
+        pass
+
+
+class Compare(TransitionTest):
+    """
+    Compare test values of the previous and current items.
+
+    Parameters
+    ----------
+    op : {'==', '!=', '<', '<=', '>', '>='}
+        Comparison operator, applied as prev <op> curr.
+
+    Examples
+    --------
+    >>> from psifr import transitions
+    >>> test = transitions.Compare('<')
+    >>> test([1, 2, 3], [3, 2, 1])
+    array([ True, False, False])
+    """
+
+    _operators = {
+        '==': operator.eq,
+        '!=': operator.ne,
+        '<': operator.lt,
+        '<=': operator.le,
+        '>': operator.gt,
+        '>=': operator.ge,
+    }
+
+    def __init__(self, op):
+        if op not in self._operators:
+            raise ValueError(f'Invalid comparison operator: {op}')
+        self.op = op
+
+    def __repr__(self):
+        return f'Compare({self.op!r})'
+
+    def evaluate(self, prev, curr):
+        return self._operators[self.op](prev, curr)
+
+
+class Same(Compare):
+    """
+    Include transitions between items with the same test value.
+
+    Examples
+    --------
+    >>> from psifr import transitions
+    >>> test = transitions.Same()
+    >>> test(['a', 'a', 'b'], ['a', 'b', 'b'])
+    array([ True, False,  True])
+    """
+
+    def __init__(self):
+        super().__init__('==')
+
+    def __repr__(self):
+        return 'Same()'
+
+
+class Different(Compare):
+    """
+    Include transitions between items with different test values.
+
+    Examples
+    --------
+    >>> from psifr import transitions
+    >>> test = transitions.Different()
+    >>> test(['a', 'a', 'b'], ['a', 'b', 'b'])
+    array([False,  True, False])
+    """
+
+    def __init__(self):
+        super().__init__('!=')
+
+    def __repr__(self):
+        return 'Different()'
+
+
+class InSet(TransitionTest):
+    """
+    Include transitions based on membership in a set of test values.
+
+    Parameters
+    ----------
+    values : array_like
+        Test values to include.
+
+    which : {'both', 'either', 'prev', 'curr'}, optional
+        Items that must have a test value in the set.
+
+    Examples
+    --------
+    >>> from psifr import transitions
+    >>> test = transitions.InSet(['a', 'b'], which='curr')
+    >>> test(['a', 'c', 'c'], ['c', 'b', 'a'])
+    array([False,  True,  True])
+    """
+
+    def __init__(self, values, which='both'):
+        if which not in ['both', 'either', 'prev', 'curr']:
+            raise ValueError(f'Invalid items to test: {which}')
+        self.values = np.asarray(values)
+        self.which = which
+
+    def __repr__(self):
+        return f'InSet({self.values.tolist()!r}, which={self.which!r})'
+
+    def evaluate(self, prev, curr):
+        if self.which == 'prev':
+            return np.isin(prev, self.values)
+        elif self.which == 'curr':
+            return np.isin(curr, self.values)
+        prev_in = np.isin(prev, self.values)
+        curr_in = np.isin(curr, self.values)
+        if self.which == 'both':
+            return prev_in & curr_in
+        return prev_in | curr_in
+
+
+class _CallableTest(TransitionTest):
+    """Callable test, applied separately to each transition."""
+
+    def __init__(self, test):
+        self.test = test
+
+    def __repr__(self):
+        return repr(self.test)
+
+    def evaluate(self, prev, curr):
+        prev, curr = np.broadcast_arrays(prev, curr)
+        include = [self.test(p, c) for p, c in zip(prev.ravel(), curr.ravel())]
+        return np.array(include, dtype=bool).reshape(prev.shape)
+
+
+def _transition_test(test):
+    """Get a test that may be combined with declarative tests."""
+    test = get_test(test)
+    if test is None:
+        raise TypeError('Tests to combine must not be None.')
+    if not isinstance(test, TransitionTest):
+        test = _CallableTest(test)
+    return test
+
+
+class And(TransitionTest):
+    """Include transitions that pass all of a set of tests."""
+
+    def __init__(self, *tests):
+        self.tests = [_transition_test(test) for test in tests]
+
+    def __repr__(self):
+        return f'And({", ".join(repr(test) for test in self.tests)})'
+
+    def evaluate(self, prev, curr):
+        include = self.tests[0].evaluate(prev, curr)
+        for test in self.tests[1:]:
+            include = include & test.evaluate(prev, curr)
+        return include
+
+
+class Or(TransitionTest):
+    """Include transitions that pass any of a set of tests."""
+
+    def __init__(self, *tests):
+        self.tests = [_transition_test(test) for test in tests]
+
+    def __repr__(self):
+        return f'Or({", ".join(repr(test) for test in self.tests)})'
+
+    def evaluate(self, prev, curr):
+        include = self.tests[0].evaluate(prev, curr)
+        for test in self.tests[1:]:
+            include = include | test.evaluate(prev, curr)
+        return include
+
+
+class Not(TransitionTest):
+    """Include transitions that do not pass a test."""
+
+    def __init__(self, test):
+        self.test = _transition_test(test)
+
+    def __repr__(self):
+        return f'Not({self.test!r})'
+
+    def evaluate(self, prev, curr):
+        return ~self.test.evaluate(prev, curr)
+
+
+# shared instances, so that measures using the same named test can
+# share transitions
+_named_tests = {
+    'same': Same(),
+    'different': Different(),
+    **{op: Compare(op) for op in Compare._operators},
+}
+
+
+def get_test(test):
+    """
+    Get a transition test from a specification.
+
+    Parameters
+    ----------
+    test : str, callable, or TransitionTest
+        Test specification. May be a name ('same' or 'different'), a
+        comparison operator ('==', '!=', '<', '<=', '>', '>=') applied
+        as prev <op> curr, a TransitionTest, or a callable that takes
+        previous and current test values and returns True if a
+        transition should be included. Named and declarative tests are
+        evaluated for all transitions at once; other callables are
+        called separately for each transition.
+
+    Returns
+    -------
+    test : callable or TransitionTest
+        Test of transition inclusion. None if `test` is None.
+
+    Examples
+    --------
+    >>> from psifr import transitions
+    >>> transitions.get_test('same')
+    Same()
+    >>> transitions.get_test('>=')
+    Compare('>=')
+    >>> transitions.get_test('same') & transitions.InSet([1, 2])
+    And(Same(), InSet([1, 2], which='both'))
+    """
+    if test is None or isinstance(test, TransitionTest):
+        return test
+    if isinstance(test, str):
+        if test not in _named_tests:
+            raise ValueError(f'Invalid test: {test}')
+        return _named_tests[test]
+    if not callable(test):
+        raise ValueError(f'Invalid test: {test}')
+    return test
+
+
+def _pool_slots(pool_items, recall_items):
+    """Match each recall to an available slot in the pool (-1 if none)."""
+    slots = {}
+    for i, item in enumerate(pool_items):
+        slots.setdefault(item, []).append(i)
+
+    recall_slot = np.full(len(recall_items), -1, dtype=int)
+    for n, item in enumerate(recall_items):
+        if pd.isnull(item):
+            continue
+        item_slots = slots.get(item)
+        if item_slots:
+            # repeated recalls of the same item take subsequent slots
+            recall_slot[n] = item_slots.pop(0)
+    return recall_slot
+
+
+def transitions_index(
+    pool_items, recall_items, pool_test=None, recall_test=None, test=None
+):
+    """
+    Get indices of included transitions and a mask of possible items.
+
+    Included transitions are determined using the same rules as
+    `transitions_masker`. Rather than removing items from a copy of the
+    pool, each recall is matched to a position in the pool, and pool
+    availability is tracked as a boolean mask over pool positions.
+
+    Parameters
+    ----------
+    pool_items : list or numpy.ndarray
+        Items available for recall. Order does not matter. May contain
+        repeated values. Item identifiers must be unique within pool.
+
+    recall_items : list or numpy.ndarray
+        Recalled items in output position order.
+
+    pool_test : list or numpy.ndarray, optional
+        Test values for items available for recall. Must be the same
+        order as pool.
+
+    recall_test : list or numpy.ndarray, optional
+        Test values for items in output position order.
+
+    test : callable or str, optional
+        Used to test whether individual transitions should be included,
+        based on test values. See `get_test` for declarative tests.
+
+            test(prev, curr) - test for included transition
+
+            test(prev, poss) - test for included possible transition
+
+    Returns
+    -------
+    output : numpy.ndarray
+        Output position of each included transition. The first
+        transition is 1.
+
+    prev : numpy.ndarray
+        Index of the "from" item of each transition in the recall
+        sequence.
+
+    curr : numpy.ndarray
+        Index of the "to" item of each transition in the recall
+        sequence.
+
+    poss : numpy.ndarray
+        [transitions x pool] boolean array indicating the valid
+        possible "to" items for each transition.
+
+    See Also
+    --------
+    transitions_masker : Iterate over transitions with masking.
+
+    Examples
+    --------
+    >>> from psifr import transitions
+    >>> pool = [1, 2, 3, 4, 5, 6]
+    >>> recs = [6, 2, 3, 6, 1, 4]
+    >>> output, prev, curr, poss = transitions.transitions_index(pool, recs)
+    >>> output
+    array([1, 2, 5])
+    >>> prev
+    array([0, 1, 4])
+    >>> curr
+    array([1, 2, 5])
+    >>> poss.astype(int)
+    array([[1, 1, 1, 1, 1, 0],
+           [1, 0, 1, 1, 1, 0],
+           [0, 0, 0, 1, 1, 0]])
+    """
+    test = get_test(test)
+    recall_slot = _pool_slots(pool_items, recall_items)
+    recalled = recall_slot >= 0
+
+    # output index at which each pool item is removed from the pool
+    removed = np.full(len(pool_items), len(recall_items), dtype=int)
+    removed[recall_slot[recalled]] = np.nonzero(recalled)[0]
+
+    # a transition is possible if both items are in the pool at that point
+    prev = np.nonzero(recalled[:-1] & recalled[1:])[0]
+    curr = prev + 1
+    poss = removed[np.newaxis, :] > prev[:, np.newaxis]
+
+    if isinstance(test, TransitionTest) and len(prev) > 0:
+        # test all actual and possible transitions at once
+        recall_test = np.asarray(recall_test)
+        prev_test = recall_test[prev]
+        include = np.asarray(test(prev_test, recall_test[curr]), dtype=bool)
+        poss &= test(prev_test[:, np.newaxis], np.asarray(pool_test)[np.newaxis, :])
+        prev = prev[include]
+        curr = curr[include]
+        poss = poss[include]
+    elif test is not None and len(prev) > 0:
+        include = np.ones(len(prev), dtype=bool)
+        pool_test = np.asarray(pool_test)
+        for i, n in enumerate(prev):
+            # test if this transition is included
+            if not test(recall_test[n], recall_test[n + 1]):
+                include[i] = False
+                continue
+
+            # get included possible items
+            poss[i] &= test(recall_test[n], pool_test)
+        prev = prev[include]
+        curr = curr[include]
+        poss = poss[include]
+    return prev + 1, prev, curr, poss
+
+
+def pack_lists(lists):
+    """
+    Pack list-format data into a flat array with list offsets.
+
+    Parameters
+    ----------
+    lists : list of array_like or psifr.batch.ListColumn
+        Values for each list. If a ListColumn, the packed values are
+        returned without copying.
+
+    Returns
+    -------
+    values : numpy.ndarray
+        Values for all lists, concatenated.
+
+    offsets : numpy.ndarray
+        Start index of each list in `values`, with the total number of
+        values as the last element.
+
+    Examples
+    --------
+    >>> from psifr import transitions
+    >>> values, offsets = transitions.pack_lists([[1, 2, 3], [4, 5]])
+    >>> values
+    array([1, 2, 3, 4, 5])
+    >>> offsets
+    array([0, 3, 5])
+    """
+    if isinstance(lists, batch.ListColumn):
+        return lists.packed()
+
+    offsets = np.zeros(len(lists) + 1, dtype=int)
+    offsets[1:] = np.cumsum([len(x) for x in lists])
+    if lists and all(isinstance(x, np.ndarray) for x in lists):
+        values = np.concatenate(lists)
+    else:
+        # let pandas infer a type, so that missing values are preserved
+        # in lists of strings
+        values = pd.Series(list(itertools.chain.from_iterable(lists))).to_numpy()
+    return values, offsets
+
+
+def _occurrence(keys):
+    """Number of previous occurrences of each key."""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    ind = np.arange(len(keys))
+    is_start = np.ones(len(keys), dtype=bool)
+    is_start[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    group_start = np.maximum.accumulate(np.where(is_start, ind, 0))
+    count = np.empty(len(keys), dtype=int)
+    count[order] = ind - group_start
+    return count
+
+
+def _batch_slots(pool_values, pool_list, recall_values, recall_list):
+    """Match each recall to an available slot in the pool of its list."""
+    pool_codes, uniques = pd.factorize(pool_values)
+    recall_codes = pd.Index(uniques).get_indexer(recall_values)
+    n_code = len(uniques)
+
+    # item keys are unique to each list; repeated items in a pool are
+    # matched to repeated recalls in order
+    pool_keys = np.where(pool_codes >= 0, pool_list * n_code + pool_codes, -1)
+    pool_order = np.argsort(pool_keys, kind='stable')
+    sorted_keys = pool_keys[pool_order]
+
+    recall_slot = np.full(len(recall_values), -1, dtype=int)
+    valid = np.nonzero(recall_codes >= 0)[0]
+    recall_keys = recall_list[valid] * n_code + recall_codes[valid]
+    count = _occurrence(recall_keys)
+    start = np.searchsorted(sorted_keys, recall_keys, side='left')
+    finish = np.searchsorted(sorted_keys, recall_keys, side='right')
+    available = count < (finish - start)
+    recall_slot[valid[available]] = pool_order[start[available] + count[available]]
+    return recall_slot
+
+
+def transitions_batch(
+    pool_items, recall_items, pool_test=None, recall_test=None, test=None
+):
+    """
+    Get included transitions for a set of lists as flat index arrays.
+
+    Included transitions are determined using the same rules as
+    `transitions_masker`, but all lists are processed at once. Indices
+    refer to positions in the packed (see `pack_lists`) pool and recall
+    arrays, so that values for actual and possible transitions can be
+    gathered for all lists without iterating over transitions.
+
+    Parameters
+    ----------
+    pool_items : list of list
+        Items available for recall in each list. Item identifiers must
+        be unique within each pool.
+
+    recall_items : list of list
+        Recalled items in output position order for each list.
+
+    pool_test : list of list, optional
+        Test values for items available for recall. Must be the same
+        order as pool.
+
+    recall_test : list of list, optional
+        Test values for items in output position order.
+
+    test : callable or str, optional
+        Used to test whether individual transitions should be included,
+        based on test values. See `get_test` for declarative tests.
+
+            test(prev, curr) - test for included transition
+
+            test(prev, poss) - test for included possible transition
+
+    Returns
+    -------
+    prev : numpy.ndarray
+        Index of the "from" item of each transition in the packed
+        recall sequences.
+
+    curr : numpy.ndarray
+        Index of the "to" item of each transition in the packed recall
+        sequences.
+
+    poss_trans : numpy.ndarray
+        Index of the transition that each possible transition belongs
+        to.
+
+    poss_item : numpy.ndarray
+        Index of the "to" item of each possible transition in the
+        packed pool.
+
+    See Also
+    --------
+    transitions_index : Get included transitions for one list.
+    pack_lists : Pack list-format data into a flat array.
+
+    Examples
+    --------
+    >>> from psifr import transitions
+    >>> pool = [[1, 2, 3], [1, 2, 3]]
+    >>> recs = [[3, 1, 2], [2, 3]]
+    >>> prev, curr, poss_trans, poss_item = transitions.transitions_batch(pool, recs)
+    >>> prev
+    array([0, 1, 3])
+    >>> curr
+    array([1, 2, 4])
+    >>> poss_trans
+    array([0, 0, 1, 2, 2])
+    >>> poss_item
+    array([0, 1, 1, 3, 5])
+    """
+    test = get_test(test)
+    pool_values, pool_offsets = pack_lists(pool_items)
+    recall_values, recall_offsets = pack_lists(recall_items)
+    n_list = len(recall_offsets) - 1
+    pool_len = np.diff(pool_offsets)
+    pool_list = np.repeat(np.arange(n_list), pool_len)
+    recall_list = np.repeat(np.arange(n_list), np.diff(recall_offsets))
+
+    # output index at which each pool item is removed from the pool
+    recall_slot = _batch_slots(pool_values, pool_list, recall_values, recall_list)
+    recalled = recall_slot >= 0
+    removed = np.full(len(pool_values), len(recall_values), dtype=int)
+    removed[recall_slot[recalled]] = np.nonzero(recalled)[0]
+
+    # a transition is possible if both items are in the pool at that point
+    same_list = recall_list[:-1] == recall_list[1:]
+    prev = np.nonzero(recalled[:-1] & recalled[1:] & same_list)[0]
+    curr = prev + 1
+
+    # pair each transition with every item in the pool for that list
+    trans_list = recall_list[prev]
+    n_poss = pool_len[trans_list]
+    block_start = np.cumsum(n_poss) - n_poss
+    poss_trans = np.repeat(np.arange(len(prev)), n_poss)
+    poss_item = (
+        np.arange(np.sum(n_poss))
+        - np.repeat(block_start, n_poss)
+        + np.repeat(pool_offsets[trans_list], n_poss)
+    )
+    include_poss = removed[poss_item] > prev[poss_trans]
+
+    if test is not None and len(prev) > 0:
+        pool_test_values = pack_lists(pool_test)[0]
+        recall_test_values = pack_lists(recall_test)[0]
+        prev_test = recall_test_values[prev]
+        if isinstance(test, TransitionTest):
+            # test all actual and possible transitions at once
+            include = np.asarray(test(prev_test, recall_test_values[curr]), dtype=bool)
+            include_poss &= test(prev_test[poss_trans], pool_test_values[poss_item])
+        else:
+            include = np.ones(len(prev), dtype=bool)
+            for i in range(len(prev)):
+                # test if this transition is included
+                if not test(prev_test[i], recall_test_values[curr[i]]):
+                    include[i] = False
+                    continue
+
+                # get included possible items
+                pool_start = pool_offsets[trans_list[i]]
+                pool_test_list = pool_test_values[pool_start : pool_start + n_poss[i]]
+                poss_slice = slice(block_start[i], block_start[i] + n_poss[i])
+                include_poss[poss_slice] &= test(prev_test[i], pool_test_list)
+        include_poss &= include[poss_trans]
+        poss_trans = (np.cumsum(include) - 1)[poss_trans]
+        prev = prev[include]
+        curr = curr[include]
+    return prev, curr, poss_trans[include_poss], poss_item[include_poss]
+
+
+def _batch_transitions(
+    pool_items, recall_items, pool_test=None, recall_test=None, test=None
+):
+    """Get included transitions, reusing results for batched lists."""
+    if not isinstance(recall_items, batch.ListColumn):
+        return transitions_batch(pool_items, recall_items, pool_test, recall_test, test)
+
+    # measures using the same columns and test share transitions
+    inputs = (pool_items, pool_test, recall_test, test)
+    for cached_inputs, cached in recall_items.cache:
+        if all(x is y for x, y in zip(cached_inputs, inputs)):
+            return cached
+    result = transitions_batch(pool_items, recall_items, pool_test, recall_test, test)
+    recall_items.cache.append((inputs, result))
+    return result
+
+
+def _poss_bounds(poss_trans, n_trans):
+    """Start and end of the possible transitions for each transition."""
+    return np.searchsorted(poss_trans, np.arange(n_trans + 1))
+
+
 def transitions_masker(
     pool_items,
     recall_items,
@@ -89,9 +815,9 @@ def transitions_masker(
     recall_test : list, optional
         Test values for items in output position order.
 
-    test : callable, optional
+    test : callable or str, optional
         Used to test whether individual transitions should be included,
-        based on test values.
+        based on test values. See `get_test` for declarative tests.
 
             test(prev, curr) - test for included transition
 
@@ -111,6 +837,10 @@ def transitions_masker(
     poss : numpy.array
         Output values for all possible valid "to" items.
 
+    See Also
+    --------
+    transitions_index : Get indices of included transitions.
+
     Examples
     --------
     >>> from psifr import transitions
@@ -125,41 +855,17 @@ def transitions_masker(
     2 2 3 [1 3 4 5]
     5 1 4 [4 5]
     """
-    pool_items = pool_items.copy()
-    pool_output = pool_output.copy()
-    if test is not None:
-        pool_test = pool_test.copy()
-
-    for n in range(len(recall_items) - 1):
-        # test if the previous item is in the pool
-        if pd.isnull(recall_items[n]) or (recall_items[n] not in pool_items):
-            continue
-
-        # remove the item from the pool
-        ind = pool_items.index(recall_items[n])
-        del pool_items[ind]
-        del pool_output[ind]
-        if test is not None:
-            del pool_test[ind]
-
-        # test if the current item is in the pool
-        if pd.isnull(recall_items[n + 1]) or (recall_items[n + 1] not in pool_items):
-            continue
-
-        prev = recall_output[n]
-        curr = recall_output[n + 1]
-        poss = np.array(pool_output)
-        if test is not None:
-            # test if this transition is included
-            if not test(recall_test[n], recall_test[n + 1]):
-                continue
-
-            # get included possible items
-            ind = test(recall_test[n], np.array(pool_test))
-            if not isinstance(ind, np.ndarray):
-                ind = np.repeat(ind, poss.shape)
-            poss = poss[ind]
-        yield n + 1, prev, curr, poss
+    output, prev, curr, poss = transitions_index(
+        pool_items, recall_items, pool_test, recall_test, test
+    )
+    pool_output = np.asarray(pool_output)
+    for i in range(len(output)):
+        yield (
+            int(output[i]),
+            recall_output[prev[i]],
+            recall_output[curr[i]],
+            pool_output[poss[i]],
+        )
 
 
 def sequences_masker(
@@ -200,9 +906,9 @@ def sequences_masker(
     recall_test : list, optional
         Test values for items in output position order.
 
-    test : callable, optional
+    test : callable or str, optional
         Used to test whether individual transitions should be included,
-        based on test values.
+        based on test values. See `get_test` for declarative tests.
 
             test(prev, curr) - test for included transition
 
@@ -327,9 +1033,9 @@ def windows_masker(
     recall_test : list, optional
         Test values for items in output position order.
 
-    test : callable, optional
+    test : callable or str, optional
         Used to test whether individual transitions should be included,
-        based on test values.
+        based on test values. See `get_test` for declarative tests.
 
             test(prev, curr) - test for included transition
 
@@ -351,56 +1057,55 @@ def windows_masker(
         Output values for all possible valid "to" items in included
         transitions.
     """
-    # pool items include all items in presentation order; poss items
-    # include only items that have not been recalled yet
-    poss_items = pool_items.copy()
-    poss_output = pool_output.copy()
+    # pool items include all items in presentation order; possible
+    # items include only items that have not been recalled yet
+    test = get_test(test)
+    pool_items = np.asarray(pool_items)
     pool_output = np.asarray(pool_output)
     if test is not None:
-        poss_test = pool_test.copy()
         pool_test = np.asarray(pool_test)
     window_lags = np.asarray(window_lags)
 
-    for n in range(len(recall_items) - 1):
-        # test if the previous item is in the pool
-        if pd.isnull(recall_items[n]) or (recall_items[n] not in poss_items):
-            continue
-
-        # remove the item from the pool
-        ind = poss_items.index(recall_items[n])
-        del poss_items[ind]
-        del poss_output[ind]
-        if test is not None:
-            del poss_test[ind]
-
-        # test if the current item is in the pool
-        if pd.isnull(recall_items[n + 1]) or (recall_items[n + 1] not in poss_items):
-            continue
-
+    output, prev_ind, curr_ind, poss_mask = transitions_index(pool_items, recall_items)
+    for n, i, j, mask in zip(output, prev_ind, curr_ind, poss_mask):
         # get windowed items in the input list
-        prev = int(recall_items[n]) + window_lags
+        prev = int(recall_items[i]) + window_lags
 
         # exclude if any windowed items do not exist or fail test
         if np.any(prev < 1) or np.any(prev > list_length):
             continue
 
         # exclude current/possible items in the window
-        curr = int(recall_items[n + 1])
+        curr = int(recall_items[j])
         if curr in prev:
             continue
-        poss = np.asarray(poss_items, int)
+        poss = pool_items[mask].astype(int)
         include_poss = ~np.isin(poss, prev)
         poss = poss[include_poss]
 
         if test is not None:
             # test if this transition is included
-            if np.any(~test(pool_test[prev - 1], recall_test[n + 1])):
+            if np.any(~test(pool_test[prev - 1], recall_test[j])):
                 continue
 
             # get included possible items
             include = test(pool_test[prev - 1][:, np.newaxis], pool_test[poss - 1])
             poss = poss[np.all(include, axis=0)]
-        yield n + 1, pool_output[prev - 1], pool_output[curr - 1], pool_output[poss - 1]
+        yield (
+            int(n),
+            pool_output[prev - 1],
+            pool_output[curr - 1],
+            pool_output[poss - 1],
+        )
+
+
+def _lag_index(lag, bins):
+    """Index of unit-width lag bins, matching numpy.histogram."""
+    lag = np.asarray(lag, dtype=float)
+    index = np.full(lag.shape, -1, dtype=int)
+    valid = (lag >= bins[0]) & (lag <= bins[-1])
+    index[valid] = np.minimum(np.floor(lag[valid] - bins[0]), len(bins) - 2)
+    return index
 
 
 def count_lags(
@@ -445,10 +1150,11 @@ def count_lags(
         List of some test value for each recall attempt by output
         position.
 
-    test : callable
+    test : callable or str
         Callable that evaluates each transition between items n and
         n+1. Must take test values for items n and n+1 and return True
-        if a given transition should be included.
+        if a given transition should be included. See `get_test` for
+        declarative tests.
 
     count_unique : bool, optional
         If true, only unique values will be counted toward the possible
@@ -502,36 +1208,34 @@ def count_lags(
     if recall_label is None:
         recall_label = recall_items
 
-    list_actual = []
-    list_possible = []
-    for i, recall_items_list in enumerate(recall_items):
-        # set up masker to filter transitions
-        pool_test_list = None if pool_test is None else pool_test[i]
-        recall_test_list = None if recall_test is None else recall_test[i]
-        masker = transitions_masker(
-            pool_items[i],
-            recall_items_list,
-            pool_label[i],
-            recall_label[i],
-            pool_test_list,
-            recall_test_list,
-            test,
-        )
-
-        for output, prev, curr, poss in masker:
-            # for this step, calculate actual lag and all possible lags
-            list_actual.append(curr - prev)
-            tran_poss = poss - prev
-            if count_unique:
-                tran_poss = np.unique(tran_poss)
-            list_possible.extend(tran_poss)
+    # get included transitions for all lists
+    prev, curr, poss_trans, poss_item = _batch_transitions(
+        pool_items, recall_items, pool_test, recall_test, test
+    )
+    pool_label = pack_lists(pool_label)[0]
+    recall_label = pack_lists(recall_label)[0]
 
-    # count the actual and possible transitions for each lag
+    # bin the actual and possible lags of each transition
     max_lag = list_length - 1
     lags = np.arange(-max_lag, max_lag + 2)
+    n_bin = len(lags) - 1
+    prev_label = recall_label[prev]
+    actual_bin = _lag_index(recall_label[curr] - prev_label, lags)
+    possible_bin = _lag_index(pool_label[poss_item] - prev_label[poss_trans], lags)
+    actual_bin = actual_bin[actual_bin >= 0]
+    valid = possible_bin >= 0
+    possible_bin = possible_bin[valid]
+    if count_unique:
+        # count each lag only once per transition
+        possible_key = np.unique(poss_trans[valid] * n_bin + possible_bin)
+        possible_bin = possible_key % n_bin
+
+    # count the actual and possible transitions for each lag
     index = pd.Index(lags[:-1], name='lag')
-    actual = pd.Series(np.histogram(list_actual, lags)[0], index=index)
-    possible = pd.Series(np.histogram(list_possible, lags)[0], index=index)
+    count_actual = np.bincount(actual_bin, minlength=n_bin)
+    count_possible = np.bincount(possible_bin, minlength=n_bin)
+    actual = pd.Series(count_actual, index=index)
+    possible = pd.Series(count_possible, index=index)
     return actual, possible
 
 
@@ -577,10 +1281,11 @@ def count_lags_compound(
         List of some test value for each recall attempt by output
         position.
 
-    test : callable
+    test : callable or str
         Callable that evaluates each transition between items n and
         n+1. Must take test values for items n and n+1 and return True
-        if a given transition should be included.
+        if a given transition should be included. See `get_test` for
+        declarative tests.
 
     count_unique : bool, optional
         If true, only unique values will be counted toward the possible
@@ -644,54 +1349,49 @@ def count_lags_compound(
     if recall_label is None:
         recall_label = recall_items
 
-    prev_actual = []
-    prev_possible = []
-    curr_actual = []
-    curr_possible = []
-    for i, recall_items_list in enumerate(recall_items):
-        # set up masker to filter pairs of transitions
-        pool_test_list = None if pool_test is None else pool_test[i]
-        recall_test_list = None if recall_test is None else recall_test[i]
-        masker = sequences_masker(
-            2,
-            pool_items[i],
-            recall_items_list,
-            pool_label[i],
-            recall_label[i],
-            pool_test_list,
-            recall_test_list,
-            test,
-        )
-
-        for output, prev, curr, poss in masker:
-            # calculate lag of prior transition
-            prev_lag = curr[-2] - prev[-2]
-
-            # actual and possible lags of current transition
-            curr_lag = curr[-1] - prev[-1]
-            poss_lag = poss[-1] - prev[-1]
-
-            # add lags to count
-            prev_actual.append(prev_lag)
-            curr_actual.append(curr_lag)
-            if count_unique:
-                poss_lag = np.unique(poss_lag)
-            prev_possible.extend([prev_lag] * len(poss_lag))
-            curr_possible.extend(poss_lag)
+    # get included transitions for all lists
+    prev, curr, poss_trans, poss_item = _batch_transitions(
+        pool_items, recall_items, pool_test, recall_test, test
+    )
+    pool_label = pack_lists(pool_label)[0]
+    recall_label = pack_lists(recall_label)[0]
 
-    # define possible combinations of previous and current lags
+    # bin the actual and possible lags of each transition
     max_lag = list_length - 1
     bins = np.arange(-max_lag, max_lag + 2)
+    n_bin = len(bins) - 1
+    prev_label = recall_label[prev]
+    actual_bin = _lag_index(recall_label[curr] - prev_label, bins)
+    possible_bin = _lag_index(pool_label[poss_item] - prev_label[poss_trans], bins)
+
+    # find pairs of transitions at adjacent output positions, and get
+    # the lag of the prior transition
+    second = np.nonzero(curr[:-1] == prev[1:])[0] + 1
+    prior_bin = np.full(len(prev), -1, dtype=int)
+    prior_bin[second] = actual_bin[second - 1]
+
+    # combine prior and current lag into one bin index
+    include = (prior_bin >= 0) & (actual_bin >= 0)
+    compound_actual = prior_bin[include] * n_bin + actual_bin[include]
+    poss_prior = prior_bin[poss_trans]
+    include = (poss_prior >= 0) & (possible_bin >= 0)
+    compound_possible = poss_prior[include] * n_bin + possible_bin[include]
+    if count_unique:
+        # count each lag only once per transition
+        possible_key = np.unique(poss_trans[include] * n_bin**2 + compound_possible)
+        compound_possible = possible_key % n_bin**2
+
+    # define possible combinations of previous and current lags
     lags = bins[:-1]
     compound_lags = list(itertools.product(lags, lags))
     index = pd.MultiIndex.from_tuples(compound_lags, names=['previous', 'current'])
 
     # count the actual and possible transitions for each (lag, lag)
     # combination
-    count_actual = np.histogram2d(prev_actual, curr_actual, bins)[0].astype(int)
-    actual = pd.Series(count_actual.ravel(), index=index)
-    count_possible = np.histogram2d(prev_possible, curr_possible, bins)[0].astype(int)
-    possible = pd.Series(count_possible.ravel(), index=index)
+    count_actual = np.bincount(compound_actual, minlength=n_bin**2)
+    actual = pd.Series(count_actual, index=index)
+    count_possible = np.bincount(compound_possible, minlength=n_bin**2)
+    possible = pd.Series(count_possible, index=index)
     return actual, possible
 
 
@@ -732,10 +1432,11 @@ def rank_lags(
         List of some test value for each recall attempt by output
         position.
 
-    test : callable
+    test : callable or str
         Callable that evaluates each transition between items n and
         n+1. Must take test values for items n and n+1 and return True
-        if a given transition should be included.
+        if a given transition should be included. See `get_test` for
+        declarative tests.
 
     Returns
     -------
@@ -763,26 +1464,98 @@ def rank_lags(
     if recall_label is None:
         recall_label = recall_items
 
-    rank = []
-    for i, recall_items_list in enumerate(recall_items):
-        # set up masker to filter transitions
-        pool_test_list = None if pool_test is None else pool_test[i]
-        recall_test_list = None if recall_test is None else recall_test[i]
-        masker = transitions_masker(
-            pool_items[i],
-            recall_items_list,
-            pool_label[i],
-            recall_label[i],
-            pool_test_list,
-            recall_test_list,
-            test,
-        )
+    # get included transitions for all lists
+    prev, curr, poss_trans, poss_item = _batch_transitions(
+        pool_items, recall_items, pool_test, recall_test, test
+    )
+    pool_label = pack_lists(pool_label)[0]
+    recall_label = pack_lists(recall_label)[0]
+
+    # absolute lag of actual and possible transitions
+    prev_label = recall_label[prev]
+    actual = np.abs(recall_label[curr] - prev_label)
+    possible = np.abs(pool_label[poss_item] - prev_label[poss_trans])
+    bounds = _poss_bounds(poss_trans, len(prev))
+    rank = 1 - percentile_rank_batch(actual, possible, bounds)
+    return rank.tolist()
+
+
+def _edge_codes(values, edges):
+    """Position of values relative to bin edges."""
+    values = np.asarray(values)
+    index = np.searchsorted(edges, values, side='left')
+    at_edge = values == edges[np.minimum(index, len(edges) - 1)]
+    codes = 2 * index + at_edge
+    return codes.astype(np.min_scalar_type(2 * len(edges)))
+
+
+def _code_bins(codes, n_bin, right=True):
+    """Bin index for each edge code, with out-of-range values last."""
+    # codes are 2i between edges i - 1 and i, and 2i + 1 at edge i
+    code = np.arange(2 * n_bin + 3)
+    if right:
+        # bins are closed on the right, as in pandas.cut
+        index = code // 2 - 1
+    else:
+        # bins are closed on the left, as in numpy.histogram, except
+        # for the last bin, which is closed on both sides
+        index = (code - 1) // 2
+        index[2 * n_bin + 1] = n_bin - 1
+    index[(index < 0) | (index >= n_bin)] = n_bin
+    return index[codes]
+
+
+def digitize_distances(distances, edges, block_size=1024):
+    """
+    Code the position of each distance relative to bin edges.
 
-        for output, prev, curr, poss in masker:
-            actual = np.abs(curr - prev)
-            possible = np.abs(poss - prev)
-            rank.append(1 - percentile_rank(actual, possible))
-    return rank
+    Coding a distance matrix once allows transitions to be counted
+    using integer lookups, and the coded matrix takes less memory than
+    the distances (one byte per pair for up to 126 bins).
+
+    Parameters
+    ----------
+    distances : numpy.ndarray
+        Items x items matrix of pairwise distances or similarities.
+
+    edges : array-like
+        Edges of bins to apply to distances. Must increase
+        monotonically.
+
+    block_size : int, optional
+        Number of rows to code at a time.
+
+    Returns
+    -------
+    codes : numpy.ndarray
+        Items x items matrix with the position of each distance. Codes
+        are :code:`2 * i` for distances between edges :code:`i - 1` and
+        :code:`i`, and :code:`2 * i + 1` for distances equal to edge
+        :code:`i`. Codes may be converted to bins that are closed on
+        either side.
+
+    See Also
+    --------
+    count_distance : Count transitions within distance bins.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from psifr import transitions
+    >>> distances = np.array([[0, 1, 2], [1, 0, 3], [2, 3, 0]])
+    >>> transitions.digitize_distances(distances, [0.5, 1.5, 2])
+    array([[0, 2, 5],
+           [2, 0, 6],
+           [5, 6, 0]], dtype=uint8)
+    """
+    edges = np.asarray(edges)
+    if np.any(np.diff(edges) <= 0):
+        raise ValueError('Edges must increase monotonically.')
+    codes = np.empty(distances.shape, dtype=np.min_scalar_type(2 * len(edges)))
+    for start in range(0, distances.shape[0], block_size):
+        stop = start + block_size
+        codes[start:stop] = _edge_codes(distances[start:stop], edges)
+    return codes
 
 
 def count_distance(
@@ -796,6 +1569,7 @@ def count_distance(
     recall_test=None,
     test=None,
     count_unique=False,
+    codes=None,
 ):
     """
     Count transitions within distance bins.
@@ -826,9 +1600,10 @@ def count_distance(
     recall_test : list of list, optional
         Test value for each recalled item.
 
-    test : callable
+    test : callable or str
         Called as test(prev, curr) or test(prev, poss) to screen
-        actual and possible transitions, respectively.
+        actual and possible transitions, respectively. See `get_test`
+        for declarative tests.
 
     count_unique : bool, optional
         If true, only unique values will be counted toward the possible
@@ -837,6 +1612,11 @@ def count_distance(
         incremented once. If false, all possible transitions will add
         to the count.
 
+    codes : numpy.ndarray, optional
+        Position of each distance relative to `edges`, from
+        `digitize_distances`. If specified, used in place of
+        `distances`.
+
     Returns
     -------
     actual : pandas.Series
@@ -873,39 +1653,47 @@ def count_distance(
     (2.5, 3.5]    1
     dtype: int64
     """
-    list_actual = []
-    list_possible = []
-    centers = edges[:-1] + np.diff(edges) / 2
-    for i in range(len(recall_items)):
-        pool_test_list = None if pool_test is None else pool_test[i]
-        recall_test_list = None if recall_test is None else recall_test[i]
-        masker = transitions_masker(
-            pool_items[i],
-            recall_items[i],
-            pool_index[i],
-            recall_index[i],
-            pool_test_list,
-            recall_test_list,
-            test,
-        )
-        for output, prev, curr, poss in masker:
-            prev = int(prev)
-            curr = int(curr)
-            poss = poss.astype(int)
-
-            list_actual.append(distances[prev, curr])
-            tran_poss = distances[prev, poss]
-            if count_unique:
-                # get count of each possible bin
-                bin_count_poss = np.histogram(tran_poss, edges)[0]
-
-                # for each bin that was possible, add the center as a
-                # possible transition
-                tran_poss = centers[np.nonzero(bin_count_poss)[0]]
-            list_possible.extend(tran_poss)
-
-    actual = pd.cut(list_actual, edges).value_counts()
-    possible = pd.cut(list_possible, edges).value_counts()
+    edges = np.asarray(edges)
+    if np.any(np.diff(edges) <= 0):
+        raise ValueError('Edges must increase monotonically.')
+    n_bin = len(edges) - 1
+
+    # get included transitions for all lists
+    prev, curr, poss_trans, poss_item = _batch_transitions(
+        pool_items, recall_items, pool_test, recall_test, test
+    )
+    pool_index = pack_lists(pool_index)[0]
+    recall_index = pack_lists(recall_index)[0]
+
+    # position of actual and possible transition distances
+    prev_index = recall_index[prev].astype(int)
+    curr_index = recall_index[curr].astype(int)
+    poss_prev = prev_index[poss_trans]
+    poss_curr = pool_index[poss_item].astype(int)
+    if codes is None:
+        actual_code = _edge_codes(distances[prev_index, curr_index], edges)
+        possible_code = _edge_codes(distances[poss_prev, poss_curr], edges)
+    else:
+        actual_code = codes[prev_index, curr_index]
+        possible_code = codes[poss_prev, poss_curr]
+
+    actual_bin = _code_bins(actual_code, n_bin)
+    if count_unique:
+        # count each bin only once per transition, using histogram bins
+        possible_bin = _code_bins(possible_code, n_bin, right=False)
+        valid = possible_bin < n_bin
+        key = np.unique(poss_trans[valid] * n_bin + possible_bin[valid])
+        possible_bin = key % n_bin
+    else:
+        possible_bin = _code_bins(possible_code, n_bin)
+
+    # count the actual and possible transitions for each bin
+    intervals = pd.cut(edges[:0], edges).categories
+    index = pd.CategoricalIndex(intervals, ordered=True)
+    count_actual = np.bincount(actual_bin, minlength=n_bin + 1)[:n_bin]
+    count_possible = np.bincount(possible_bin, minlength=n_bin + 1)[:n_bin]
+    actual = pd.Series(count_actual, index=index)
+    possible = pd.Series(count_possible, index=index)
     return actual, possible
 
 
@@ -945,9 +1733,10 @@ def rank_distance(
     recall_test : list of list, optional
         Test value for each recalled item.
 
-    test : callable
+    test : callable or str
         Called as test(prev, curr) or test(prev, poss) to screen
-        actual and possible transitions, respectively.
+        actual and possible transitions, respectively. See `get_test`
+        for declarative tests.
 
     Returns
     -------
@@ -975,27 +1764,21 @@ def rank_distance(
     ... )
     [0.75, 0.0, nan]
     """
-    rank = []
-    for i in range(len(recall_items)):
-        pool_test_list = None if pool_test is None else pool_test[i]
-        recall_test_list = None if recall_test is None else recall_test[i]
-        masker = transitions_masker(
-            pool_items[i],
-            recall_items[i],
-            pool_index[i],
-            recall_index[i],
-            pool_test_list,
-            recall_test_list,
-            test,
-        )
-        for output, prev, curr, poss in masker:
-            prev = int(prev)
-            curr = int(curr)
-            poss = poss.astype(int)
-            actual = distances[prev, curr]
-            possible = distances[prev, poss]
-            rank.append(1 - percentile_rank(actual, possible))
-    return rank
+    # get included transitions for all lists
+    prev, curr, poss_trans, poss_item = _batch_transitions(
+        pool_items, recall_items, pool_test, recall_test, test
+    )
+    pool_index = pack_lists(pool_index)[0]
+    recall_index = pack_lists(recall_index)[0]
+
+    # distances for actual and possible transitions
+    prev_index = recall_index[prev].astype(int)
+    curr_index = recall_index[curr].astype(int)
+    actual = distances[prev_index, curr_index]
+    possible = distances[prev_index[poss_trans], pool_index[poss_item].astype(int)]
+    bounds = _poss_bounds(poss_trans, len(prev))
+    rank = 1 - percentile_rank_batch(actual, possible, bounds)
+    return rank.tolist()
 
 
 def rank_distance_shifted(
@@ -1038,9 +1821,10 @@ def rank_distance_shifted(
     recall_test : list of list, optional
         Test value for each recalled item.
 
-    test : callable
+    test : callable or str
         Called as test(prev, curr) or test(prev, poss) to screen
-        actual and possible transitions, respectively.
+        actual and possible transitions, respectively. See `get_test`
+        for declarative tests.
 
     Returns
     -------
@@ -1078,33 +1862,54 @@ def rank_distance_shifted(
     array([[0.  , 0.25],
            [1.  , 1.  ]])
     """
-    rank = []
-    for i in range(len(recall_items)):
-        pool_test_list = None if pool_test is None else pool_test[i]
-        recall_test_list = None if recall_test is None else recall_test[i]
-        masker = sequences_masker(
-            max_shift,
-            pool_items[i],
-            recall_items[i],
-            pool_index[i],
-            recall_index[i],
-            pool_test_list,
-            recall_test_list,
-            test,
-        )
-        for s_output, s_prev, s_curr, s_poss in masker:
-            curr = int(s_curr[-1])
-            poss = s_poss[-1].astype(int)
-            rank_shift = []
-            for j in range(max_shift, 0, -1):
-                # rank previous to current distance for this shift
-                prev = int(s_prev[-j])
-                actual = distances[prev, curr]
-                possible = distances[prev, poss]
-                rank_shift.append(1 - percentile_rank(actual, possible))
-            rank.append(rank_shift)
-    rank = np.array(rank)
-    return rank
+    # get included transitions for all lists
+    prev, curr, poss_trans, poss_item = _batch_transitions(
+        pool_items, recall_items, pool_test, recall_test, test
+    )
+    pool_index = pack_lists(pool_index)[0]
+    recall_index = pack_lists(recall_index)[0]
+
+    # a transition is ranked if it ends a sequence of max_shift adjacent
+    # included transitions; because transitions are in order, the
+    # sequence is complete if it started max_shift - 1 transitions back
+    shift = max_shift - 1
+    sequence = np.zeros(len(curr), dtype=bool)
+    sequence[shift:] = curr[shift:] - curr[: len(curr) - shift] == shift
+    trans = np.nonzero(sequence)[0]
+    if len(trans) == 0:
+        return np.array([])
+
+    # index of each transition ranked, and of the "from" item for each
+    # shift, starting with the earliest
+    trans_seq = np.full(len(curr), -1)
+    trans_seq[trans] = np.arange(len(trans))
+    prev_index = recall_index[prev[trans][:, np.newaxis] + np.arange(-shift, 1)]
+    prev_index = prev_index.astype(int)
+    curr_index = recall_index[curr[trans]].astype(int)
+    actual = distances[prev_index, curr_index[:, np.newaxis]]
+
+    # distances from each shifted item to each possible item
+    poss_seq = trans_seq[poss_trans]
+    include = poss_seq >= 0
+    poss_seq = poss_seq[include]
+    poss_index = pool_index[poss_item[include]].astype(int)
+    possible = distances[prev_index[poss_seq], poss_index[:, np.newaxis]]
+
+    # group possible distances by transition and shift
+    n_possible = np.bincount(poss_seq, minlength=len(trans))
+    seq_start = np.cumsum(n_possible) - n_possible
+    position = (
+        seq_start[poss_seq, np.newaxis] * max_shift
+        + np.arange(max_shift) * n_possible[poss_seq, np.newaxis]
+        + (np.arange(len(poss_seq)) - seq_start[poss_seq])[:, np.newaxis]
+    )
+    grouped = np.empty(possible.size, dtype=possible.dtype)
+    grouped[position.ravel()] = possible.ravel()
+
+    # rank all shifts of all transitions at once
+    offsets = np.hstack([0, np.cumsum(np.repeat(n_possible, max_shift))])
+    rank = 1 - percentile_rank_batch(actual.ravel(), grouped, offsets)
+    return rank.reshape(-1, max_shift)
 
 
 def rank_distance_window(
@@ -1151,9 +1956,10 @@ def rank_distance_window(
     recall_test : list of list, optional
         Test value for each recalled item.
 
-    test : callable
+    test : callable or str
         Called as test(prev, curr) or test(prev, poss) to screen
-        actual and possible transitions, respectively.
+        actual and possible transitions, respectively. See `get_test`
+        for declarative tests.
 
     Returns
     -------
@@ -1163,7 +1969,9 @@ def rank_distance_window(
         transitions, and 1 if the distance was the smallest. Ties are
         assigned to the average percentile rank.
     """
-    rank = []
+    actual = []
+    possible = []
+    n_possible = []
     for i in range(len(recall_items)):
         pool_test_list = None if pool_test is None else pool_test[i]
         recall_test_list = None if recall_test is None else recall_test[i]
@@ -1179,14 +1987,19 @@ def rank_distance_window(
             test,
         )
         for output, w_prev, curr, poss in masker:
-            rank_lag = []
-            for prev in w_prev:
-                actual = distances[prev, curr]
-                possible = distances[prev, poss]
-                rank_lag.append(1 - percentile_rank(actual, possible))
-            rank.append(rank_lag)
-    rank = np.array(rank)
-    return rank
+            # window item to current distance for each lag
+            actual.append(distances[w_prev, curr])
+            possible.append(distances[w_prev[:, np.newaxis], poss].ravel())
+            n_possible.extend([len(poss)] * len(w_prev))
+    if not actual:
+        return np.array([])
+
+    # rank all window lags of all transitions at once
+    offsets = np.hstack([0, np.cumsum(n_possible)])
+    rank = 1 - percentile_rank_batch(
+        np.concatenate(actual), np.concatenate(possible), offsets
+    )
+    return rank.reshape(-1, len(window_lags))
 
 
 def count_category(
@@ -1224,10 +2037,11 @@ def count_category(
         List of some test value for each recall attempt by output
         position.
 
-    test : callable
+    test : callable or str
         Callable that evaluates each transition between items n and
         n+1. Must take test values for items n and n+1 and return True
-        if a given transition should be included.
+        if a given transition should be included. See `get_test` for
+        declarative tests.
 
     Returns
     -------
@@ -1249,27 +2063,18 @@ def count_category(
     ... )
     (2, 2)
     """
-    actual = 0
-    possible = 0
-    for i in range(len(recall_items)):
-        # set up masker to filter transitions
-        pool_test_list = None if pool_test is None else pool_test[i]
-        recall_test_list = None if recall_test is None else recall_test[i]
-        masker = transitions_masker(
-            pool_items[i],
-            recall_items[i],
-            pool_category[i],
-            recall_category[i],
-            pool_test_list,
-            recall_test_list,
-            test,
-        )
-
-        for output, prev, curr, poss in masker:
-            if prev == curr:
-                actual += 1
-            if np.any(prev == poss):
-                possible += 1
+    # get included transitions for all lists
+    prev, curr, poss_trans, poss_item = _batch_transitions(
+        pool_items, recall_items, pool_test, recall_test, test
+    )
+    pool_category = pack_lists(pool_category)[0]
+    recall_category = pack_lists(recall_category)[0]
+
+    # count within-category actual and possible transitions
+    prev_category = recall_category[prev]
+    actual = int(np.count_nonzero(prev_category == recall_category[curr]))
+    within = pool_category[poss_item] == prev_category[poss_trans]
+    possible = len(np.unique(poss_trans[within]))
     return actual, possible
 
 
@@ -1280,20 +2085,24 @@ def count_pairs(
     actual = np.zeros((n_item, n_item), dtype=int)
     possible = np.zeros((n_item, n_item), dtype=int)
     for i, recall_items_list in enumerate(recall_items):
-        # set up masker to filter transitions
+        # get included transitions
         pool_test_list = None if pool_test is None else pool_test[i]
         recall_test_list = None if recall_test is None else recall_test[i]
-        masker = transitions_masker(
-            pool_items[i],
-            recall_items_list,
+        output, prev, curr, poss = transitions_index(
             pool_items[i],
             recall_items_list,
             pool_test_list,
             recall_test_list,
             test,
         )
+        if len(output) == 0:
+            continue
 
-        for output, prev, curr, poss in masker:
-            actual[prev, curr] += 1
-            possible[prev, poss] += 1
+        pool_items_list = np.asarray(pool_items[i]).astype(int)
+        recall_items_array = np.asarray(recall_items_list)
+        prev_item = recall_items_array[prev].astype(int)
+        curr_item = recall_items_array[curr].astype(int)
+        np.add.at(actual, (prev_item, curr_item), 1)
+        rows, cols = np.nonzero(poss)
+        np.add.at(possible, (prev_item[rows], pool_items_list[cols]), 1)
     return actual, possible
@@ -0,0 +1,93 @@
+"""Test caching of scored free recall data."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import psifr
+from psifr import cache
+from psifr import fr
+
+
+@pytest.fixture()
+def raw():
+    """Create raw free recall data."""
+    study = [['absence', 'hollow', 'pupil'], ['fountain', 'piano', 'pillow']]
+    recall = [['hollow', 'pupil', 'empty'], ['pillow', 'fountain', 'pupil']]
+    raw = fr.table_from_lists([1, 1], study, recall)
+    raw['category'] = pd.Categorical(['a', 'b', 'a', 'b', 'a', 'b'] * 2)
+    return raw
+
+
+def test_write_read_frame(tmp_path):
+    """Test writing and reading columns with different data types."""
+    frame = pd.DataFrame(
+        {
+            'float': [1.5, np.nan, 2],
+            'int': [1, 2, 3],
+            'bool': [True, False, True],
+            'nullable': pd.array([1, None, 3], dtype='Int64'),
+            'string': ['x', np.nan, 'z'],
+            'category': pd.Categorical(['u', 'v', None], ordered=True),
+            'object': [[1], 2, 'x'],
+        },
+        index=pd.Index([5, 6, 7], name='index'),
+    )
+    path = tmp_path / 'frame.npz'
+    cache.write_frame(frame, path)
+    pd.testing.assert_frame_equal(cache.read_frame(path), frame)
+
+
+def test_merge_cached(raw, tmp_path):
+    """Test reading scored data from the cache."""
+    expected = fr.merge_free_recall(raw, study_keys=['category'])
+    merged = fr.merge_free_recall(raw, cache_dir=tmp_path, study_keys=['category'])
+    pd.testing.assert_frame_equal(merged, expected)
+    assert len(os.listdir(tmp_path)) == 1
+
+    # second call should read the cache file
+    cached = fr.merge_free_recall(raw, cache_dir=tmp_path, study_keys=['category'])
+    pd.testing.assert_frame_equal(cached, expected)
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_merge_cache_invalidate(raw, tmp_path):
+    """Test that changing data or options invalidates the cache."""
+    fr.merge_free_recall(raw, cache_dir=tmp_path)
+
+    # different options
+    expected = fr.merge_free_recall(raw, study_keys=['category'])
+    merged = fr.merge_free_recall(raw, cache_dir=tmp_path, study_keys=['category'])
+    pd.testing.assert_frame_equal(merged, expected)
+
+    # different data
+    changed = raw.copy()
+    changed.loc[11, 'item'] = 'absence'
+    expected = fr.merge_free_recall(changed)
+    merged = fr.merge_free_recall(changed, cache_dir=tmp_path)
+    pd.testing.assert_frame_equal(merged, expected)
+    assert len(os.listdir(tmp_path)) == 3
+
+
+def test_merge_cache_version(raw, tmp_path, monkeypatch):
+    """Test that data scored by a different release are not used."""
+    key = cache.fingerprint(raw)
+    fr.merge_free_recall(raw, cache_dir=tmp_path)
+    monkeypatch.setattr(psifr, '__version__', '0.0.0')
+    assert cache.fingerprint(raw) != key
+    fr.merge_free_recall(raw, cache_dir=tmp_path)
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test_append_store(raw, tmp_path):
+    """Test adding new lists to a store of scored data."""
+    path = tmp_path / 'merged.npz'
+    cache.append_free_recall(raw.query('list == 1'), path, study_keys=['category'])
+    merged = cache.append_free_recall(
+        raw.query('list == 2'), path, study_keys=['category']
+    )
+    expected = fr.merge_free_recall(raw, study_keys=['category'])
+    pd.testing.assert_frame_equal(merged, expected)
+    pd.testing.assert_frame_equal(cache.read_frame(path), expected)
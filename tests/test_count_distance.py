@@ -2,6 +2,7 @@
 
 import pytest
 import numpy as np
+import pandas as pd
 from psifr import transitions
 
 
@@ -82,3 +83,37 @@ def test_distance_count_unique(data, distance):
     actual, possible = transitions.count_distance(*inputs, count_unique=True)
     np.testing.assert_array_equal(actual.to_numpy(), np.array([5, 1]))
     np.testing.assert_array_equal(possible.to_numpy(), np.array([5, 2]))
+
+
+@pytest.mark.parametrize('count_unique', [False, True])
+def test_distance_count_codes(data, distance, count_unique):
+    """Test counting with distances coded relative to bin edges."""
+    # distances at edges are binned differently for possible transitions
+    # when counting unique bins
+    edges = [0, 1, 2, 3.5]
+    inputs = [
+        edges,
+        [data['pool_position']],
+        [data['recall_position']],
+        [data['pool_position']],
+        [data['recall_position']],
+    ]
+    codes = transitions.digitize_distances(distance, edges)
+    assert codes.dtype == np.uint8
+    expected = transitions.count_distance(
+        distance, *inputs, count_unique=count_unique
+    )
+    observed = transitions.count_distance(
+        None, *inputs, count_unique=count_unique, codes=codes
+    )
+    for obs, exp in zip(observed, expected):
+        pd.testing.assert_series_equal(obs, exp)
+    if count_unique:
+        np.testing.assert_array_equal(expected[0].to_numpy(), [2, 3, 1])
+        np.testing.assert_array_equal(expected[1].to_numpy(), [0, 3, 6])
+
+
+def test_distance_count_edges(data, distance):
+    """Test that bin edges must increase."""
+    with pytest.raises(ValueError):
+        transitions.digitize_distances(distance, [0, 2, 1])
@@ -125,3 +125,17 @@ def test_compound_lag_count():
     )
     np.testing.assert_array_equal(actual, expected_actual)
     np.testing.assert_array_equal(possible, expected_possible)
+
+
+def test_lag_count_lists(data):
+    """Test transition counts pooled over lists with repeats and intrusions."""
+    pool = [data['pool_position'], [1, 2, 3, 4, 5, 6, 7, 8]]
+    recall = [data['output_position'], [8, np.nan, 7, 6, 7, 5, 9, 4]]
+    actual, possible = transitions.count_lags(data['list_length'], pool, recall)
+    # second list only adds 7 -> 6, with possible lags from -6 to -1
+    np.testing.assert_array_equal(
+        actual.to_numpy(), np.array([0, 0, 0, 0, 1, 0, 2, 0, 1, 1, 0, 1, 0, 0, 0])
+    )
+    np.testing.assert_array_equal(
+        possible.to_numpy(), np.array([0, 2, 2, 1, 2, 3, 4, 0, 3, 3, 3, 3, 2, 1, 1])
+    )
@@ -46,3 +46,35 @@ def test_count_output(list_data):
     )
     np.testing.assert_array_equal(actual, expected_actual)
     np.testing.assert_array_equal(possible, expected_possible)
+
+
+def test_count_output_test(list_data):
+    """Test output counts for recalls and possible items that pass a test."""
+    actual, possible = outputs.count_outputs(
+        list_data['list_length'],
+        list_data['pool_items'],
+        list_data['recall_items'],
+        list_data['pool_items'],
+        list_data['recall_items'],
+        list_data['pool_test'],
+        list_data['recall_test'],
+        lambda x: np.asarray(x) == 2,
+    )
+    expected_actual = np.array(
+        [
+            [0, 0, 0, 2],
+            [0, 0, 1, 0],
+            [0, 0, 0, 0],
+            [0, 0, 1, 0],
+        ]
+    )
+    expected_possible = np.array(
+        [
+            [0, 0, 2, 2],
+            [0, 0, 1, 0],
+            [0, 0, 0, 0],
+            [0, 0, 1, 0],
+        ]
+    )
+    np.testing.assert_array_equal(actual, expected_actual)
+    np.testing.assert_array_equal(possible, expected_possible)
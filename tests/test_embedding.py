@@ -0,0 +1,134 @@
+"""Test distances calculated from item embeddings."""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+from scipy.spatial import distance
+
+from psifr import embedding
+from psifr import fr
+
+
+@pytest.fixture()
+def vectors():
+    """Create random item vectors."""
+    return np.random.default_rng(42).normal(size=(12, 5))
+
+
+@pytest.fixture()
+def data():
+    """Create scored free recall data with item indices."""
+    study = [[0, 1, 2, 3, 4, 5], [6, 7, 8, 9, 10, 11], [3, 5, 7, 9, 11, 1]]
+    recall = [[2, 3, 0, 5, 4], [11, 6, 8, 10], [1, 9, 5, 7, 3, 11]]
+    raw = fr.table_from_lists([1, 1, 2], study, recall)
+    raw['item_index'] = raw['item']
+    data = fr.merge_free_recall(raw, list_keys=['item_index'])
+    return data
+
+
+@pytest.mark.parametrize('metric', ['euclidean', 'cosine', 'correlation'])
+@pytest.mark.parametrize('cache_size', [0, 3])
+def test_embedding_distances(vectors, metric, cache_size):
+    """Test distances for pairs of items."""
+    expected = distance.cdist(vectors, vectors, metric)
+    distances = embedding.EmbeddingDistances(
+        vectors, metric, cache_size=cache_size, batch_size=7
+    )
+    assert distances.shape == (12, 12)
+    rows = np.array([[0], [4], [11], [4]])
+    cols = np.array([1, 0, 4, 7, 11])
+    np.testing.assert_allclose(
+        distances[rows, cols], expected[rows, cols], atol=1e-12
+    )
+    np.testing.assert_allclose(
+        distances[[3, 3, 5], [2, 3, 9]], expected[[3, 3, 5], [2, 3, 9]], atol=1e-12
+    )
+    if cache_size:
+        # least recently used rows are removed first
+        np.testing.assert_allclose(distances[11, 0], expected[11, 0])
+        assert list(distances._cache) == [3, 5, 11]
+
+
+def test_embedding_invalid(vectors):
+    """Test that an invalid metric raises an error."""
+    with pytest.raises(ValueError):
+        embedding.EmbeddingDistances(vectors, 'cityblock')
+
+
+@pytest.mark.parametrize('cache_size', [0, 3])
+def test_embedding_measures(data, vectors, cache_size):
+    """Test that distance measures match a precomputed matrix."""
+    matrix = distance.cdist(vectors, vectors, 'cosine')
+    distances = embedding.EmbeddingDistances(vectors, 'cosine', cache_size)
+    edges = np.linspace(0, 2, 5)
+    expected = fr.distance_crp(data, 'item_index', matrix, edges)
+    observed = fr.distance_crp(data, 'item_index', distances, edges)
+    np.testing.assert_allclose(observed['prob'], expected['prob'])
+
+    expected = fr.distance_rank(data, 'item_index', matrix)
+    observed = fr.distance_rank(data, 'item_index', distances)
+    np.testing.assert_allclose(observed['rank'], expected['rank'])
+
+    restored = pickle.loads(pickle.dumps(distances))
+    observed = fr.distance_rank(data, 'item_index', restored)
+    np.testing.assert_allclose(observed['rank'], expected['rank'])
+
+
+def test_sparse_distances(vectors):
+    """Test distances with only some pairs stored."""
+    full = embedding.EmbeddingDistances(vectors)
+    matrix = distance.cdist(vectors, vectors)
+    nearest = embedding.SparseDistances.from_nearest(full, 3, fill=10, block_size=5)
+    assert nearest.matrix.nnz == 36
+
+    # nearest neighbors have their distance, and other pairs are filled
+    expected = np.full(matrix.shape, 10.0)
+    for i, row in enumerate(matrix):
+        neighbors = np.argsort(row)[1:4]
+        expected[i, neighbors] = row[neighbors]
+    rows = np.arange(12)[:, np.newaxis]
+    np.testing.assert_allclose(nearest[rows, np.arange(12)], expected)
+
+    # same neighbors from a full matrix
+    from_matrix = embedding.SparseDistances.from_nearest(matrix, 3, fill=10)
+    np.testing.assert_allclose(from_matrix[rows, np.arange(12)], expected)
+
+
+def test_sparse_distances_input():
+    """Test sparse distances with few items or an existing matrix."""
+    with pytest.raises(ValueError):
+        embedding.SparseDistances.from_nearest(np.zeros((3, 3)), 0)
+
+    # with only one item, there are no neighbors to store
+    nearest = embedding.SparseDistances.from_nearest(np.zeros((1, 1)), 2)
+    assert nearest.matrix.nnz == 0
+    np.testing.assert_array_equal(nearest[[0], [0]], [np.inf])
+
+    # the input matrix is not changed
+    matrix = sparse.csr_matrix(
+        ([1.0, 2.0, 3.0], [2, 0, 1], [0, 2, 3, 3]), shape=(3, 3)
+    )
+    distances = embedding.SparseDistances(matrix)
+    np.testing.assert_array_equal(matrix.indices, [2, 0, 1])
+    np.testing.assert_array_equal(distances[[0, 0, 1], [0, 2, 1]], [2, 1, 3])
+
+
+def test_sparse_measures(data, vectors):
+    """Test that distance measures match a full matrix with filled pairs."""
+    full = embedding.EmbeddingDistances(vectors)
+    nearest = embedding.SparseDistances.from_nearest(full, 4)
+    matrix = np.full((12, 12), np.inf)
+    rows, cols = nearest.matrix.nonzero()
+    matrix[rows, cols] = nearest[rows, cols]
+
+    edges = np.linspace(0, 4, 5)
+    expected = fr.distance_crp(data, 'item_index', matrix, edges)
+    observed = fr.distance_crp(data, 'item_index', nearest, edges)
+    pd.testing.assert_frame_equal(observed, expected)
+
+    expected = fr.distance_rank(data, 'item_index', matrix)
+    observed = fr.distance_rank(data, 'item_index', nearest)
+    pd.testing.assert_frame_equal(observed, expected)
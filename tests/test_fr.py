@@ -1,9 +1,12 @@
 """Test high-level operations in the fr module."""
 
+import pickle
+
 import numpy as np
 import pandas as pd
 import pytest
 
+from psifr import batch
 from psifr import measures
 from psifr import fr
 
@@ -155,6 +158,33 @@ def test_table_from_lists():
     )
 
 
+def test_table_from_arrays():
+    """Test creating a data table from arrays."""
+    subjects = np.array([1, 1, 2])
+    study = np.array([[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+    recall = np.array([[3, 1, 0, 0], [0, 0, 0, 0], [8, 9, 7, 0]])
+    onset = np.array([[1.1, 2.2, 0, 0], [0, 0, 0, 0], [1.2, 2.5, 3.1, 0]])
+    recall_lists = batch.ListColumn.from_padded(recall, lengths=[2, 0, 3])
+    data = fr.table_from_lists(
+        subjects, study, recall_lists, task=(study % 2, None), onset=(None, onset)
+    )
+
+    # should match the table created from lists
+    expected = fr.table_from_lists(
+        subjects.tolist(),
+        study.tolist(),
+        recall_lists.tolist(),
+        task=((study % 2).tolist(), None),
+        onset=(None, [[1.1, 2.2], [], [1.2, 2.5, 3.1]]),
+    )
+    pd.testing.assert_frame_equal(data, expected)
+
+    # lists padded with missing values
+    padded = np.array([[3, 1, np.nan], [np.nan] * 3, [8, 9, 7]])
+    recall_lists = batch.ListColumn.from_padded(padded)
+    np.testing.assert_array_equal(recall_lists.offsets, [0, 2, 2, 5])
+
+
 def test_merge(raw):
     """Test merging of study and recall trials."""
     study = raw.loc[raw['trial_type'] == 'study'].copy()
@@ -197,12 +227,13 @@ def test_merge(raw):
     assert not repeat['intrusion']
 
 
-def test_pli(raw):
+@pytest.mark.parametrize('engine', ['pandas', 'sort'])
+def test_pli(raw, engine):
     """Test labeling of prior-list intrusions."""
     data = raw.copy()
     data.loc[3:5, 'item'] = ['hollow', 'pupil', 'fountain']
     data.loc[9:11, 'item'] = ['pillow', 'fountain', 'pupil']
-    merged = fr.merge_free_recall(data)
+    merged = fr.merge_free_recall(data, engine=engine)
     assert 'prior_list' in merged.columns
     assert 'prior_input' in merged.columns
 
@@ -218,6 +249,103 @@ def test_pli(raw):
     assert np.isnan(fli['prior_input'].to_numpy()[0])
 
 
+@pytest.mark.parametrize('engine', ['pandas', 'sort'])
+def test_pli_recent(engine):
+    """Test matching prior-list intrusions to the most recent study."""
+    study = [['a', 'b'], ['c', 'a'], ['d', 'e'], ['f', 'g']]
+    recall = [['b', 'c'], ['a'], ['a', 'e'], ['a', 'e', 'd']]
+    raw = fr.table_from_lists([1, 1, 1, 1], study, recall)
+    merged = fr.merge_free_recall(raw, engine=engine, pli='recent')
+    intrusions = merged.query('intrusion')
+    assert intrusions['list'].tolist() == [1, 3, 4, 4, 4]
+    np.testing.assert_array_equal(intrusions['prior_list'], [np.nan, 2, 2, 3, 3])
+    np.testing.assert_array_equal(intrusions['prior_input'], [np.nan, 2, 2, 2, 1])
+
+    # exclude intrusions from lists that are too far back
+    merged = fr.merge_free_recall(raw, engine=engine, pli='recent', max_list_lag=1)
+    intrusions = merged.query('intrusion')
+    np.testing.assert_array_equal(intrusions['prior_list'], [np.nan, 2, np.nan, 3, 3])
+
+    # all matches are also limited by list lag
+    merged = fr.merge_free_recall(raw, engine=engine, max_list_lag=1)
+    pli = merged.query('intrusion and list == 4 and item == "a"')
+    assert len(pli) == 2
+    assert pli['prior_list'].isna().all()
+
+
+def test_merge_sort_engine(raw):
+    """Test that merge engines give identical output."""
+    data = raw.copy()
+    data.loc[9:11, 'item'] = ['pillow', 'hollow', 'absence']
+    data.loc[6, 'item'] = 'pupil'
+    kwargs = {'study_keys': ['task', 'block'], 'list_keys': ['item_index']}
+    expected = fr.merge_free_recall(data, **kwargs)
+    merged = fr.merge_free_recall(data, engine='sort', **kwargs)
+    pd.testing.assert_frame_equal(merged, expected, check_exact=True)
+
+    study = data.query('trial_type == "study"')
+    recall = data.query('trial_type == "recall"')
+    expected = fr.merge_lists(study, recall, study_keys=['task'])
+    merged = fr.merge_lists(study, recall, study_keys=['task'], engine='sort')
+    pd.testing.assert_frame_equal(merged, expected, check_exact=True)
+
+
+def test_intern_items(raw):
+    """Test storing items as categorical codes."""
+    interned = fr.intern_items(raw)
+    assert isinstance(interned['item'].dtype, pd.CategoricalDtype)
+    assert interned['item'].tolist() == raw['item'].tolist()
+    assert interned['item'].cat.categories[0] == 'absence'
+    assert not isinstance(raw['item'].dtype, pd.CategoricalDtype)
+
+    # codes for known items are kept, and new items are added
+    vocabulary = {'item': ['pupil', 'piano']}
+    interned = fr.intern_items(raw, vocabulary=vocabulary)
+    categories = interned['item'].cat.categories
+    assert categories[:3].tolist() == ['pupil', 'piano', 'absence']
+    assert interned['item'].tolist() == raw['item'].tolist()
+
+
+@pytest.mark.parametrize('engine', ['pandas', 'sort'])
+def test_merge_intern(raw, engine):
+    """Test scoring data with interned items."""
+    kwargs = {'study_keys': ['task', 'block'], 'list_keys': ['item_index']}
+    expected = fr.merge_free_recall(raw, engine=engine, **kwargs)
+    merged = fr.merge_free_recall(raw, engine=engine, intern=['task'], **kwargs)
+    assert isinstance(merged['item'].dtype, pd.CategoricalDtype)
+    assert isinstance(merged['task'].dtype, pd.CategoricalDtype)
+    decoded = merged.astype({'item': object, 'task': float})
+    pd.testing.assert_frame_equal(decoded, expected)
+
+    crp = fr.category_crp(merged, 'task')
+    pd.testing.assert_frame_equal(crp, fr.category_crp(expected, 'task'))
+
+
+@pytest.mark.parametrize('engine', ['pandas', 'sort'])
+def test_append_free_recall(raw, engine):
+    """Test scoring new lists and adding them to scored data."""
+    data = raw.copy()
+    data.loc[3, 'item'] = 'piano'
+    kwargs = {'study_keys': ['task', 'block'], 'list_keys': ['item_index']}
+    expected = fr.merge_free_recall(data, engine=engine, **kwargs)
+
+    # new list with an item that was an intrusion in the existing list
+    merged = fr.merge_free_recall(data.query('list == 1'), engine=engine, **kwargs)
+    new = data.query('list == 2')
+    updated = fr.append_free_recall(merged, new, engine=engine, **kwargs)
+    pd.testing.assert_frame_equal(updated, expected)
+
+    # existing lists are replaced
+    updated = fr.append_free_recall(expected, new, engine=engine, **kwargs)
+    pd.testing.assert_frame_equal(updated, expected)
+
+    # new list before an existing list
+    merged = fr.merge_free_recall(data.query('list == 2'), engine=engine, **kwargs)
+    new = data.query('list == 1')
+    updated = fr.append_free_recall(merged, new, engine=engine, **kwargs)
+    pd.testing.assert_frame_equal(updated, expected)
+
+
 def test_filter_raw_data(raw):
     """Test filtering raw data."""
     filt = fr.filter_data(raw, 1, [1, 2], 'study', positions=[1, 2])
@@ -233,6 +361,57 @@ def test_filter_merged_data(data):
     assert filt['item'].to_list() == ['hollow', 'pillow']
 
 
+def test_filter_index(raw, data):
+    """Test filtering indexed data."""
+    shuffled = raw.iloc[[6, 0, 7, 1, 8, 2, 9, 3, 10, 4, 11, 5]]
+    for frame in [raw, shuffled, data]:
+        index = fr.DataIndex(frame)
+        expected = fr.filter_data(frame, subjects=1, lists=2)
+        filt = fr.filter_data(index, subjects=1, lists=2)
+        pd.testing.assert_frame_equal(filt.sort_index(), expected.sort_index())
+
+    index = fr.DataIndex(raw)
+    filt = fr.filter_data(index, lists=[1, 2], trial_type='study', positions=[1, 2])
+    assert filt['item'].to_list() == ['absence', 'hollow', 'fountain', 'piano']
+
+    # contiguous selections may be views of the data
+    filt = index.filter(subjects=1, copy=False)
+    assert np.shares_memory(filt['position'].to_numpy(), raw['position'].to_numpy())
+    assert fr.filter_data(index, subjects=2).empty
+
+
+def test_block_index():
+    """Test indexing blocks of positions with the same label."""
+    block = fr.block_index(['a', 'a', 'b', np.nan, np.nan, 'b', 'a'])
+    np.testing.assert_array_equal(block, [1, 1, 2, 3, 4, 5, 6])
+
+
+def test_label_blocks(data):
+    """Test labeling blocks within each list."""
+    labeled = fr.label_blocks(data, 'block', block_key='block_index')
+    expected = data.groupby(['subject', 'list'])['block'].transform(
+        lambda x: pd.Series(fr.block_index(x), index=x.index)
+    )
+    np.testing.assert_array_equal(labeled['block_index'], expected)
+    assert 'block_index' not in data
+
+    fr.label_blocks(data, 'block', inplace=True)
+    np.testing.assert_array_equal(data['block'], expected)
+
+
+def test_reset_list():
+    """Test renumbering lists within subject."""
+    df = pd.DataFrame(
+        {'subject': [2, 2, 1, 1, 2, 1, 2], 'list': [5, 5, 3, 4, 2, 1, 3]}
+    )
+    reset = fr.reset_list(df)
+    np.testing.assert_array_equal(reset['list'], [1, 1, 1, 2, 2, 3, 3])
+    np.testing.assert_array_equal(df['list'], [5, 5, 3, 4, 2, 1, 3])
+
+    assert fr.reset_list(df, inplace=True) is None
+    np.testing.assert_array_equal(df['list'], [1, 1, 1, 2, 2, 3, 3])
+
+
 def test_split_lists(data):
     """Test splitting lists for study and recall data."""
     study = fr.split_lists(data, 'study', ['item', 'input', 'task'])
@@ -241,6 +420,51 @@ def test_split_lists(data):
     np.testing.assert_allclose(recall['recalls'][0], np.array([2.0, 3.0, np.nan]))
 
 
+def test_split_lists_batch(data):
+    """Test splitting lists into a ragged batch."""
+    study = fr.split_lists(data, 'study', ['item', 'input'], as_batch=True)
+    assert study.n_lists == 2
+    assert study.index.tolist() == [(1, 1), (1, 2)]
+    np.testing.assert_array_equal(study['input'].offsets, np.array([0, 3, 6]))
+    assert study['item'][1].tolist() == ['fountain', 'piano', 'pillow']
+
+    recall = fr.split_lists(data, 'recall', ['input'], ['recalls'], as_batch=True)
+    expected = fr.split_lists(data, 'recall', ['input'], ['recalls'])
+    for actual_list, expected_list in zip(recall['recalls'], expected['recalls']):
+        np.testing.assert_allclose(actual_list, expected_list)
+
+    subset = recall.slice_lists(1, 2)
+    assert subset.index.tolist() == [(1, 2)]
+    np.testing.assert_allclose(subset['recalls'][0], np.array([3.0, 1.0, 3.0]))
+
+
+def test_split_lists_codes(data):
+    """Test splitting categorical columns as codes."""
+    interned = fr.intern_items(data, ['item', 'task'])
+    study = fr.split_lists(
+        interned, 'study', ['item', 'task'], as_batch=True, codes=['item']
+    )
+    np.testing.assert_array_equal(study['item'][1], [2, 4, 5])
+    assert study['task'][1].tolist() == [1.0, 2.0, 1.0]
+
+    recall = fr.split_lists(interned, 'recall', ['item'], as_batch=True, codes=['item'])
+    np.testing.assert_array_equal(recall['item'][0], [3, 6, 1])
+
+
+def test_split_subjects(data):
+    """Test analyzing multiple subjects split in one pass."""
+    data2 = data.copy()
+    data2['subject'] = 2
+    data2 = data2.loc[~data2['recall'] | (data2['list'] == 2)]
+    mixed = pd.concat([data2, data], ignore_index=True)
+    batch = fr.split_lists(mixed, 'study', ['input'], as_batch=True)
+    assert batch.index.tolist() == [(1, 1), (1, 2), (2, 1), (2, 2)]
+
+    crp = fr.lag_crp(mixed)
+    expected = pd.concat([fr.lag_crp(data), fr.lag_crp(data2)])
+    pd.testing.assert_frame_equal(crp, expected)
+
+
 def test_lists_input(data):
     """Test splitting lists through the transitions interface."""
     m = measures.TransitionMeasure('input', 'input')
@@ -252,6 +476,10 @@ def test_lists_input(data):
     }
     assert pool_lists == pool_expected
 
+    pool_batch = m.split_lists(data, 'study', as_batch=True)
+    assert pool_batch['items'].tolist() == pool_expected['items']
+    assert pool_batch['test'] is None
+
     recall_lists = m.split_lists(data, 'recall')
     recall_expected = {
         'items': [[2.0, 3.0, np.nan], [3.0, 1.0, 3.0]],
@@ -345,6 +573,37 @@ def test_lag_crp(data):
     np.testing.assert_array_equal(crp['prob'], prob)
 
 
+@pytest.mark.parametrize('executor', ['process', 'thread'])
+def test_lag_crp_parallel(data, executor):
+    """Test lag-CRP analysis with subjects analyzed in parallel."""
+    data2 = data.copy()
+    data2['subject'] = 2
+    data2 = pd.concat([data, data2], ignore_index=True)
+    crp = fr.lag_crp(data2, n_jobs=2, executor=executor)
+    expected = fr.lag_crp(data2)
+    pd.testing.assert_frame_equal(crp, expected)
+
+
+def test_analyze_measures(data):
+    """Test analyzing multiple measures in one pass."""
+    lag = measures.TransitionLag(data['input'].max())
+    rank = measures.TransitionLagRank()
+    category = measures.TransitionCategory('task', item_query='input != 2')
+    stats = measures.analyze_measures(data, [lag, rank, category])
+    pd.testing.assert_frame_equal(stats[0], fr.lag_crp(data))
+    pd.testing.assert_frame_equal(stats[1], fr.lag_rank(data))
+    pd.testing.assert_frame_equal(
+        stats[2], fr.category_crp(data, 'task', item_query='input != 2')
+    )
+
+
+def test_lag_crp_declarative_test(data):
+    """Test lag-CRP analysis with a declarative transition test."""
+    crp = fr.lag_crp(data, test_key='task', test='different')
+    expected = fr.lag_crp(data, test_key='task', test=lambda x, y: x != y)
+    pd.testing.assert_frame_equal(crp, expected)
+
+
 def test_lag_crp_query_input(data):
     """Test lag-CRP analysis with item input position filter."""
     crp = fr.lag_crp(data, item_query='input != 2')
@@ -444,6 +703,45 @@ def test_distance_crp(data, distances2):
     np.testing.assert_array_equal(crp['prob'], prob)
 
 
+@pytest.mark.parametrize('dtype', [None, np.float32, np.float16])
+def test_distance_crp_mapped(data, distances2, tmp_path, dtype):
+    """Test distance CRP analysis with memory-mapped distances."""
+    path = tmp_path / 'distances.npy'
+    fr.save_distances(path, distances2, dtype=dtype, block_size=4)
+    mapped = fr.load_distances(path)
+    assert isinstance(mapped, np.memmap)
+    edges = [0.5, 1.5, 2.5, 3.5]
+    crp = fr.distance_crp(data, 'item_index', mapped, edges, count_unique=False)
+    expected = fr.distance_crp(data, 'item_index', distances2, edges)
+    pd.testing.assert_frame_equal(crp, expected)
+
+    # measures are pickled with a reference to the distances file
+    measure = measures.TransitionDistance('item_index', mapped, edges)
+    restored = pickle.loads(pickle.dumps(measure))
+    assert isinstance(restored.distances, np.memmap)
+    np.testing.assert_array_equal(restored.distances, mapped)
+
+
+def test_distance_crp_coded(data, distances2):
+    """Test coding distances when analyzing multiple subjects."""
+    edges = [0.5, 1.5, 2.5, 3.5]
+    expected = fr.distance_crp(data, 'item_index', distances2, edges)
+    data2 = data.assign(subject=2)
+    both = pd.concat([data, data2], ignore_index=True)
+    measure = measures.TransitionDistance('item_index', distances2, edges)
+    crp = measure.analyze(data)
+    assert measure._codes is None
+    pd.testing.assert_frame_equal(crp, expected)
+
+    # distances are coded after the first subject, and are not pickled
+    crp = measure.analyze(both)
+    assert measure._codes is not None
+    pd.testing.assert_frame_equal(crp.loc[2], expected.loc[1])
+    restored = pickle.loads(pickle.dumps(measure))
+    assert restored._codes is None
+    np.testing.assert_array_equal(restored.distances, distances2)
+
+
 def test_distance_crp_unique(data, distances2):
     """Test distance CRP analysis with unique counts only."""
     edges = [0.5, 1.5, 2.5, 3.5]
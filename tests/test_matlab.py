@@ -0,0 +1,101 @@
+"""Test reading MATLAB free recall data."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import io
+
+from psifr import fr
+from psifr import matlab
+
+
+@pytest.fixture()
+def frdata():
+    """Create a free recall data struct with two subjects."""
+    frdata = {
+        'pres_items': np.array(
+            [['a', 'b', 'c'], ['d', 'e', 'f'], ['g', 'h', '']], dtype=object
+        ),
+        'rec_items': np.array(
+            [['b', 'x', ''], ['', '', ''], ['h', 'g', 'a']], dtype=object
+        ),
+        'recalls': np.array([[2, -1, 0], [0, 0, 0], [2, 1, np.nan]]),
+        'subject': np.array([[2], [1], [2]]),
+        'pres': {'task': np.array([[1, 2, 1], [2, 1, 2], [1, 1, 0]])},
+        'rec': {'task': np.array([[2, 0, 0], [0, 0, 0], [1, 1, 0]])},
+    }
+    return frdata
+
+
+@pytest.fixture()
+def expected():
+    """Expected data in Psifr format."""
+    study = [['d', 'e', 'f'], ['a', 'b', 'c'], ['g', 'h']]
+    recall = [[], ['b', 'x'], ['h', 'g']]
+    task = ([[2, 1, 2], [1, 2, 1], [1, 1]], [[], [2, 0], [1, 1]])
+    return fr.table_from_lists([1, 2, 2], study, recall, encoding=task)
+
+
+def test_read_frdata(frdata, expected, tmp_path):
+    """Test reading an frdata file."""
+    path = tmp_path / 'frdata.mat'
+    io.savemat(path, {'data': frdata})
+    data = matlab.read_frdata(path, extra=['task'], names=['encoding'])
+    pd.testing.assert_frame_equal(data, expected)
+
+    merged = matlab.read_frdata(path, output='merged')
+    pd.testing.assert_frame_equal(merged, fr.merge_free_recall(expected))
+
+
+def test_read_frdata_lists(frdata, tmp_path):
+    """Test reading an frdata file as lists."""
+    path = tmp_path / 'frdata.mat'
+    io.savemat(path, {'data': frdata})
+    study, recall = matlab.read_frdata(path, output='lists')
+    assert study.index.tolist() == [(1, 1), (2, 1), (2, 2)]
+    assert study['item'].tolist() == [['d', 'e', 'f'], ['a', 'b', 'c'], ['g', 'h']]
+    assert recall['item'].tolist() == [[], ['b', 'x'], ['h', 'g']]
+
+
+def test_frdata_empty_item(frdata, tmp_path):
+    """Test excluding an empty item in the middle of a study list."""
+    frdata['pres_items'][0, 1] = ''
+    path = tmp_path / 'frdata.mat'
+    io.savemat(path, {'data': frdata})
+    study, recall = matlab.read_frdata(path, extra=['task'], output='lists')
+    assert study['item'].tolist() == [['d', 'e', 'f'], ['a', 'c'], ['g', 'h']]
+    assert study['task'].tolist() == [[2, 1, 2], [1, 1], [1, 1]]
+    assert recall['item'].tolist() == [[], ['b', 'x'], ['h', 'g']]
+
+    data = matlab.read_frdata(path)
+    study = data.query('trial_type == "study" and subject == 2 and list == 1')
+    assert study['item'].tolist() == ['a', 'c']
+    assert study['position'].tolist() == [1, 2]
+
+
+@pytest.mark.parametrize('field', ['pres_items', 'rec_items'])
+def test_frdata_missing_field(frdata, field, tmp_path):
+    """Test error for a missing items field."""
+    del frdata[field]
+    path = tmp_path / 'frdata.mat'
+    io.savemat(path, {'data': frdata})
+    with pytest.raises(ValueError, match=field):
+        matlab.read_frdata(path)
+
+
+@pytest.mark.parametrize('n_jobs', [None, 2])
+def test_read_frdata_dir(frdata, expected, tmp_path, n_jobs):
+    """Test reading a directory of frdata files."""
+    frdata2 = frdata.copy()
+    frdata2['subject'] = frdata['subject'] + 10
+    io.savemat(tmp_path / 'subj1.mat', {'data': frdata})
+    io.savemat(tmp_path / 'subj2.mat', {'data': frdata2})
+    data = matlab.read_frdata_dir(tmp_path, n_jobs=n_jobs)
+    expected = expected.drop(columns=['encoding'])
+    expected2 = expected.assign(subject=expected['subject'] + 10)
+    pd.testing.assert_frame_equal(
+        data, pd.concat([expected, expected2], ignore_index=True)
+    )
+
+    out_files = matlab.read_frdata_dir(tmp_path, out_dir=tmp_path / 'csv')
+    pd.testing.assert_frame_equal(pd.read_csv(out_files[1]), expected2)
@@ -1,5 +1,8 @@
 """Test plotting functions."""
 
+import subprocess
+import sys
+
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -111,3 +114,15 @@ def test_plot_raster(data):
     g = fr.plot_raster(data, orientation='vertical')
     plt.close()
     assert isinstance(g, sns.FacetGrid)
+
+
+def test_lazy_import():
+    """Test that plotting libraries are not loaded with the fr module."""
+    code = (
+        'import sys; from psifr import fr; '
+        'assert "seaborn" not in sys.modules; '
+        'assert "matplotlib" not in sys.modules; '
+        'assert callable(fr.plot_spc); '
+        'assert "seaborn" in sys.modules'
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
@@ -142,6 +142,45 @@ def test_rank_distance_shifted(list_data, distances):
     np.testing.assert_allclose(ranks, expected)
 
 
+def test_rank_distance_shifted_lists(list_data, distances):
+    """Test shifted rank distance for multiple lists at once."""
+    pool_items = list_data['pool_items'] * 3
+    recall_items = [[4, 3, 1, 7, 3, 0, 6, 2], [0, 1], [2, 5, 6, 9, 7, 4, 3]]
+    pool_test = list_data['pool_test'] * 3
+    recall_test = [[2, 2, 2, 1, 1, 1, 1, 1], [2, 2], [1, 1, 1, 1, 1, 1, 1]]
+    lists = list(zip(pool_items, recall_items, pool_test, recall_test))
+
+    # sequences must not span lists or excluded transitions
+    for test in [None, lambda x, y: x == y]:
+        ranks = transitions.rank_distance_shifted(
+            distances,
+            2,
+            pool_items,
+            recall_items,
+            pool_items,
+            recall_items,
+            pool_test,
+            recall_test,
+            test,
+        )
+        expected = []
+        for pool, recall, p_test, r_test in lists:
+            list_ranks = transitions.rank_distance_shifted(
+                distances,
+                2,
+                [pool],
+                [recall],
+                [pool],
+                [recall],
+                [p_test],
+                [r_test],
+                test,
+            )
+            expected.extend(list_ranks.reshape(-1, 2))
+        assert len(expected) > 0
+        np.testing.assert_allclose(ranks, np.array(expected))
+
+
 def test_rank_distance_window():
     """Test rank distance relative to items in a window."""
     distances = np.array(
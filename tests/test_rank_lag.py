@@ -14,6 +14,21 @@ def test_percentile_rank():
     np.testing.assert_array_equal(np.array(rank), np.array([0, 1 / 3, 2 / 3, 1]))
 
 
+def test_percentile_rank_batch():
+    """Test calculation of percentile ranks for multiple scores."""
+    actual = np.array([1, 2, 3, 2, 4])
+    possible = np.array([1, 2, 3, 4, 1, 2, 2, 3, 2, 3, 2, np.nan, 4])
+    offsets = np.array([0, 4, 8, 10, 12, 13])
+    rank = transitions.percentile_rank_batch(actual, possible, offsets)
+    expected = np.array([0, 0.5, 1, np.nan, np.nan])
+    np.testing.assert_array_equal(rank, expected)
+
+    # padded matrix with masked values
+    possible = np.ma.masked_invalid([[1, 2, 3, 4], [1, 2, 2, 3], [3, np.nan, 2, 2]])
+    rank = transitions.percentile_rank_batch(actual[:3], possible)
+    np.testing.assert_array_equal(rank, np.array([0, 0.5, 1]))
+
+
 @pytest.fixture()
 def list_data():
     """Create list data with item and category information."""
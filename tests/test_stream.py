@@ -0,0 +1,90 @@
+"""Test streaming analysis of free recall data."""
+
+import sys
+
+import pandas as pd
+import pytest
+
+from psifr import fr
+from psifr import measures
+from psifr import stream
+
+
+@pytest.fixture()
+def raw():
+    """Create raw free recall data for multiple subjects."""
+    study = [['absence', 'hollow', 'pupil'], ['fountain', 'piano', 'pillow']] * 3
+    recall = [['hollow', 'pupil', 'empty'], ['pillow', 'fountain', 'pupil']] * 3
+    raw = fr.table_from_lists([1, 1, 2, 2, 3, 3], study, recall)
+    return raw
+
+
+@pytest.mark.parametrize('subjects_per_chunk', [1, 2])
+@pytest.mark.parametrize('chunksize', [1, 5, 100])
+def test_read_csv(raw, tmp_path, subjects_per_chunk, chunksize):
+    """Test reading subjects from a CSV file."""
+    path = tmp_path / 'raw.csv'
+    raw.to_csv(path, index=False)
+    chunks = list(
+        stream.read_csv(
+            path, subjects_per_chunk=subjects_per_chunk, chunksize=chunksize
+        )
+    )
+    subjects = [chunk['subject'].unique().tolist() for chunk in chunks]
+    if subjects_per_chunk == 1:
+        assert subjects == [[1], [2], [3]]
+    else:
+        assert subjects == [[1, 2], [3]]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), raw)
+
+
+def test_read_csv_unsorted(raw, tmp_path):
+    """Test that subjects must be contiguous."""
+    path = tmp_path / 'raw.csv'
+    unsorted = pd.concat([raw, raw.query('subject == 1')], ignore_index=True)
+    unsorted.to_csv(path, index=False)
+    with pytest.raises(ValueError):
+        list(stream.read_csv(path, chunksize=4))
+
+
+def test_read_parquet(raw, tmp_path):
+    """Test reading subjects from a partitioned Parquet dataset."""
+    pytest.importorskip('pyarrow')
+    path = tmp_path / 'raw'
+    raw.to_parquet(path, partition_cols=['subject'])
+    chunks = list(stream.read_parquet(path, subjects_per_chunk=2))
+    assert [chunk['subject'].unique().tolist() for chunk in chunks] == [[1, 2], [3]]
+    combined = pd.concat(chunks, ignore_index=True)
+    assert len(combined) == len(raw)
+
+
+def test_read_parquet_missing(raw, tmp_path, monkeypatch):
+    """Test that reading Parquet data without pyarrow gives a clear error."""
+    for module in ['pyarrow', 'pyarrow.compute', 'pyarrow.dataset']:
+        monkeypatch.setitem(sys.modules, module, None)
+    with pytest.raises(ImportError, match='requires pyarrow'):
+        next(stream.read_parquet(tmp_path / 'raw'))
+
+
+def test_analyze_chunks(raw, tmp_path):
+    """Test analyzing data one subject at a time."""
+    path = tmp_path / 'raw.csv'
+    raw.to_csv(path, index=False)
+    measure_list = [measures.TransitionLag(3), measures.TransitionOutputs(3)]
+    chunks = stream.read_csv(path, chunksize=5)
+    stats = stream.analyze_chunks(chunks, measure_list)
+
+    data = fr.merge_free_recall(raw)
+    expected = measures.analyze_measures(data, measure_list)
+    for stat, expected_stat in zip(stats, expected):
+        pd.testing.assert_frame_equal(stat, expected_stat)
+
+
+def test_analyze_chunks_empty(raw, tmp_path):
+    """Test analyzing a file with no data."""
+    path = tmp_path / 'raw.csv'
+    raw.iloc[:0].to_csv(path, index=False)
+    assert list(stream.read_csv(path)) == []
+    chunks = stream.read_csv(path)
+    with pytest.raises(ValueError, match='No data'):
+        stream.analyze_chunks(chunks, [measures.TransitionLag(3)])
@@ -183,3 +183,135 @@ def test_windows_position_cond_category():
         assert a_prev.tolist() == prev[i]
         assert a_curr == curr[i]
         assert a_poss.tolist() == poss[i]
+
+
+def test_index_position(list_data):
+    """Test transition indices and mask of possible items."""
+    output, prev, curr, poss = transitions.transitions_index(
+        list_data['pool_position'], list_data['output_position']
+    )
+    np.testing.assert_array_equal(output, [1, 2, 3, 4, 7])
+    np.testing.assert_array_equal(prev, [0, 1, 2, 3, 6])
+    np.testing.assert_array_equal(curr, [1, 2, 3, 4, 7])
+    pool = np.array(list_data['pool_position'])
+    expected = [
+        [2, 3, 4, 5, 6, 7, 8],
+        [2, 4, 5, 6, 7, 8],
+        [2, 5, 6, 7, 8],
+        [2, 5, 6, 7],
+        [2, 6],
+    ]
+    assert [pool[p].tolist() for p in poss] == expected
+
+
+def test_index_cond_category(list_data):
+    """Test transition indices for within-category transitions."""
+    output, prev, curr, poss = transitions.transitions_index(
+        list_data['pool_position'],
+        list_data['output_position'],
+        list_data['pool_category'],
+        list_data['output_category'],
+        lambda x, y: x == y,
+    )
+    np.testing.assert_array_equal(output, [1, 2, 4, 7])
+    pool = np.array(list_data['pool_position'])
+    expected = [[2, 3, 4], [2, 4], [5, 6, 7], [6]]
+    assert [pool[p].tolist() for p in poss] == expected
+
+
+def test_index_intrusions():
+    """Test transition indices with intrusions and repeats."""
+    pool = ['a', 'b', 'c', 'd']
+    recall = ['b', np.nan, 'c', 'a', 'c', 'd', 'a', 'z', 'b']
+    output, prev, curr, poss = transitions.transitions_index(pool, recall)
+    np.testing.assert_array_equal(output, [3])
+    np.testing.assert_array_equal(poss, [[True, False, False, True]])
+
+
+def test_batch_position(list_data):
+    """Test transition indices for multiple lists at once."""
+    pool = [list_data['pool_position'], list_data['pool_position']]
+    recall = [list_data['output_position'], [8, 1, 1, 2]]
+    prev, curr, poss_trans, poss_item = transitions.transitions_batch(pool, recall)
+    np.testing.assert_array_equal(prev, [0, 1, 2, 3, 6, 8])
+    np.testing.assert_array_equal(curr, [1, 2, 3, 4, 7, 9])
+
+    # possible items for the last transition are in the second pool
+    pool_values, pool_offsets = transitions.pack_lists(pool)
+    np.testing.assert_array_equal(pool_offsets, [0, 8, 16])
+    last = poss_item[poss_trans == 5]
+    np.testing.assert_array_equal(pool_values[last], [1, 2, 3, 4, 5, 6, 7])
+
+
+def test_position_cond_category_declarative(list_data):
+    """Test position output for a declarative within-category test."""
+    masker = transitions.transitions_masker(
+        list_data['pool_position'],
+        list_data['output_position'],
+        list_data['pool_position'],
+        list_data['output_position'],
+        list_data['pool_category'],
+        list_data['output_category'],
+        'same',
+    )
+    steps = [[p, x, y, z.tolist()] for p, x, y, z in masker]
+    expected = [
+        [1, 1, 3, [2, 3, 4]],
+        [2, 3, 4, [2, 4]],
+        [4, 8, 5, [5, 6, 7]],
+        [7, 7, 6, [6]]
+    ]
+    assert steps == expected
+
+
+def test_batch_cond_declarative(list_data):
+    """Test that declarative tests match callable tests for batches."""
+    pool = [list_data['pool_position'], list_data['pool_position']]
+    recall = [list_data['output_position'], [8, 1, 1, 2]]
+    pool_test = [list_data['pool_category'], list_data['pool_category']]
+    recall_test = [list_data['output_category'], [2, 1, 1, 1]]
+    specs = [
+        ('different', lambda x, y: x != y),
+        ('<=', lambda x, y: x <= y),
+        (
+            transitions.InSet([1], which='curr') | 'different',
+            lambda x, y: (np.asarray(y) == 1) | (x != np.asarray(y)),
+        ),
+        (~transitions.Same(), lambda x, y: x != y),
+        (
+            transitions.get_test('same') & (lambda x, y: x == 1),
+            lambda x, y: (x == np.asarray(y)) & (x == 1),
+        ),
+        (
+            (lambda x, y: x == 2) | transitions.InSet([1], which='curr'),
+            lambda x, y: (x == 2) | (np.asarray(y) == 1),
+        ),
+        (transitions.Not(lambda x, y: x == y), lambda x, y: x != y),
+    ]
+    for spec, func in specs:
+        expected = transitions.transitions_batch(
+            pool, recall, pool_test, recall_test, func
+        )
+        observed = transitions.transitions_batch(
+            pool, recall, pool_test, recall_test, spec
+        )
+        for x, y in zip(observed, expected):
+            np.testing.assert_array_equal(x, y)
+
+
+def test_combined_callable_test():
+    """Test combining declarative tests with callable tests."""
+    test = transitions.Same() & (lambda x, y: x > 1)
+    np.testing.assert_array_equal(test([1, 2, 2], [1, 2, 3]), [False, True, False])
+    test = transitions.Not(lambda x, y: x == y)
+    np.testing.assert_array_equal(test(1, [1, 2]), [False, True])
+    with pytest.raises(TypeError):
+        transitions.TransitionTest()
+
+
+def test_invalid_test():
+    """Test that invalid test specifications raise an error."""
+    with pytest.raises(ValueError):
+        transitions.get_test('similar')
+    with pytest.raises(ValueError):
+        transitions.Compare('=')